@@ -8,6 +8,7 @@ import os
 import sys
 import logging
 import tempfile
+import time
 
 os.makedirs("data", exist_ok=True)
 logging.basicConfig(
@@ -25,8 +26,16 @@ import gradio as gr
 from config import CONFIG, COLORS
 from models import Rating
 from core.vision import detectar_ingredientes, VisionError
-from core.recommender import RecipeRecommender
+from core.recommender import RecipeRecommender, CursorExpiredError, RecommenderError
+from core.admission import AdmissionController, AdmissionRejected
+from core.warmup import warm_up_async
+from core import metrics
+from core.metrics import stage
+from core.tracing import current_span, trace
+from core import profiling
+from core.profiling import profiled
 from components.ui_renderer import UIRenderer
+from components.api import build_router
 from components.analytics import SimpleStore
 
 # ── Inicializar componentes globales ─────────────────────────────────────────
@@ -35,9 +44,27 @@ logger.info("🧊 Iniciando EatguAI...")
 store      = SimpleStore()
 renderer   = UIRenderer()
 recommender = RecipeRecommender()
+recommender.start_watching()   # no-op si CONFIG.RECIPES_WATCH_INTERVAL == 0
 
 CURRENT_MODE = "survival"
 
+
+def _en_cola(concurrency_id):
+    """Eventos esperando en un pool de la cola de Gradio (0 si aún no existe)."""
+    pools = getattr(getattr(demo, "_queue", None), "event_queue_per_concurrency_id", {})
+    cola  = pools.get(concurrency_id)
+    return len(cola.queue) if cola else 0
+
+
+admission = AdmissionController(queue_depth=lambda: _en_cola("vision"))
+
+# ── Pools de concurrencia ────────────────────────────────────────────────────
+# Cada concurrency_id es una cola independiente dentro de la de Gradio.
+POOL_VISION    = dict(concurrency_id="vision",    concurrency_limit=CONFIG.VISION_CONCURRENCY)
+POOL_RECOMENDAR = dict(concurrency_id="recomendar", concurrency_limit=CONFIG.RECOMMEND_CONCURRENCY)
+POOL_STORAGE   = dict(concurrency_id="storage",   concurrency_limit=CONFIG.STORAGE_CONCURRENCY)
+POOL_ADMIN     = dict(concurrency_id="admin",     concurrency_limit=1)
+
 # ── Opciones de filtros ──────────────────────────────────────────────────────
 OPCIONES_TIEMPO   = ["Todos", "15 min", "30 min", "45 min", "60 min"]
 OPCIONES_FALTAN   = ["Todos", "0", "1", "2", "3"]
@@ -49,108 +76,173 @@ FALTAN_MAP        = {"Todos": None, "0": 0, "1": 1, "2": 2, "3": 3}
 # FUNCIONES DE NEGOCIO
 # =============================================================================
 
-def analizar_nevera(imagen, n_recetas, confianza, filtro_tiempo, filtro_faltan, modo):
-    """Pipeline completo: imagen → ingredientes → recetas."""
+def _sin_recetas(ing_html, rec_html):
+    """Salida de analizar_nevera cuando no hay recetas que mostrar."""
+    return (
+        ing_html,
+        rec_html,
+        {},
+        gr.update(choices=[]),
+        gr.update(visible=False),
+        gr.update(value="", visible=False),
+        gr.update(interactive=True),
+        None,                       # cursor
+        gr.update(visible=False),   # ver más
+    )
+
+
+def _estado_valoraciones(resultados, nombres):
+    """Datos por receta que necesita guardar_rating."""
+    return {
+        r.receta.nombre: {
+            "match":        f"{r.porcentaje_match*100:.0f}%",
+            "ingredientes": ", ".join(nombres),
+        }
+        for r in resultados
+    }
+
+
+def _ampliar(cursor, n_recetas):
+    """
+    Página ampliada con las n siguientes recetas del cursor. Sale de la
+    caché del recommender: no se vuelve a puntuar. None si ha caducado.
+    """
+    if not cursor:
+        return None
+    try:
+        return recommender.page(cursor["query_id"], 0, cursor["shown"] + int(n_recetas))
+    except CursorExpiredError:
+        return None
+
+
+def admitir_analisis(imagen, request: gr.Request = None):
+    """
+    Admisión (límite por sesión/global y descarte si la cola de visión va
+    llena) al llegar el clic, fuera de la cola: un análisis rechazado no
+    llega a esperar en POOL_VISION. Deja un vale que canjea analizar_nevera.
+    Sin foto no se gasta ficha.
+    """
+    if imagen is None:
+        return
+    try:
+        admission.grant(request.session_hash if request else None)
+    except AdmissionRejected as e:
+        raise gr.Error(str(e), duration=max(5, round(e.retry_after)))
+
+
+def analizar_nevera(imagen, n_recetas, confianza, filtro_tiempo, filtro_faltan, modo,
+                    request: gr.Request = None):
+    """Pipeline completo: imagen → ingredientes → recetas. Necesita el vale de admitir_analisis."""
     global CURRENT_MODE
     CURRENT_MODE = modo
 
     if imagen is None:
-        yield (
+        yield _sin_recetas(
             renderer.render_empty_state("Sube una foto para comenzar", "default"),
             renderer.render_empty_state("Las recetas aparecerán aquí", "default"),
-            {},
-            gr.update(choices=[]),
-            gr.update(visible=False),
-            gr.update(value="", visible=False),
-            gr.update(interactive=True),
+        )
+        return
+
+    # Sin vale: /analizar_nevera llamado directamente, sin pasar por la admisión
+    if not admission.redeem(request.session_hash if request else None):
+        yield _sin_recetas(
+            renderer.render_empty_state("Pulsa «Analizar nevera» para enviar la foto", "error"),
+            renderer.render_empty_state("Tu foto no se ha enviado todavía", "default"),
         )
         return
 
     # Efecto de escaneo mientras procesa
-    yield (
+    yield _sin_recetas(
         renderer.render_scanning(),
         renderer.render_empty_state("Procesando imagen...", "default"),
-        {},
-        gr.update(choices=[]),
-        gr.update(visible=False),
-        gr.update(value="", visible=False),
-        gr.update(interactive=True),
     )
 
+    with trace("analizar_nevera", modo=modo, n_recetas=int(n_recetas), confianza=confianza):
+        salida = _analizar(imagen, n_recetas, confianza, filtro_tiempo, filtro_faltan, modo)
+    yield salida
+
+
+def _analizar(imagen, n_recetas, confianza, filtro_tiempo, filtro_faltan, modo):
+    """
+    Cuerpo de analizar_nevera tras el aviso de escaneo. Va aparte para que
+    la traza cubra todo el trabajo dentro de un mismo paso del generador.
+    """
     try:
         # 1. Guardar imagen temporal
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
+        with stage("image_save"), tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
             imagen.save(tmp.name)
             tmp_path = tmp.name
+            current_span().set_attribute("image.size", f"{imagen.width}x{imagen.height}")
 
-        # 2. Detectar ingredientes
+        # 2. Detectar ingredientes (detect_gemini y clean_ingredients se miden dentro)
         conf_map  = {"Bajo": 0.3, "Medio": 0.5, "Alto": 0.75}
         min_conf  = conf_map.get(confianza, 0.5)
-        ingredientes = detectar_ingredientes(tmp_path)
-        os.unlink(tmp_path)
+        try:
+            ingredientes = detectar_ingredientes(tmp_path)
+        finally:
+            os.unlink(tmp_path)
 
         # Filtrar por confianza
         ingredientes = [i for i in ingredientes if i.confidence >= min_conf]
 
         if not ingredientes:
-            yield (
+            return _sin_recetas(
                 renderer.render_empty_state("No se detectaron ingredientes", "error"),
                 renderer.render_empty_state("Prueba con mejor iluminación", "no_results"),
-                {},
-                gr.update(choices=[]),
-                gr.update(visible=False),
-                gr.update(value="", visible=False),
-                gr.update(interactive=True),
             )
-            return
 
         # 3. Registrar búsqueda en analytics
         nombres = [i.name for i in ingredientes]
-        store.record_search(nombres)
-
-        # 4. Renderizar ingredientes
-        ing_html = renderer.render_ingredients_grid(ingredientes)
-
-        # 5. Construir filtros
-        filtros = {
-            "max_tiempo":    TIEMPO_MAP.get(filtro_tiempo),
-            "max_faltantes": FALTAN_MAP.get(filtro_faltan),
-        }
-
-        # 6. Recomendar
-        resultados = recommender.recommend(
-            nombres,
-            n=int(n_recetas),
-            modo=modo,
-            filtros=filtros,
-        )
+        # Solo la parte CPU (sin Gemini) interesa al profiler
+        with profiled("analizar_nevera", modo=modo, ingredientes=len(nombres)):
+            with stage("record_search"):
+                store.record_search(nombres)
+
+            # 4. Renderizar ingredientes
+            with stage("render"):
+                ing_html = renderer.render_ingredients_grid(ingredientes)
+
+            # 5. Construir filtros
+            filtros = {
+                "max_tiempo":    TIEMPO_MAP.get(filtro_tiempo),
+                "max_faltantes": FALTAN_MAP.get(filtro_faltan),
+            }
 
-        if not resultados:
-            yield (
-                ing_html,
-                renderer.render_empty_state("No hay recetas con esos filtros", "no_results"),
-                {},
-                gr.update(choices=[]),
-                gr.update(visible=False),
-                gr.update(value="", visible=False),
-                gr.update(interactive=True),
-            )
-            return
+            # 6. Recomendar (deja un cursor abierto para "ver más")
+            with stage("recommend"):
+                try:
+                    pagina = recommender.search(
+                        nombres,
+                        n=int(n_recetas),
+                        modo=modo,
+                        filtros=filtros,
+                    )
+                except RecommenderError as e:
+                    # p. ej. un nombre de Gemini más largo que MAX_INGREDIENT_CHARS
+                    return _sin_recetas(ing_html, renderer.render_empty_state(str(e), "no_results"))
+            resultados = pagina.items
+
+            if not resultados:
+                return _sin_recetas(
+                    ing_html,
+                    renderer.render_empty_state("No hay recetas con esos filtros", "no_results"),
+                )
 
-        # 7. Renderizar recetas
-        recetas_html = renderer.render_recipes_list(resultados, modo=modo)
+            # 7. Renderizar recetas
+            with stage("render"):
+                recetas_html = renderer.render_recipes_list(resultados, modo=modo)
 
         # 8. Estado para valoraciones
         nombres_recetas = [r.receta.nombre for r in resultados]
-        estado = {
-            r.receta.nombre: {
-                "match":        f"{r.porcentaje_match*100:.0f}%",
-                "ingredientes": ", ".join(nombres),
-            }
-            for r in resultados
+        estado = _estado_valoraciones(resultados, nombres)
+        cursor = {
+            "query_id":     pagina.query_id,
+            "shown":        len(resultados),
+            "modo":         modo,
+            "ingredientes": nombres,
         }
 
-        yield (
+        return (
             ing_html,
             recetas_html,
             estado,
@@ -158,34 +250,47 @@ def analizar_nevera(imagen, n_recetas, confianza, filtro_tiempo, filtro_faltan,
             gr.update(visible=True),
             gr.update(value="", visible=False),
             gr.update(interactive=True),
+            cursor,
+            gr.update(visible=pagina.has_more),
         )
 
     except VisionError as e:
-        yield (
+        return _sin_recetas(
             renderer.render_empty_state(f"Error de visión: {e}", "error"),
             renderer.render_empty_state("Inténtalo de nuevo", "error"),
-            {},
-            gr.update(choices=[]),
-            gr.update(visible=False),
-            gr.update(value="", visible=False),
-            gr.update(interactive=True),
         )
     except Exception as e:
-        yield (
+        return _sin_recetas(
             renderer.render_empty_state("Error inesperado", "error"),
             renderer.render_empty_state(str(e), "error"),
+        )
+
+
+def ver_mas_foto(cursor, n_recetas):
+    """Añade la siguiente página de recetas a los resultados de la foto."""
+    pagina = _ampliar(cursor, n_recetas)
+    if pagina is None:
+        return (
+            renderer.render_empty_state("La búsqueda ha caducado, vuelve a analizar la foto", "error"),
             {},
             gr.update(choices=[]),
+            None,
             gr.update(visible=False),
-            gr.update(value="", visible=False),
-            gr.update(interactive=True),
         )
+    estado = _estado_valoraciones(pagina.items, cursor["ingredientes"])
+    return (
+        renderer.render_recipes_list(pagina.items, modo=cursor["modo"]),
+        estado,
+        gr.update(choices=list(estado), value=None),
+        {**cursor, "shown": len(pagina.items)},
+        gr.update(visible=pagina.has_more),
+    )
 
 
 def recomendar_manual(ingredientes_str, n_recetas, filtro_tiempo, filtro_faltan, modo):
     """Recomendación sin foto, solo texto."""
     if not ingredientes_str.strip():
-        return renderer.render_empty_state("Escribe al menos un ingrediente.")
+        return renderer.render_empty_state("Escribe al menos un ingrediente."), None, gr.update(visible=False)
 
     nombres = [i.strip().lower() for i in ingredientes_str.split(",") if i.strip()]
 
@@ -194,12 +299,37 @@ def recomendar_manual(ingredientes_str, n_recetas, filtro_tiempo, filtro_faltan,
         "max_faltantes": FALTAN_MAP.get(filtro_faltan),
     }
 
-    resultados = recommender.recommend(nombres, n=int(n_recetas), modo=modo, filtros=filtros)
+    with trace("recomendar_manual", modo=modo, ingredientes=len(nombres)), \
+         profiled("recomendar_manual", modo=modo, ingredientes=len(nombres)):
+        try:
+            with stage("recommend"):
+                pagina = recommender.search(nombres, n=int(n_recetas), modo=modo, filtros=filtros)
+        except RecommenderError as e:
+            return renderer.render_empty_state(str(e), "no_results"), None, gr.update(visible=False)
+
+        if not pagina.items:
+            return renderer.render_empty_state("No hay recetas con esos ingredientes."), None, gr.update(visible=False)
 
-    if not resultados:
-        return renderer.render_empty_state("No hay recetas con esos ingredientes.")
+        cursor = {"query_id": pagina.query_id, "shown": len(pagina.items), "modo": modo}
+        with stage("render"):
+            html = renderer.render_recipes_list(pagina.items, modo=modo)
+    return html, cursor, gr.update(visible=pagina.has_more)
 
-    return renderer.render_recipes_list(resultados, modo=modo)
+
+def ver_mas_manual(cursor, n_recetas):
+    """Siguiente página de la búsqueda manual, servida desde el cursor."""
+    pagina = _ampliar(cursor, n_recetas)
+    if pagina is None:
+        return (
+            renderer.render_empty_state("La búsqueda ha caducado, vuelve a buscar", "error"),
+            None,
+            gr.update(visible=False),
+        )
+    return (
+        renderer.render_recipes_list(pagina.items, modo=cursor["modo"]),
+        {**cursor, "shown": len(pagina.items)},
+        gr.update(visible=pagina.has_more),
+    )
 
 
 def guardar_rating(receta_sel, gusto, relevancia, estado):
@@ -232,6 +362,103 @@ def guardar_rating(receta_sel, gusto, relevancia, estado):
         gr.update(interactive=False),    # deshabilita botón para no repetir
     )
 
+def recargar_recetas():
+    """Recarga el catálogo sin reiniciar; las búsquedas en curso no se cortan."""
+    if recommender.reload():
+        return (
+            f"<span style='color:var(--success);'>✅ Catálogo recargado: "
+            f"{len(recommender.recipes)} recetas</span>"
+        )
+    return "<span style='color:var(--error);'>⚠️ No se pudo recargar, se mantiene el catálogo actual.</span>"
+
+
+_ULTIMAS_COLAS: dict = {}
+
+
+def estado_colas():
+    """
+    Profundidad, workers ocupados y espera de cada pool de la cola de Gradio.
+    Lee atributos privados de gradio.queueing (versión acotada en
+    requirements.txt) mientras el bucle de eventos los modifica: copia cada
+    colección antes de recorrerla y, si aun así falla, devuelve la última
+    lectura buena para que /colas y /metrics no se caigan.
+    """
+    global _ULTIMAS_COLAS
+    queue  = getattr(demo, "_queue", None)
+    ahora  = time.monotonic()
+    estado = {}
+    try:
+        pools   = list(getattr(queue, "event_queue_per_concurrency_id", {}).items())
+        tiempos = list(getattr(queue, "process_time_per_fn", {}).items())
+        for cid, cola in pools:
+            eventos  = list(cola.queue)
+            procesos = [t for fn, t in tiempos if fn.concurrency_id == cid and t.count]
+            estado[cid] = {
+                "en_cola":       len(eventos),
+                "activos":       cola.current_concurrency,
+                "limite":        cola.concurrency_limit,
+                "espera_max_s":  round(max((ahora - e.enqueue_time for e in eventos), default=0.0), 3),
+                "proceso_medio_s": round(
+                    sum(t.process_time for t in procesos) / max(sum(t.count for t in procesos), 1), 3
+                ),
+            }
+    except (RuntimeError, AttributeError) as e:
+        logger.warning(f"Estado de colas no disponible, se usa la última lectura: {e}")
+        return dict(_ULTIMAS_COLAS)
+    _ULTIMAS_COLAS = estado
+    return estado
+
+
+def mostrar_colas():
+    """Estado de las colas y de la caché de consultas para la pestaña de estadísticas."""
+    adm   = admission.stats()
+    linea_adm = (
+        f"<div class='text-label' style='margin-top:8px;'>Análisis admitidos: {adm['admitidas']} · "
+        f"rechazados por carga {adm['rechazadas']['carga']}, sesión {adm['rechazadas']['sesion']}, "
+        f"global {adm['rechazadas']['global']}</div>"
+    )
+    cache = recommender.cache_stats()
+    linea_cache = (
+        f"<div class='text-label' style='margin-top:8px;'>Caché de consultas: "
+        f"{cache['hit_rate']*100:.0f}% aciertos ({cache['hits']}/{cache['hits'] + cache['misses']}) · "
+        f"{cache['size']}/{cache['maxsize']} entradas</div>"
+    )
+    estado = estado_colas()
+    if not estado:
+        return "<span style='color:var(--text-muted);'>Sin eventos en cola todavía.</span>" + linea_cache + linea_adm
+    filas = "".join(
+        f"<tr><td>{cid}</td><td>{e['en_cola']}</td><td>{e['activos']}/{e['limite']}</td>"
+        f"<td>{e['espera_max_s']:.2f} s</td><td>{e['proceso_medio_s']:.2f} s</td></tr>"
+        for cid, e in sorted(estado.items())
+    )
+    return (
+        "<table style='width:100%; font-family:var(--font-data); color:var(--text-secondary);'>"
+        "<tr><th>Pool</th><th>En cola</th><th>Activos</th><th>Espera máx.</th><th>Proceso medio</th></tr>"
+        f"{filas}</table>{linea_cache}{linea_adm}"
+    )
+
+
+def alternar_profiling(activo):
+    """Perfila todas las búsquedas mientras esté marcado; al desmarcar vuelve a CONFIG."""
+    if not CONFIG.PROFILING_ADMIN:
+        return mostrar_perfiles()
+    profiling.set_sample_rate(1.0 if activo else CONFIG.PROFILE_SAMPLE_RATE)
+    return mostrar_perfiles()
+
+
+def mostrar_perfiles():
+    """Últimos perfiles escritos en DATA_DIR/profiles."""
+    rutas = profiling.recent_profiles()
+    estado = f"Muestreo actual: {profiling.sample_rate():.0%} de las búsquedas"
+    if not rutas:
+        return f"<div class='text-label'>{estado} · sin perfiles todavía</div>"
+    items = "".join(f"<li>{os.path.basename(r)}</li>" for r in rutas)
+    return (
+        f"<div class='text-label'>{estado}</div>"
+        f"<ul style='font-family:var(--font-data); font-size:0.8em; color:var(--text-secondary);'>{items}</ul>"
+    )
+
+
 def mostrar_analytics():
     """Renderiza dashboard de sesión."""
     data = store.get_summary()
@@ -741,10 +968,12 @@ with open("logo_blanco.png", "rb") as f:
 import components.ui_renderer as _ui_mod
 _ui_mod.LOGO_B64 = LOGO_B64
 
-with gr.Blocks(title="🧊 EatguAI 🧊", theme=gr.themes.Base(), css=CSS_CUSTOM) as demo:
+with gr.Blocks(title="🧊 EatguAI 🧊") as demo:
 
     header      = gr.HTML(renderer.render_header("survival"))
     estado_vals = gr.State({})
+    cursor_foto = gr.State(None)
+    cursor_man  = gr.State(None)
 
     with gr.Tabs():
 
@@ -787,22 +1016,37 @@ with gr.Blocks(title="🧊 EatguAI 🧊", theme=gr.themes.Base(), css=CSS_CUSTOM
                 with gr.Column(scale=2, min_width=400):
                     out_ing = gr.HTML()
                     out_rec = gr.HTML(value=renderer.render_empty_state())
+                    mas_btn = gr.Button("Ver más", variant="secondary", visible=False)
 
             # Eventos TAB 1
             analizar_btn.click(
+                fn=admitir_analisis,
+                inputs=imagen_input,
+                queue=False,   # se decide al llegar, no tras esperar en la cola
+            ).success(
                 fn=analizar_nevera,
                 inputs=[imagen_input, n_slider, conf_radio, filtro_tiempo, filtro_faltan, modo_radio],
-                outputs=[out_ing, out_rec, estado_vals, receta_dd, val_group, msg_val, guardar_btn],
+                outputs=[out_ing, out_rec, estado_vals, receta_dd, val_group, msg_val, guardar_btn,
+                         cursor_foto, mas_btn],
+                **POOL_VISION,
+            )
+            mas_btn.click(
+                fn=ver_mas_foto,
+                inputs=[cursor_foto, n_slider],
+                outputs=[out_rec, estado_vals, receta_dd, cursor_foto, mas_btn],
+                **POOL_RECOMENDAR,
             )
             guardar_btn.click(
                 fn=guardar_rating,
                 inputs=[receta_dd, gusto_radio, rel_radio, estado_vals],
                 outputs=[msg_val, receta_dd, gusto_radio, rel_radio, guardar_btn],
+                **POOL_STORAGE,
             )
             modo_radio.change(
                 fn=lambda m: renderer.render_header(m),
                 inputs=modo_radio,
                 outputs=header,
+                queue=False,   # solo re-renderiza la cabecera
             )
 
         # ── TAB 2: MANUAL ────────────────────────────────────────────────────
@@ -820,11 +1064,19 @@ with gr.Blocks(title="🧊 EatguAI 🧊", theme=gr.themes.Base(), css=CSS_CUSTOM
             modo_manual = gr.Radio(choices=["survival", "chef"], value="survival", label="Modo")
             manual_btn  = gr.Button("🍳 Buscar recetas", variant="primary")
             manual_out  = gr.HTML()
+            mas_man_btn = gr.Button("Ver más", variant="secondary", visible=False)
 
             manual_btn.click(
                 fn=recomendar_manual,
                 inputs=[manual_ing, n_manual, filtro_tiempo_m, filtro_faltan_m, modo_manual],
-                outputs=manual_out,
+                outputs=[manual_out, cursor_man, mas_man_btn],
+                **POOL_RECOMENDAR,
+            )
+            mas_man_btn.click(
+                fn=ver_mas_manual,
+                inputs=[cursor_man, n_manual],
+                outputs=[manual_out, cursor_man, mas_man_btn],
+                **POOL_RECOMENDAR,
             )
 
         # ── TAB 3: ANALYTICS ─────────────────────────────────────────────────
@@ -836,8 +1088,23 @@ with gr.Blocks(title="🧊 EatguAI 🧊", theme=gr.themes.Base(), css=CSS_CUSTOM
                 label="Copia esto antes de destruir el VM",
                 lines=10,
             )
-            refresh_btn.click(fn=mostrar_analytics, outputs=dashboard)
-            export_btn.click(fn=lambda: store.export_message(), outputs=export_txt)
+            colas_html  = gr.HTML()
+            # La pestaña es pública: recargar el catálogo (reajusta TF-IDF y
+            # vacía la caché) y cambiar el muestreo de todas las búsquedas
+            # solo existen con PROFILING_ADMIN
+            if CONFIG.PROFILING_ADMIN:
+                reload_btn  = gr.Button("Recargar recetas")
+                reload_msg  = gr.HTML()
+                perfil_chk = gr.Checkbox(label="Perfilar todas las búsquedas (profiler de muestreo)",
+                                         value=CONFIG.PROFILE_SAMPLE_RATE >= 1.0)
+            perfiles    = gr.HTML()
+            refresh_btn.click(fn=mostrar_analytics, outputs=dashboard, **POOL_ADMIN)
+            refresh_btn.click(fn=mostrar_colas, outputs=colas_html, queue=False)
+            export_btn.click(fn=lambda: store.export_message(), outputs=export_txt, **POOL_STORAGE)
+            refresh_btn.click(fn=mostrar_perfiles, outputs=perfiles, queue=False)
+            if CONFIG.PROFILING_ADMIN:
+                reload_btn.click(fn=recargar_recetas, outputs=reload_msg, **POOL_ADMIN)
+                perfil_chk.change(fn=alternar_profiling, inputs=perfil_chk, outputs=perfiles, queue=False)
 
     gr.HTML(f"""
     <div style="text-align:center; padding:16px 20px 12px; 
@@ -857,12 +1124,129 @@ with gr.Blocks(title="🧊 EatguAI 🧊", theme=gr.themes.Base(), css=CSS_CUSTOM
     """)
 
 
+# =============================================================================
+# SERVIDOR — Gradio montado sobre FastAPI para poder añadir rutas propias
+# =============================================================================
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+
+demo.queue(max_size=CONFIG.QUEUE_MAX_SIZE, default_concurrency_limit=1)
+
+app = FastAPI()
+app.include_router(build_router(recommender, admission))
+
+
+def _calentar_render(recetas, modo):
+    """Render de calentamiento: lista compacta y, si es diferido, un detalle."""
+    renderer.render_recipes_list(recetas, modo=modo)
+    if recetas:
+        renderer.render_recipe_details(recetas[0].receta, modo)
+
+
+# Arranca en segundo plano: /healthz responde ya, /readyz cuando termina
+readiness = warm_up_async(recommender, render=_calentar_render, vertex=CONFIG.WARMUP_VERTEX)
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: el proceso está vivo y sirve HTTP."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 solo cuando el calentamiento ha terminado."""
+    return JSONResponse(readiness.as_dict(), status_code=200 if readiness.ready else 503)
+
+
+def _metricas_runtime():
+    """Contadores que ya llevan la caché, la admisión y las colas, leídos al exportar."""
+    cache = recommender.cache_stats()
+    adm   = admission.stats()
+    colas = estado_colas()
+    return [
+        ("eatguai_query_cache_hits_total", "counter", "Aciertos de la caché de consultas.",
+         [({}, cache["hits"])]),
+        ("eatguai_query_cache_misses_total", "counter", "Fallos de la caché de consultas.",
+         [({}, cache["misses"])]),
+        ("eatguai_query_cache_entries", "gauge", "Entradas en la caché de consultas.",
+         [({}, cache["size"])]),
+        ("eatguai_admission_admitted_total", "counter", "Análisis admitidos.",
+         [({}, adm["admitidas"])]),
+        ("eatguai_admission_rejected_total", "counter", "Análisis rechazados por motivo.",
+         [({"reason": motivo}, n) for motivo, n in adm["rechazadas"].items()]),
+        ("eatguai_queue_depth", "gauge", "Eventos esperando por pool de la cola.",
+         [({"pool": cid}, e["en_cola"]) for cid, e in colas.items()]),
+        ("eatguai_queue_active", "gauge", "Workers ocupados por pool de la cola.",
+         [({"pool": cid}, e["activos"]) for cid, e in colas.items()]),
+        ("eatguai_catalog_recipes", "gauge", "Recetas en el snapshot activo.",
+         [({}, len(recommender.catalog))]),
+    ]
+
+
+metrics.REGISTRY.register_collector(_metricas_runtime)
+
+
+@app.get("/metrics")
+def metricas():
+    """Métricas en formato de exposición de Prometheus."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/colas")
+def colas():
+    """Estado de los pools de la cola de eventos (JSON, para monitorización)."""
+    return estado_colas()
+
+
+# Pública como el resto de la app, así que solo existe con PROFILING_ADMIN
+if CONFIG.PROFILING_ADMIN:
+    @app.get("/memoria")
+    def memoria():
+        """Memoria retenida por el recommender, por componente (bytes)."""
+        return recommender.memory_usage()
+
+
+@app.get(renderer.stylesheet_path())
+def hoja_de_estilos():
+    """La ruta lleva el hash del contenido, así que se cachea un año sin riesgo."""
+    return Response(
+        renderer.stylesheet(),
+        media_type="text/css",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
+@app.get("/ui/receta/{receta_id}")
+def detalle_receta(receta_id: int, modo: str = "survival"):
+    """Cuerpo de una tarjeta diferida (pasos + sección chef) en HTML."""
+    receta = recommender.get_recipe(receta_id)
+    if receta is None:
+        return Response("Receta no encontrada", status_code=404, media_type="text/plain")
+    return Response(
+        renderer.render_recipe_details(receta, modo),
+        media_type="text/html",
+        headers={"Cache-Control": "public, max-age=300"},
+    )
+
+
+app = gr.mount_gradio_app(
+    app,
+    demo,
+    path="/",
+    # Gradio 6: tema y CSS de los Blocks solo los aplica launch(); montados
+    # en FastAPI hay que pasarlos aquí
+    theme=gr.themes.Base(),
+    css=CSS_CUSTOM,
+    head=renderer.head_tags(),
+    allowed_paths=["."],
+    show_error=True,
+)
+
+
 if __name__ == "__main__":
+    import uvicorn
+
     port = int(os.environ.get("PORT", 8080))
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=port,
-        share=False,
-        show_error=True,
-        allowed_paths=["."],
-    )
+    uvicorn.run(app, host="0.0.0.0", port=port, timeout_keep_alive=CONFIG.API_KEEPALIVE_S,
+                proxy_headers=True, forwarded_allow_ips=CONFIG.FORWARDED_ALLOW_IPS)
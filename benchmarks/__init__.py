@@ -0,0 +1,4 @@
+"""
+Benchmarks de eatguai. Ejecutar desde la raíz del repo:
+    python -m benchmarks.<modulo>
+"""
@@ -0,0 +1,72 @@
+"""
+Memoria residente por receta: lista de modelos Recipe vs catálogo columnar.
+
+    python -m benchmarks.bench_catalog_memory [--recipes PATH] [--scale N]
+
+`--scale` replica el catálogo N veces (ids desplazados) para ver la
+tendencia con más recetas.
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from config import CONFIG
+from core.catalog import RecipeCatalog
+from core.recommender import RecipeRecommender
+
+
+def _load_raw(path: str, scale: int):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    raw = data if isinstance(data, list) else data.get("recetas", [])
+    out = []
+    for k in range(scale):
+        for r in raw:
+            r = dict(r)
+            r["receta_id"] = (r.get("receta_id") or 0) + k * 1_000_000
+            out.append(r)
+    return out
+
+
+def _traced(build):
+    """Bytes retenidos por lo que devuelve `build` (lo previo no se cuenta)."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, peak
+
+
+def run(path: str, scale: int = 1) -> dict:
+    rec = RecipeRecommender(path)
+    raw = _load_raw(path, scale)
+    n   = len(raw)
+
+    recipes, models_bytes, models_peak = _traced(lambda: [rec._adapt_recipe(r) for r in raw])
+    _, catalog_bytes, catalog_peak = _traced(
+        lambda: RecipeCatalog.from_records(rec._record(r) for r in recipes)
+    )
+    return {
+        "recipes": n,
+        "models_bytes_per_recipe": models_bytes / n,
+        "catalog_bytes_per_recipe": catalog_bytes / n,
+        "models_peak_bytes": models_peak,
+        "catalog_peak_bytes": catalog_peak,
+        "reduction": 1 - catalog_bytes / models_bytes,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", default=CONFIG.RECIPES_FILE)
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    res = run(args.recipes, args.scale)
+    print(f"Recetas:              {res['recipes']}")
+    print(f"list[Recipe]:         {res['models_bytes_per_recipe']:>8.0f} B/receta")
+    print(f"RecipeCatalog:        {res['catalog_bytes_per_recipe']:>8.0f} B/receta")
+    print(f"Reducción:            {res['reduction']:>8.0%}")
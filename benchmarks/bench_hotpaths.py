@@ -0,0 +1,172 @@
+"""
+Suite de los caminos calientes del recommender y del render.
+
+    python -m benchmarks.bench_hotpaths [--scales 1,4,16] [--fridges 3,8,15]
+                                        [--repeat 30] [--json out.json]
+
+Casos: _normalize, _ingredient_match, match_loop (conteos y puntuación de
+todas las filas),
+recommend (survival/chef, con y sin filtros, con inventario, sin caché y
+con caché), combine, get_sustituciones y render_recipes_list. Se
+parametrizan por tamaño de catálogo (`--scales` replica el JSON de recetas
+N veces, o `--recipes` apunta a otro fichero) y por nº de ingredientes en
+la nevera.
+
+Con `--json` guarda los resultados (mediana y p95 en µs por caso) junto
+con los metadatos del entorno, para comparar ejecuciones.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import sklearn
+
+from benchmarks.bench_catalog_memory import _load_raw
+from components.ui_renderer import UIRenderer
+from config import CONFIG
+from core.recommender import RecipeRecommender, _normalize
+
+FILTROS = {"max_tiempo": 30, "max_faltantes": 1}
+
+
+def _timed(fn, repeat, before=None):
+    times = []
+    for _ in range(repeat):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {
+        "median_us": statistics.median(times) * 1e6,
+        "p95_us": times[min(len(times) - 1, int(len(times) * 0.95))] * 1e6,
+        "repeat": repeat,
+    }
+
+
+def _fridges(rec: RecipeRecommender, sizes, seed: int = 42):
+    """Neveras deterministas con los ingredientes más frecuentes del catálogo."""
+    cat   = rec.catalog
+    freq  = Counter(cat.key_norm.tolist())
+    pool  = [cat.ingredients[i] for i, _ in freq.most_common(80)]
+    rng   = random.Random(seed)
+    return {k: rng.sample(pool, min(k, len(pool))) for k in sizes}
+
+
+def _recommender_for(path: str, scale: int) -> RecipeRecommender:
+    if scale == 1:
+        return RecipeRecommender(path)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tmp:
+        json.dump(_load_raw(path, scale), tmp, ensure_ascii=False)
+    try:
+        return RecipeRecommender(tmp.name)
+    finally:
+        os.unlink(tmp.name)
+
+
+def _cases(rec: RecipeRecommender, fridge, repeat):
+    """
+    (nombre, función, repeticiones, preparación) para una nevera sobre un
+    catálogo. `preparación` se llama antes de cada repetición, fuera de la medida.
+    """
+    available = {_normalize(i) for i in fridge}
+    index     = rec._index
+    row0      = index.catalog.row(0)
+    needed    = index.catalog.ingredients[row0.claves_norm[0]]
+    uncached  = rec._results.clear
+
+    yield "normalize", lambda: [_normalize(i) for i in fridge], repeat * 10, None
+    yield "ingredient_match", lambda: rec._ingredient_match(needed, available), repeat * 10, None
+
+    resolved = rec._fridge(index, available)
+
+    estado   = rec._estados(index, resolved)
+    sims     = np.zeros(len(index.catalog))
+    yield "match_loop", lambda: rec._match_loop(index, resolved, estado, sims, "chef", 99, {}), repeat, None
+
+    for modo in ("survival", "chef"):
+        for nombre, filtros in (("", None), ("+filtros", FILTROS)):
+            fn = lambda modo=modo, filtros=filtros: rec.recommend(fridge, modo=modo, filtros=filtros)
+            yield f"recommend[{modo}{nombre}]", fn, repeat, uncached
+    inventario = {i: (500, "gr") for i in fridge}
+    yield "recommend[inventario]", lambda: rec.recommend([], inventario=inventario), repeat, uncached
+    yield "recommend[cache]", lambda: rec.recommend(fridge), repeat * 10, None
+    yield "combine", lambda: rec.combine(fridge), repeat, None
+
+    recs = rec.recommend(fridge, n=CONFIG.MAX_N_RECIPES, modo="chef")
+    if recs:
+        yield "get_sustituciones", lambda: [rec.get_sustituciones(r, fridge) for r in recs], repeat, None
+        yield "render_recipes_list", (
+            lambda: UIRenderer.render_recipes_list(recs, "chef")
+        ), repeat, UIRenderer._card_cache.clear
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(path: str = CONFIG.RECIPES_FILE, scales=(1, 4, 16), fridges=(3, 8, 15), repeat: int = 30) -> list:
+    rows = []
+    for scale in scales:
+        rec = _recommender_for(path, scale)
+        for size, fridge in _fridges(rec, fridges).items():
+            for name, fn, n, before in _cases(rec, fridge, repeat):
+                rows.append({
+                    "bench": name,
+                    "recipes": len(rec.catalog),
+                    "fridge": size,
+                    **_timed(fn, n, before),
+                })
+    return rows
+
+
+def _ints(s: str):
+    return tuple(int(x) for x in s.split(",") if x)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", default=CONFIG.RECIPES_FILE)
+    parser.add_argument("--scales", type=_ints, default=(1, 4, 16))
+    parser.add_argument("--fridges", type=_ints, default=(3, 8, 15))
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--json", help="Fichero donde guardar los resultados")
+    args = parser.parse_args()
+
+    rows = run(args.recipes, args.scales, args.fridges, args.repeat)
+    print(f"{'caso':<30}{'recetas':>9}{'nevera':>8}{'mediana µs':>13}{'p95 µs':>11}")
+    for r in rows:
+        print(f"{r['bench']:<30}{r['recipes']:>9}{r['fridge']:>8}{r['median_us']:>13.1f}{r['p95_us']:>11.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": rows}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados en {args.json}")
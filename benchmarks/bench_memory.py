@@ -0,0 +1,175 @@
+"""
+Memoria del recommender por tamaño de catálogo, con tracemalloc.
+
+    python -m benchmarks.bench_memory [--recipes PATH] [--scales 1,4,16]
+                                      [--queries 200] [--top 10] [--json out.json]
+
+Por tamaño (`--scales` replica el JSON N veces, o `--recipes` apunta a un
+catálogo de benchmarks.synthetic):
+
+  construcción  pico y retenido al crear RecipeRecommender
+  estable       retenido tras `--queries` recommend distintos (cachés llenas)
+  recommend     pico de una llamada sin caché sobre el estado estable
+  contabilidad  RecipeRecommender.memory_usage() frente a lo medido
+
+Además, los puntos calientes de asignación de un recommend sin caché: una
+foto de tracemalloc al salir de _match_loop (el momento con más memoria
+viva: similitudes y candidatas) comparada por línea con la de antes.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from benchmarks.bench_catalog_memory import _load_raw
+from benchmarks.bench_hotpaths import _ints, environment
+from config import CONFIG
+from core.memory import fmt_bytes
+from core.recommender import RecipeRecommender
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODOS = list(CONFIG.MODES)
+
+
+@contextmanager
+def _catalogo(path: str, scale: int):
+    """Ruta del catálogo replicado, preparado fuera de la medida."""
+    if scale == 1:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as tmp:
+        json.dump(_load_raw(path, scale), tmp, ensure_ascii=False)
+    try:
+        yield tmp.name
+    finally:
+        os.unlink(tmp.name)
+
+
+def _consultas(rec: RecipeRecommender, n: int, seed: int = 42):
+    """(nevera, modo) distintas con los ingredientes más frecuentes del catálogo."""
+    cat  = rec.catalog
+    pool = [cat.ingredients[i] for i, _ in Counter(cat.key_norm.tolist()).most_common(80)]
+    rng  = random.Random(seed)
+    return [(rng.sample(pool, rng.randint(3, min(12, len(pool)))), rng.choice(MODOS)) for _ in range(n)]
+
+
+def _medido():
+    gc.collect()
+    return tracemalloc.get_traced_memory()
+
+
+def puntos_calientes(rec: RecipeRecommender, fridge, modo: str, top: int = 10):
+    """Asignaciones vivas al salir de _match_loop frente a antes del recommend, por línea."""
+    fotos = {}
+    original = rec._match_loop
+
+    def con_foto(*args, **kwargs):
+        out = original(*args, **kwargs)
+        fotos["pico"] = tracemalloc.take_snapshot()
+        return out
+
+    rec._results.clear()
+    rec._match_loop = con_foto
+    try:
+        gc.collect()
+        antes = tracemalloc.take_snapshot()
+        rec.recommend(fridge, modo=modo)
+    finally:
+        del rec._match_loop
+    filtros = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<*")]
+    stats = fotos["pico"].filter_traces(filtros).compare_to(antes.filter_traces(filtros), "lineno")
+    out = []
+    for st in stats:
+        if st.size_diff <= 0:
+            continue
+        frame = st.traceback[0]
+        out.append({
+            "linea": f"{os.path.relpath(frame.filename, ROOT)}:{frame.lineno}",
+            "bytes": st.size_diff,
+            "bloques": st.count_diff,
+        })
+        if len(out) == top:
+            break
+    return out
+
+
+def run(path: str = CONFIG.RECIPES_FILE, scales=(1, 4, 16), queries: int = 200, top: int = 10) -> list:
+    rows = []
+    for scale in scales:
+        with _catalogo(path, scale) as fichero:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                rec = RecipeRecommender(fichero)
+                construido, pico_construccion = _medido()
+
+                consultas = _consultas(rec, queries)
+                for fridge, modo in consultas:
+                    rec.recommend(fridge, modo=modo)
+                estable, _ = _medido()
+                uso = rec.memory_usage()
+
+                fridge, modo = consultas[0]
+                rec._results.clear()
+                gc.collect()
+                tracemalloc.reset_peak()
+                base, _ = tracemalloc.get_traced_memory()
+                rec.recommend(fridge, modo=modo)
+                pico_recommend = tracemalloc.get_traced_memory()[1] - base
+
+                calientes = puntos_calientes(rec, fridge, modo, top)
+            finally:
+                tracemalloc.stop()
+
+            n = len(rec.catalog)
+            rows.append({
+                "recipes":              n,
+                "build_peak_bytes":     pico_construccion,
+                "build_retained_bytes": construido,
+                "steady_bytes":         estable,
+                "steady_bytes_per_recipe": estable / n,
+                "recommend_peak_bytes": pico_recommend,
+                "accounted_bytes":      uso["total"],
+                "accounted_ratio":      uso["total"] / estable if estable else 0.0,
+                "components":           uso["componentes"],
+                "hot_spots":            calientes,
+            })
+            del rec
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", default=CONFIG.RECIPES_FILE)
+    parser.add_argument("--scales", type=_ints, default=(1, 4, 16))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="Fichero donde guardar los resultados")
+    args = parser.parse_args()
+
+    rows = run(args.recipes, args.scales, args.queries, args.top)
+    print(f"{'recetas':>8}{'constr. pico':>14}{'constr.':>12}{'estable':>12}{'/receta':>11}"
+          f"{'pico rec.':>12}{'contado':>12}{'cobertura':>11}")
+    for r in rows:
+        print(f"{r['recipes']:>8}{fmt_bytes(r['build_peak_bytes']):>14}{fmt_bytes(r['build_retained_bytes']):>12}"
+              f"{fmt_bytes(r['steady_bytes']):>12}{fmt_bytes(r['steady_bytes_per_recipe']):>11}"
+              f"{fmt_bytes(r['recommend_peak_bytes']):>12}{fmt_bytes(r['accounted_bytes']):>12}"
+              f"{r['accounted_ratio']:>11.0%}")
+
+    for r in rows:
+        print(f"\n── {r['recipes']} recetas: componentes ──")
+        for k, v in sorted(r["components"].items(), key=lambda kv: -kv[1]):
+            print(f"  {k:<28}{fmt_bytes(v):>12}")
+        print(f"── {r['recipes']} recetas: puntos calientes de recommend ──")
+        for h in r["hot_spots"]:
+            print(f"  {fmt_bytes(h['bytes']):>12}{h['bloques']:>8} bloques  {h['linea']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": rows}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados en {args.json}")
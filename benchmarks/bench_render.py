@@ -0,0 +1,68 @@
+"""
+Tiempo y tamaño de `UIRenderer.render_recipes_list` con n recetas.
+
+    python -m benchmarks.bench_render [--n 10] [--repeat 300]
+
+"frío" vacía la caché de fragmentos antes de cada render; "caliente"
+reutiliza los fragmentos estáticos de cada (receta_id, modo). Se mide el
+HTML con estilos inline, el compacto (clases + hoja de estilos aparte,
+que el navegador descarga una vez) y el compacto diferido (sin pasos ni
+sección chef, que se piden al desplegar cada tarjeta).
+"""
+import argparse
+import statistics
+import time
+
+from components.ui_renderer import UIRenderer
+from core.recommender import RecipeRecommender
+
+QUERY = ["huevo", "patata", "cebolla", "leche", "queso", "tomate", "pollo"]
+
+
+def _median_us(fn, repeat, before=None):
+    times = []
+    for _ in range(repeat):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1e6
+
+
+def run(n: int = 10, repeat: int = 300) -> list:
+    rec  = RecipeRecommender()
+    rows = []
+    original = (UIRenderer.compact, UIRenderer.lazy_details)
+    variants = {"inline": (False, False), "compacto": (True, False), "diferido": (True, True)}
+    try:
+        for modo in ("survival", "chef"):
+            recs = rec.recommend(QUERY, n=n, modo=modo)
+            render = lambda: UIRenderer.render_recipes_list(recs, modo)
+            for name, (compact, lazy) in variants.items():
+                UIRenderer.compact, UIRenderer.lazy_details = compact, lazy
+                cold = _median_us(render, repeat, before=UIRenderer._card_cache.clear)
+                warm = _median_us(render, repeat)
+                rows.append({
+                    "modo": modo,
+                    "html": name,
+                    "n": len(recs),
+                    "cold_us": cold,
+                    "warm_us": warm,
+                    "bytes": len(render().encode("utf-8")),
+                })
+    finally:
+        UIRenderer.compact, UIRenderer.lazy_details = original
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'modo':<10}{'html':<10}{'n':>4}{'frío µs':>10}{'caliente µs':>13}{'bytes':>9}")
+    for r in run(args.n, args.repeat):
+        print(f"{r['modo']:<10}{r['html']:<10}{r['n']:>4}{r['cold_us']:>10.1f}{r['warm_us']:>13.1f}{r['bytes']:>9}")
+    print(f"Hoja de estilos (una vez, cacheada): {len(UIRenderer.stylesheet().encode('utf-8'))} bytes")
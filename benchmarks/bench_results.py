@@ -0,0 +1,98 @@
+"""
+Coste por consulta del tipo de resultado: un Recommendation Pydantic por
+candidata (camino anterior) frente a ScoredRecipe + conversión del top-n.
+
+    python -m benchmarks.bench_results [--n 5] [--repeat 200]
+
+Ambos caminos parten de las mismas candidatas y de recetas ya
+materializadas, así que solo se mide el coste del resultado.
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from core.recommender import RecipeRecommender, ScoredRecipe
+from models import Recommendation
+
+QUERIES = [
+    ["huevo", "patata", "cebolla", "leche", "queso"],
+    ["pollo", "arroz", "tomate", "ajo"],
+    ["pasta", "nata", "bacon", "ajo", "queso"],
+    ["huevo"],
+]
+
+
+def _pydantic_per_candidate(cands, recipes, catalog, n):
+    out = []
+    for c in cands:
+        found, missing = c.partes(catalog)
+        out.append(Recommendation(
+            receta=recipes[c.pos],
+            porcentaje_match=c.porcentaje_match,
+            coincidencias=found,
+            ingredientes_faltantes=[recipes[c.pos].ingredientes_clave[j] for j in missing],
+            score_total=c.score_total,
+        ))
+    return out[:n]
+
+
+def _slotted_then_top_n(cands, catalog, n):
+    scored = [
+        ScoredRecipe(c.pos, c.score_total, c.porcentaje_match, c.n_faltantes, c.estado)
+        for c in cands
+    ]
+    return [s.to_recommendation(catalog) for s in scored[:n]]
+
+
+def _measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times) * 1e6, peak
+
+
+def run(n: int = 5, repeat: int = 200) -> list:
+    rec   = RecipeRecommender()
+    index = rec._index
+    # Todas las recetas residentes: el camino anterior no pagaba materializar
+    recipes = list(index.catalog.iter_recipes())
+    for pos in range(len(index.catalog)):
+        index.catalog.recipe(pos)
+
+    rows = []
+    for modo in ("survival", "chef"):
+        for q in QUERIES:
+            cands = rec._rank(index, q, modo, None)
+            old_us, old_peak = _measure(lambda: _pydantic_per_candidate(cands, recipes, index.catalog, n), repeat)
+            new_us, new_peak = _measure(lambda: _slotted_then_top_n(cands, index.catalog, n), repeat)
+            rows.append({
+                "modo": modo,
+                "query": ",".join(q),
+                "candidatas": len(cands),
+                "pydantic_us": old_us,
+                "slotted_us": new_us,
+                "pydantic_alloc_bytes": old_peak,
+                "slotted_alloc_bytes": new_peak,
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'modo':<9}{'cands':>6}{'pydantic µs':>13}{'slotted µs':>12}{'pydantic KB':>13}{'slotted KB':>12}  query")
+    for r in run(args.n, args.repeat):
+        print(
+            f"{r['modo']:<9}{r['candidatas']:>6}{r['pydantic_us']:>13.1f}{r['slotted_us']:>12.1f}"
+            f"{r['pydantic_alloc_bytes'] / 1024:>13.1f}{r['slotted_alloc_bytes'] / 1024:>12.1f}  {r['query']}"
+        )
@@ -0,0 +1,507 @@
+"""
+Prueba de carga extremo a extremo de la app con un Gemini simulado.
+
+    python -m benchmarks.loadtest [--modo inproc|http] [--url URL]
+                                  [--rate analizar=1,manual=10,rating=2]
+                                  [--duracion 30] [--workers 32] [--usuarios 50]
+                                  [--latencia 1.5] [--jitter 0.4] [--fallos 0.05]
+                                  [--json-invalido 0.02] [--sin-admision]
+                                  [--neveras FICHERO] [--recipes FICHERO] [--json out.json]
+
+    python -m benchmarks.loadtest --serve [--port 7861] [--latencia ...]
+
+Ejecuta los handlers de verdad (analizar_nevera, recomendar_manual,
+guardar_rating) con `core.vision._model` sustituido por FakeGemini: latencia
+log-normal (mediana `--latencia`, sigma `--jitter`), fallos (`--fallos`) y
+respuestas que no son JSON (`--json-invalido`). detect_gemini no reintenta:
+cada fallo simulado llega al usuario como error de la etapa.
+
+Modos:
+  inproc  llama a los handlers desde un pool de hilos, sin Gradio en medio:
+          mide el coste de la app.
+  http    levanta la app (con el Gemini simulado) en un puerto libre y la
+          ataca con gradio_client: incluye cola de Gradio, pools de
+          concurrencia y admisión. Con `--url` ataca un servidor ya arrancado,
+          por ejemplo uno lanzado con `--serve`. gradio_client gasta bastante
+          CPU: para cifras fiables el generador va en otra máquina (o núcleo).
+
+Las llegadas son un proceso de Poisson por handler (bucle abierto): la
+latencia se mide desde el instante programado, así que la espera por falta
+de workers cuenta, como la vería un usuario. Las neveras salen de
+`--neveras` (el `<out>_neveras.json` de benchmarks.synthetic) o, si no se
+da, de los ingredientes más frecuentes del catálogo.
+
+Informe por handler: throughput, p50/p95/p99 de las respuestas correctas y
+tasas de rechazo (admisión) y error. En inproc y en http local añade los
+errores por etapa del registro de métricas.
+"""
+import argparse
+import heapq
+import json
+import logging
+import os
+import queue
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import CONFIG
+
+HANDLERS = ("analizar", "manual", "rating")
+
+# Textos que devuelven los handlers en los estados vacíos (ver app_gradiov4)
+RECHAZO = ("Vas muy rápido", "mucha gente analizando", "servicio de visión está al límite")
+ERROR   = ("Error de visión", "Error inesperado")
+
+MODOS      = list(CONFIG.MODES)
+GUSTO      = "👍 Me gusta"
+RELEVANCIA = "Usa lo que tengo"
+
+
+# ============================================================================
+# GEMINI SIMULADO
+# ============================================================================
+
+class FakeGemini:
+    """
+    Sustituto de GenerativeModel con la misma interfaz que usa core.vision
+    (generate_content, count_tokens). Cada llamada devuelve una nevera al
+    azar de `neveras` como el JSON que daría Gemini.
+    """
+
+    def __init__(self, neveras: List[List[str]], latencia: float = 1.5, jitter: float = 0.4,
+                 fallos: float = 0.0, json_invalido: float = 0.0, seed: int = 7):
+        self.neveras       = neveras
+        self.latencia      = latencia
+        self.jitter        = jitter
+        self.fallos        = fallos
+        self.json_invalido = json_invalido
+        self._rng  = random.Random(seed)
+        self._lock = threading.Lock()
+        self.llamadas = Counter()
+
+    def generate_content(self, contents, generation_config=None):
+        with self._lock:
+            espera  = self.latencia * self._rng.lognormvariate(0, self.jitter) if self.latencia else 0.0
+            sorteo  = self._rng.random()
+            nevera  = self._rng.choice(self.neveras)
+            confs   = [round(self._rng.uniform(0.55, 0.98), 2) for _ in nevera]
+        time.sleep(espera)
+
+        if sorteo < self.fallos:
+            self._contar("fallo")
+            raise RuntimeError("503 Service Unavailable (simulado)")
+        if sorteo < self.fallos + self.json_invalido:
+            self._contar("json_invalido")
+            text = "Lo siento, no puedo identificar ingredientes en esta imagen."
+        else:
+            self._contar("ok")
+            text = json.dumps(
+                [{"name": n, "confidence": c, "emoji": "🥘"} for n, c in zip(nevera, confs)],
+                ensure_ascii=False,
+            )
+        usage = SimpleNamespace(prompt_token_count=1290, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def count_tokens(self, contents):
+        return SimpleNamespace(total_tokens=len(str(contents)) // 4)
+
+    def _contar(self, resultado: str) -> None:
+        with self._lock:
+            self.llamadas[resultado] += 1
+
+
+def install_fake(fake: FakeGemini) -> None:
+    """Cambia el modelo de core.vision por el simulado."""
+    from core import vision
+    vision._model = fake
+
+
+# ============================================================================
+# DATOS DE PRUEBA
+# ============================================================================
+
+def cargar_neveras(path: Optional[str], recipes_path: str, n: int = 200, seed: int = 7) -> List[List[str]]:
+    """Neveras del fichero de benchmarks.synthetic o, si no hay, del catálogo."""
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [q["ingredientes"] for q in json.load(f)]
+    with open(recipes_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    recetas = data if isinstance(data, list) else data.get("recetas", [])
+    freq = Counter(i["item"] for r in recetas for i in r["ingredientes_clave"])
+    pool = [it for it, _ in freq.most_common(80)]
+    rng  = random.Random(seed)
+    return [rng.sample(pool, rng.randint(3, min(12, len(pool)))) for _ in range(n)]
+
+
+def _imagen_prueba() -> str:
+    """JPEG pequeño: el contenido da igual, Gemini está simulado."""
+    from PIL import Image
+    path = os.path.join(tempfile.gettempdir(), "eatguai_loadtest.jpg")
+    if not os.path.exists(path):
+        Image.new("RGB", (640, 480), (200, 220, 235)).save(path)
+    return path
+
+
+def _clasificar(*htmls: str) -> str:
+    html = " ".join(h for h in htmls if isinstance(h, str))
+    if any(m in html for m in RECHAZO):
+        return "rechazada"
+    if any(m in html for m in ERROR):
+        return "error"
+    return "ok"
+
+
+def _pct(xs: List[float], q: float) -> float:
+    return float(np.percentile(xs, q)) if xs else float("nan")
+
+
+# ============================================================================
+# APP (IN-PROCESS / SERVIDOR LOCAL)
+# ============================================================================
+
+def cargar_app(recipes_path: str, sin_admision: bool = False):
+    """
+    Importa app_gradiov4 con el catálogo pedido y las valoraciones en un
+    directorio temporal, para no ensuciar data/ratings.csv.
+    """
+    tmp = tempfile.mkdtemp(prefix="eatguai_loadtest_")
+    CONFIG.RECIPES_FILE = recipes_path
+    CONFIG.RATINGS_FILE = os.path.join(tmp, "ratings.csv")
+    CONFIG.SESSION_FILE = os.path.join(tmp, "session_state.json")
+
+    import app_gradiov4
+    logging.getLogger().setLevel(logging.WARNING)   # el log por petición falsea la medida
+    if sin_admision:
+        from core.admission import TokenBucket
+        adm = app_gradiov4.admission
+        adm.session_rate = adm.session_burst = 1e9
+        adm._global     = TokenBucket(1e9, 1e9)
+        adm.shed_queue  = 0
+    app_gradiov4.readiness.wait(60)
+    return app_gradiov4
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def servir(app_mod, port: int, background: bool = True) -> str:
+    """Arranca uvicorn con la app ya importada; devuelve la URL."""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(
+        app_mod.app, host="127.0.0.1", port=port, log_level="warning",
+        timeout_keep_alive=CONFIG.API_KEEPALIVE_S,
+    ))
+    url = f"http://127.0.0.1:{port}/"
+    if not background:
+        server.run()
+        return url
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return url
+
+
+# ============================================================================
+# CLIENTES
+# ============================================================================
+
+class InProcessClient:
+    """Llama a los handlers de app_gradiov4 directamente."""
+
+    def __init__(self, app_mod, neveras: List[List[str]], usuarios: int, n_recetas: int = 5):
+        from PIL import Image
+        self.app      = app_mod
+        self.neveras  = neveras
+        self.usuarios = usuarios
+        self.n        = n_recetas
+        self.imagen   = Image.open(_imagen_prueba()).convert("RGB")
+        # (receta, estado) de análisis correctos, para valorar después
+        self._valorables: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def analizar(self, rng: random.Random) -> str:
+        import gradio as gr
+        request = SimpleNamespace(session_hash=f"lt-{rng.randrange(self.usuarios)}")
+        modo    = rng.choice(MODOS)
+        try:
+            self.app.admitir_analisis(self.imagen, request=request)
+        except gr.Error:
+            return "rechazada"
+        salidas = list(self.app.analizar_nevera(
+            self.imagen, self.n, "Medio", "Todos", "Todos", modo, request=request,
+        ))
+        html, estado = salidas[-1][0], salidas[-1][2]
+        if estado:
+            with self._lock:
+                self._valorables.append((next(iter(estado)), estado))
+                del self._valorables[:-100]
+        return _clasificar(html, salidas[-1][1])
+
+    def manual(self, rng: random.Random) -> str:
+        nevera = rng.choice(self.neveras)
+        html, _, _ = self.app.recomendar_manual(
+            ", ".join(nevera), self.n, "Todos", "Todos", rng.choice(MODOS),
+        )
+        return _clasificar(html)
+
+    def rating(self, rng: random.Random) -> str:
+        with self._lock:
+            elegido = rng.choice(self._valorables) if self._valorables else None
+        if elegido is None:
+            return "sin_datos"
+        receta, estado = elegido
+        self.app.guardar_rating(receta, GUSTO, RELEVANCIA, estado)
+        return "ok"
+
+
+class HttpClient:
+    """
+    Ataca la app por la API de Gradio con gradio_client. Cada Client es una
+    sesión (su bucket de admisión, su estado); se crean antes de empezar,
+    porque conectar cuesta ~0,2 s y falsearía las primeras latencias.
+    """
+
+    def __init__(self, url: str, neveras: List[List[str]], sesiones: int, n_recetas: int = 5):
+        from gradio_client import Client, handle_file
+        self.neveras = neveras
+        self.n       = n_recetas
+        self.imagen  = handle_file(_imagen_prueba())
+        self._libres: "queue.Queue[SimpleNamespace]" = queue.Queue()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for client in pool.map(lambda _: Client(url, verbose=False), range(sesiones)):
+                self._libres.put(SimpleNamespace(client=client, receta=None))
+
+    @contextmanager
+    def _sesion(self):
+        sesion = self._libres.get()
+        try:
+            yield sesion
+        finally:
+            self._libres.put(sesion)
+
+    def analizar(self, rng: random.Random) -> str:
+        from gradio_client.exceptions import AppError
+        with self._sesion() as s:
+            # Mismo orden que el botón: admisión fuera de la cola y luego el análisis
+            try:
+                s.client.predict(self.imagen, api_name="/admitir_analisis")
+            except AppError:
+                return "rechazada"
+            out = s.client.predict(
+                self.imagen, self.n, "Medio", "Todos", "Todos", rng.choice(MODOS),
+                api_name="/analizar_nevera",
+            )
+            resultado = _clasificar(out[0], out[1])
+            if resultado == "ok":
+                s.receta = _primera_receta(out)
+        return resultado
+
+    def manual(self, rng: random.Random) -> str:
+        with self._sesion() as s:
+            out = s.client.predict(
+                ", ".join(rng.choice(self.neveras)), self.n, "Todos", "Todos", rng.choice(MODOS),
+                api_name="/recomendar_manual",
+            )
+        return _clasificar(out[0])
+
+    def rating(self, rng: random.Random) -> str:
+        with self._sesion() as s:
+            # Solo se puede valorar una receta que la sesión haya visto
+            if not s.receta:
+                return "sin_datos"
+            s.client.predict(s.receta, GUSTO, RELEVANCIA, api_name="/guardar_rating")
+        return "ok"
+
+
+def _primera_receta(outputs) -> Optional[str]:
+    """Primera opción del update del dropdown de valoraciones."""
+    for out in outputs:
+        if isinstance(out, dict) and out.get("choices"):
+            first = out["choices"][0]
+            return first[0] if isinstance(first, (list, tuple)) else first
+    return None
+
+
+# ============================================================================
+# GENERADOR DE CARGA
+# ============================================================================
+
+def _llegadas(rates: Dict[str, float], duracion: float, rng: random.Random) -> List[tuple]:
+    """(instante, handler) de un Poisson por handler, mezclados y ordenados."""
+    eventos = []
+    for handler, rate in rates.items():
+        t = 0.0
+        while rate > 0:
+            t += rng.expovariate(rate)
+            if t >= duracion:
+                break
+            eventos.append((t, handler))
+    heapq.heapify(eventos)
+    return [heapq.heappop(eventos) for _ in range(len(eventos))]
+
+
+def run(client, rates: Dict[str, float], duracion: float = 30.0, workers: int = 32, seed: int = 7) -> dict:
+    """Lanza la carga y devuelve el informe por handler."""
+    rng       = random.Random(seed)
+    llegadas  = _llegadas(rates, duracion, rng)
+    muestras: Dict[str, list] = defaultdict(list)   # handler → [(resultado, segundos)]
+    errores: Counter = Counter()
+    lock      = threading.Lock()
+    en_vuelo  = [0, 0]   # actual, máximo
+
+    def ejecutar(handler: str, programado: float, semilla: int) -> None:
+        with lock:
+            en_vuelo[0] += 1
+            en_vuelo[1] = max(en_vuelo[1], en_vuelo[0])
+        try:
+            resultado = getattr(client, handler)(random.Random(semilla))
+        except Exception as e:
+            resultado = "error"
+            with lock:
+                errores[f"{handler}: {type(e).__name__}: {str(e)[:80]}"] += 1
+        latencia = time.perf_counter() - programado
+        with lock:
+            en_vuelo[0] -= 1
+            muestras[handler].append((resultado, latencia))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="carga") as pool:
+        for i, (t, handler) in enumerate(llegadas):
+            espera = t0 + t - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            pool.submit(ejecutar, handler, t0 + t, seed * 1_000_003 + i)
+    total = time.perf_counter() - t0
+
+    informe = {}
+    for handler in rates:
+        filas  = muestras.get(handler, [])
+        cuenta = Counter(r for r, _ in filas)
+        ok_lat = sorted(lat for r, lat in filas if r == "ok")
+        n      = len(filas) - cuenta["sin_datos"]
+        informe[handler] = {
+            "enviadas":       len(filas),
+            "ok":             cuenta["ok"],
+            "rechazadas":     cuenta["rechazada"],
+            "errores":        cuenta["error"],
+            "sin_datos":      cuenta["sin_datos"],
+            "throughput_rps": cuenta["ok"] / total if total else 0.0,
+            "tasa_error":     cuenta["error"] / n if n else 0.0,
+            "tasa_rechazo":   cuenta["rechazada"] / n if n else 0.0,
+            "p50_ms":         _pct(ok_lat, 50) * 1000,
+            "p95_ms":         _pct(ok_lat, 95) * 1000,
+            "p99_ms":         _pct(ok_lat, 99) * 1000,
+            "media_ms":       statistics.fmean(ok_lat) * 1000 if ok_lat else float("nan"),
+        }
+    return {
+        "duracion_s": total,
+        "max_en_vuelo": en_vuelo[1],
+        "handlers": informe,
+        "excepciones": dict(errores.most_common(10)),
+    }
+
+
+def _metricas_app() -> dict:
+    """Errores por etapa del registro de la app."""
+    from core.metrics import ERRORS
+    return {"errores_etapa": {k[0]: v for k, v in ERRORS._values.items()}}
+
+
+def _rates(s: str) -> Dict[str, float]:
+    rates = {}
+    for parte in s.split(","):
+        if not parte:
+            continue
+        handler, rate = parte.split("=")
+        if handler not in HANDLERS:
+            raise argparse.ArgumentTypeError(f"handler desconocido: {handler} (usa {', '.join(HANDLERS)})")
+        rates[handler] = float(rate)
+    return rates
+
+
+def imprimir(res: dict) -> None:
+    print(f"\n{res['duracion_s']:.1f} s · máx. {res['max_en_vuelo']} peticiones en vuelo")
+    print(f"{'handler':<10}{'env.':>6}{'ok':>6}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'error':>8}{'rechazo':>9}")
+    for h, r in res["handlers"].items():
+        print(f"{h:<10}{r['enviadas']:>6}{r['ok']:>6}{r['throughput_rps']:>8.2f}{r['p50_ms']:>9.1f}"
+              f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['tasa_error']:>8.1%}{r['tasa_rechazo']:>9.1%}")
+        if r["sin_datos"]:
+            print(f"{'':<10}({r['sin_datos']} valoraciones sin receta previa que valorar)")
+    for texto, n in res["excepciones"].items():
+        print(f"  {n:>4} × {texto}")
+    if "app" in res:
+        app = res["app"]
+        print(f"Gemini simulado: {app['gemini']}")
+        if app["errores_etapa"]:
+            print("Errores por etapa: " + ", ".join(f"{k}={v:.0f}" for k, v in app["errores_etapa"].items()))
+        print(f"Admisión: {app['admision']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modo", choices=("inproc", "http"), default="inproc")
+    parser.add_argument("--url", help="Servidor ya arrancado (solo --modo http)")
+    parser.add_argument("--serve", action="store_true", help="Solo arrancar la app con el Gemini simulado")
+    parser.add_argument("--port", type=int, default=7861)
+    parser.add_argument("--rate", type=_rates, default=_rates("analizar=1,manual=10,rating=2"),
+                        help="Llegadas por segundo por handler")
+    parser.add_argument("--duracion", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--usuarios", type=int, default=50, help="Sesiones simuladas")
+    parser.add_argument("--latencia", type=float, default=1.5, help="Mediana de Gemini, s")
+    parser.add_argument("--jitter", type=float, default=0.4, help="Sigma log-normal de la latencia")
+    parser.add_argument("--fallos", type=float, default=0.05)
+    parser.add_argument("--json-invalido", type=float, default=0.02)
+    parser.add_argument("--sin-admision", action="store_true", help="Desactiva los límites de admisión")
+    parser.add_argument("--neveras", help="Consultas de benchmarks.synthetic (<out>_neveras.json)")
+    parser.add_argument("--recipes", default=CONFIG.RECIPES_FILE)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Fichero donde guardar el informe")
+    args = parser.parse_args()
+
+    neveras = cargar_neveras(args.neveras, args.recipes, seed=args.seed)
+    fake    = FakeGemini(neveras, args.latencia, args.jitter, args.fallos, args.json_invalido, args.seed)
+    install_fake(fake)
+
+    app_mod = None
+    if args.serve or not args.url:
+        app_mod = cargar_app(args.recipes, args.sin_admision)
+
+    if args.serve:
+        print(f"App con Gemini simulado en http://127.0.0.1:{args.port}/")
+        servir(app_mod, args.port, background=False)
+        raise SystemExit
+
+    if args.modo == "inproc":
+        client = InProcessClient(app_mod, neveras, args.usuarios)
+    else:
+        url    = args.url or servir(app_mod, _puerto_libre())
+        client = HttpClient(url, neveras, args.usuarios)
+
+    res = run(client, args.rate, args.duracion, args.workers, args.seed)
+    if app_mod is not None:
+        res["app"] = {**_metricas_app(), "gemini": dict(fake.llamadas), "admision": app_mod.admission.stats()}
+    res["config"] = {k: v for k, v in vars(args).items() if k not in ("json", "serve")}
+    imprimir(res)
+
+    if args.json:
+        from benchmarks.bench_hotpaths import environment
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), **res}, f, indent=2, ensure_ascii=False)
+        print(f"Informe en {args.json}")
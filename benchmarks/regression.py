@@ -0,0 +1,250 @@
+"""
+Puerta de regresiones de rendimiento contra una línea base versionada.
+
+    python -m benchmarks.regression [--baseline benchmarks/baseline.json]
+                                    [--runs 5] [--tol 0.15] [--mem-tol 0.10]
+    python -m benchmarks.regression --update [--runs 5] [--repeat 15]
+                                    [--scales 1,16] [--fridges 8] [--recipes PATH]
+
+Corre los casos de bench_hotpaths (recommender y render) `--runs` pasadas,
+intercalando todos los casos en cada pasada para que la deriva de la
+máquina les afecte por igual. De cada caso se queda con la mediana de cada
+pasada; la estimación es la mediana de esas medianas, con un IC95 por
+bootstrap. El pico de memoria (tracemalloc) de una llamada se mide aparte,
+fuera de la medida de tiempo.
+
+Un caso regresa si
+  - latencia: la mediana supera la de la base en más de `--tol` y los IC
+    no se solapan (el inferior actual queda por encima del superior base);
+  - memoria: el pico supera el de la base en más de `--mem-tol` y de 64 KiB.
+
+Con regresiones sale con código 1 y un informe por caso, por ejemplo:
+
+    RecipeRecommender.recommend[survival] · 4800 recetas · nevera 8
+      latencia 21.3 ms → 27.9 ms (+31%)  IC95 [26.1, 29.4] vs [20.8, 21.9]
+
+Sin `--update`, catálogo, escalas, neveras y repeticiones salen de la
+propia línea base, para comparar lo mismo. Las cifras dependen de la
+máquina: la base guarda el entorno y se avisa si no coincide; conviene
+regenerarla en la máquina donde corre la puerta.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.bench_hotpaths import _cases, _fridges, _ints, _recommender_for, _timed, environment
+from config import CONFIG
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+MEM_SLACK_KIB = 64
+
+# Nombre del caso en bench_hotpaths → función que mide
+FUNCIONES = {
+    "normalize":           "recommender._normalize",
+    "ingredient_match":    "RecipeRecommender._ingredient_match",
+    "match_loop":          "RecipeRecommender._match_loop",
+    "recommend":           "RecipeRecommender.recommend",
+    "combine":             "RecipeRecommender.combine",
+    "get_sustituciones":   "RecipeRecommender.get_sustituciones",
+    "render_recipes_list": "UIRenderer.render_recipes_list",
+}
+ENTORNO = ("python", "numpy", "sklearn", "platform", "cpu_count")
+
+
+def funcion(bench: str) -> str:
+    """'recommend[chef]' → 'RecipeRecommender.recommend[chef]'."""
+    base, _, variante = bench.partition("[")
+    return FUNCIONES.get(base, base) + (f"[{variante}" if variante else "")
+
+
+def _clave(bench: str, recipes: int, fridge: int) -> str:
+    return f"{bench}|{recipes}|{fridge}"
+
+
+# ============================================================================
+# MEDIDA
+# ============================================================================
+
+def _ic95(xs: List[float], n_boot: int = 2000, seed: int = 0) -> Tuple[float, float]:
+    """IC95 de la mediana por bootstrap de percentiles."""
+    rng   = np.random.default_rng(seed)
+    arr   = np.asarray(xs, dtype=float)
+    meds  = np.median(rng.choice(arr, size=(n_boot, len(arr))), axis=1)
+    return float(np.percentile(meds, 2.5)), float(np.percentile(meds, 97.5))
+
+
+def _pico_kib(fn, before=None) -> float:
+    """Pico de memoria asignada durante una llamada, en KiB."""
+    fn()   # como en la medida de tiempo, las cachés del caso ya están calientes
+    if before:
+        before()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        inicio = tracemalloc.get_traced_memory()[0]
+        fn()
+        return (tracemalloc.get_traced_memory()[1] - inicio) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def medir(path: str, scales, fridges, runs: int, repeat: int) -> Dict[str, dict]:
+    """Mediana, IC95 y pico de memoria por caso (clave bench|recetas|nevera)."""
+    casos = []
+    for scale in scales:
+        rec = _recommender_for(path, scale)
+        for size, fridge in _fridges(rec, fridges).items():
+            for name, fn, n, before in _cases(rec, fridge, repeat):
+                casos.append((name, len(rec.catalog), size, fn, n, before))
+
+    medianas = defaultdict(list)
+    for i in range(runs):
+        print(f"  pasada {i + 1}/{runs}", file=sys.stderr)
+        for name, recipes, size, fn, n, before in casos:
+            medianas[_clave(name, recipes, size)].append(_timed(fn, n, before)["median_us"])
+
+    resultados = {}
+    for name, recipes, size, fn, n, before in casos:
+        clave = _clave(name, recipes, size)
+        lo, hi = _ic95(medianas[clave])
+        resultados[clave] = {
+            "bench":      name,
+            "recipes":    recipes,
+            "fridge":     size,
+            "median_us":  float(np.median(medianas[clave])),
+            "ci_low_us":  lo,
+            "ci_high_us": hi,
+            "runs_us":    medianas[clave],
+            "peak_kib":   _pico_kib(fn, before),
+        }
+    return resultados
+
+
+# ============================================================================
+# COMPARACIÓN
+# ============================================================================
+
+def comparar(base: Dict[str, dict], actual: Dict[str, dict], tol: float, mem_tol: float):
+    """Devuelve (regresiones, mejoras, casos sin pareja); cada una, lista de textos."""
+    regresiones, mejoras, sueltos = [], [], []
+    for clave, a in actual.items():
+        b = base.get(clave)
+        if b is None:
+            sueltos.append(f"nuevo: {_titulo(a)}")
+            continue
+
+        motivos = []
+        cambio  = a["median_us"] / b["median_us"] - 1 if b["median_us"] else 0.0
+        if cambio > tol and a["ci_low_us"] > b["ci_high_us"]:
+            motivos.append(
+                f"latencia {_t(b['median_us'])} → {_t(a['median_us'])} ({cambio:+.0%})  "
+                f"IC95 [{_t(a['ci_low_us'], False)}, {_t(a['ci_high_us'])}] vs "
+                f"[{_t(b['ci_low_us'], False)}, {_t(b['ci_high_us'])}]"
+            )
+        elif cambio < -tol and a["ci_high_us"] < b["ci_low_us"]:
+            mejoras.append(f"{_titulo(a)}: {_t(b['median_us'])} → {_t(a['median_us'])} ({cambio:+.0%})")
+
+        pico_b, pico_a = b.get("peak_kib"), a.get("peak_kib")
+        if pico_b is not None and pico_a > pico_b * (1 + mem_tol) and pico_a - pico_b > MEM_SLACK_KIB:
+            motivos.append(
+                f"memoria pico {pico_b:,.0f} KiB → {pico_a:,.0f} KiB ({pico_a / pico_b - 1:+.0%})"
+                if pico_b else f"memoria pico 0 → {pico_a:,.0f} KiB"
+            )
+        if motivos:
+            regresiones.append("\n".join([_titulo(a)] + [f"  {m}" for m in motivos]))
+
+    for clave, b in base.items():
+        if clave not in actual:
+            sueltos.append(f"sin medir: {_titulo(b)}")
+    return regresiones, mejoras, sueltos
+
+
+def _titulo(r: dict) -> str:
+    return f"{funcion(r['bench'])} · {r['recipes']} recetas · nevera {r['fridge']}"
+
+
+def _t(us: float, unidad: bool = True) -> str:
+    """µs legibles: en ms a partir de 1 ms."""
+    if us >= 1000:
+        return f"{us / 1000:.1f}" + (" ms" if unidad else "")
+    return f"{us:.1f}" + (" µs" if unidad else "")
+
+
+def avisos_entorno(base_env: dict, env: dict) -> List[str]:
+    return [
+        f"{k}: base {base_env.get(k)} · ahora {env.get(k)}"
+        for k in ENTORNO if base_env.get(k) != env.get(k)
+    ]
+
+
+# ============================================================================
+# LÍNEA BASE
+# ============================================================================
+
+def cargar_base(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def guardar_base(path: str, config: dict, resultados: Dict[str, dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "config": config, "results": resultados},
+                  f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="Medir y reescribir la línea base")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--repeat", type=int)
+    parser.add_argument("--scales", type=_ints)
+    parser.add_argument("--fridges", type=_ints)
+    parser.add_argument("--recipes")
+    parser.add_argument("--tol", type=float, default=0.15, help="Tolerancia de latencia (0.15 = +15%%)")
+    parser.add_argument("--mem-tol", type=float, default=0.10, help="Tolerancia del pico de memoria")
+    args = parser.parse_args()
+
+    base = None if args.update else cargar_base(args.baseline)
+    if base is None and not args.update:
+        sys.exit(f"No hay línea base en {args.baseline}; créala con --update")
+
+    previa  = (base or {}).get("config", {})
+    config  = {
+        "recipes": args.recipes or previa.get("recipes", CONFIG.RECIPES_FILE),
+        "scales":  list(args.scales or previa.get("scales", (1, 16))),
+        "fridges": list(args.fridges or previa.get("fridges", (8,))),
+        "repeat":  args.repeat or previa.get("repeat", 15),
+    }
+    resultados = medir(config["recipes"], config["scales"], config["fridges"], args.runs, config["repeat"])
+
+    if args.update:
+        guardar_base(args.baseline, config, resultados)
+        print(f"Línea base con {len(resultados)} casos en {args.baseline}")
+        sys.exit(0)
+
+    for aviso in avisos_entorno(base.get("environment", {}), environment()):
+        print(f"⚠️  Entorno distinto al de la base — {aviso}")
+    regresiones, mejoras, sueltos = comparar(base["results"], resultados, args.tol, args.mem_tol)
+    for texto in sueltos:
+        print(f"·  {texto}")
+    if mejoras:
+        print(f"\n{len(mejoras)} mejoras (actualiza la base con --update si se confirman):")
+        for texto in mejoras:
+            print(f"  {texto}")
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones (tol. latencia {args.tol:.0%}, memoria {args.mem_tol:.0%}):\n")
+        print("\n\n".join(regresiones))
+        sys.exit(1)
+    print(f"\n✅ {len(resultados)} casos dentro de tolerancia")
@@ -0,0 +1,235 @@
+"""
+Catálogos sintéticos de recetas (1k–1M) y neveras de prueba.
+
+    python -m benchmarks.synthetic --recipes 100000 --out data/synth/recetas_100k.json
+                                   [--queries 1000] [--seed 7] [--source PATH]
+
+Las distribuciones salen del JSON real (`--source`, por defecto
+CONFIG.RECIPES_FILE):
+
+- ingredientes clave con frecuencia Zipf (exponente ajustado al fichero
+  real) y qty/unit tomados de las apariciones reales de cada ingrediente;
+- vocabulario que crece con el catálogo (ley de Heaps, V ∝ N^0.5): los
+  ingredientes nuevos son variantes de los reales ("tomate asado"), así el
+  coste del matching escala como lo haría con recetas de verdad;
+- nº de ingredientes, base, tags, dificultad, tiempo (condicionado a la
+  dificultad), calorías (por categoría) y pasos, empíricos.
+
+El JSON se escribe en streaming, así que 1M recetas no necesitan tenerlas
+todas en memoria. Junto a él se escribe `<out>_neveras.json` con consultas
+{"ingredientes": [...], "modo": ...} sacadas del mismo vocabulario.
+
+Los catálogos generados sirven para el resto de benchmarks, por ejemplo:
+    python -m benchmarks.bench_hotpaths --recipes data/synth/recetas_100k.json --scales 1
+"""
+import argparse
+import json
+import os
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+from config import CONFIG
+
+HEAPS_BETA = 0.5
+CALIFICATIVOS = [
+    "fresco", "asado", "ahumado", "en conserva", "congelado", "ecológico",
+    "de temporada", "rallado", "troceado", "al natural", "seco", "picante",
+]
+
+
+# ============================================================================
+# PERFIL DEL CATÁLOGO REAL
+# ============================================================================
+
+class Perfil:
+    """Distribuciones empíricas del catálogo real."""
+
+    def __init__(self, recetas: List[dict]):
+        self.recetas = recetas
+        items = Counter(i["item"] for r in recetas for i in r["ingredientes_clave"])
+        self.items  = [it for it, _ in items.most_common()]
+        freqs       = np.array([n for _, n in items.most_common()], dtype=float)
+        self.zipf_s = self._ajustar_zipf(freqs)
+
+        self.cantidades: Dict[str, List[tuple]] = defaultdict(list)
+        for r in recetas:
+            for i in r["ingredientes_clave"]:
+                self.cantidades[i["item"]].append((i.get("qty"), i.get("unit")))
+
+        self.n_claves = [len(r["ingredientes_clave"]) for r in recetas]
+        self.bases    = [r.get("ingredientes_base", []) for r in recetas]
+        self.tags     = [r.get("tags", []) for r in recetas]
+        self.dificultades = [r.get("dificultad") for r in recetas]
+        self.tiempos: Dict[str, List] = defaultdict(list)
+        for r in recetas:
+            self.tiempos[r.get("dificultad")].append(r.get("tiempo_min"))
+        self.categorias = [(r.get("categoria"), r.get("tipo")) for r in recetas]
+        self.calorias: Dict[str, List] = defaultdict(list)
+        for r in recetas:
+            self.calorias[r.get("categoria")].append(r.get("calorias_aprox"))
+        self.pasos  = [r.get("proceso_detallado", []) for r in recetas]
+        self.platos = [r["nombre"].split()[0].lower() for r in recetas]
+
+    @staticmethod
+    def _ajustar_zipf(freqs: np.ndarray) -> float:
+        """Pendiente de log(frecuencia) frente a log(rango)."""
+        ranks = np.arange(1, len(freqs) + 1)
+        slope, _ = np.polyfit(np.log(ranks), np.log(freqs), 1)
+        return float(-slope)
+
+    def vocabulario(self, n_recetas: int) -> List[str]:
+        """Ingredientes reales por frecuencia y, detrás, las variantes necesarias."""
+        base = len(self.items)
+        size = max(base, int(base * (n_recetas / len(self.recetas)) ** HEAPS_BETA))
+        vocab = list(self.items)
+        # Variantes por orden de calificativo y, dentro, de frecuencia del original:
+        # las de ingredientes comunes aparecen antes (más probables).
+        combos = CALIFICATIVOS + [f"{a} {b}" for a in CALIFICATIVOS for b in CALIFICATIVOS if a != b]
+        for cal in combos:
+            for item in self.items:
+                if len(vocab) >= size:
+                    return vocab
+                vocab.append(f"{item} {cal}")
+        return vocab
+
+
+def _origen(item: str, reales: set) -> str:
+    """Ingrediente real del que sale una variante."""
+    while item not in reales and " " in item:
+        item = item.rsplit(" ", 1)[0]
+    return item
+
+
+# ============================================================================
+# GENERACIÓN
+# ============================================================================
+
+def _zipf_p(n: int, s: float) -> np.ndarray:
+    p = np.arange(1, n + 1, dtype=float) ** -s
+    return p / p.sum()
+
+
+def generar_recetas(perfil: Perfil, n: int, seed: int = 7):
+    """Genera `n` recetas (dicts con el esquema del JSON real), una a una."""
+    rng    = np.random.default_rng(seed)
+    vocab  = perfil.vocabulario(n)
+    reales = set(perfil.items)
+    p      = _zipf_p(len(vocab), perfil.zipf_s)
+    bloque = 65_536
+    cola   = iter(())
+
+    def siguiente_item() -> int:
+        nonlocal cola
+        try:
+            return next(cola)
+        except StopIteration:
+            cola = iter(rng.choice(len(vocab), size=bloque, p=p).tolist())
+            return next(cola)
+
+    def elegir(lista):
+        return lista[int(rng.integers(len(lista)))]
+
+    for i in range(n):
+        k = elegir(perfil.n_claves)
+        elegidos: List[int] = []
+        while len(elegidos) < k:
+            j = siguiente_item()
+            if j not in elegidos:
+                elegidos.append(j)
+        claves = []
+        for j in elegidos:
+            item = vocab[j]
+            qty, unit = elegir(perfil.cantidades[_origen(item, reales)])
+            claves.append({"item": item, "qty": qty, "unit": unit})
+
+        nombres_ing = [c["item"] for c in claves]
+        dificultad  = elegir(perfil.dificultades)
+        categoria, tipo = elegir(perfil.categorias)
+        plato = elegir(perfil.platos)
+        nombre = f"{plato} de {nombres_ing[0]}" + (f" con {nombres_ing[1]}" if k > 1 else "")
+        pasos  = list(elegir(perfil.pasos))
+        if pasos:
+            pasos[0] = f"1. Preparar {', '.join(nombres_ing)}."
+
+        yield {
+            "receta_id": i + 1,
+            "nombre": nombre,
+            "categoria": categoria,
+            "tipo": tipo,
+            "ingredientes_clave": claves,
+            "ingredientes_base": list(elegir(perfil.bases)),
+            "dificultad": dificultad,
+            "tiempo_min": elegir(perfil.tiempos[dificultad]),
+            "calorias_aprox": elegir(perfil.calorias[categoria]),
+            "tags": list(elegir(perfil.tags)),
+            "proceso_corto": f"Preparar {', '.join(nombres_ing)} y servir.",
+            "proceso_detallado": pasos,
+        }
+
+
+def generar_neveras(perfil: Perfil, n_recetas: int, n: int, seed: int = 7) -> List[dict]:
+    """
+    Consultas de prueba: 3–15 ingredientes (moda ~6) del mismo vocabulario y
+    con la misma Zipf, así que las neveras tienen sobre todo cosas comunes.
+    """
+    rng   = np.random.default_rng(seed + 1)
+    vocab = perfil.vocabulario(n_recetas)
+    p     = _zipf_p(len(vocab), perfil.zipf_s)
+    modos = list(CONFIG.MODES)
+    out = []
+    for _ in range(n):
+        size = int(np.clip(round(rng.triangular(3, 6, 15)), 3, 15))
+        idx  = rng.choice(len(vocab), size=size, replace=False, p=p)
+        out.append({
+            "ingredientes": [vocab[j] for j in idx],
+            "modo": modos[int(rng.integers(len(modos)))],
+        })
+    return out
+
+
+def escribir_catalogo(recetas, path: str) -> int:
+    """Escribe un array JSON receta a receta; devuelve cuántas escribió."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for r in recetas:
+            if n:
+                f.write(",\n")
+            f.write(json.dumps(r, ensure_ascii=False))
+            n += 1
+        f.write("\n]\n")
+    return n
+
+
+def cargar_perfil(path: str = CONFIG.RECIPES_FILE) -> Perfil:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return Perfil(data if isinstance(data, list) else data.get("recetas", []))
+
+
+def neveras_path(out: str) -> str:
+    stem, ext = os.path.splitext(out)
+    return f"{stem}_neveras{ext or '.json'}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--source", default=CONFIG.RECIPES_FILE)
+    args = parser.parse_args()
+
+    perfil = cargar_perfil(args.source)
+    n = escribir_catalogo(generar_recetas(perfil, args.recipes, args.seed), args.out)
+    neveras = generar_neveras(perfil, args.recipes, args.queries, args.seed)
+    with open(neveras_path(args.out), "w", encoding="utf-8") as f:
+        json.dump(neveras, f, ensure_ascii=False, indent=1)
+
+    print(f"Zipf s={perfil.zipf_s:.2f} · vocabulario {len(perfil.vocabulario(args.recipes))} ingredientes")
+    print(f"{n} recetas → {args.out}")
+    print(f"{len(neveras)} neveras → {neveras_path(args.out)}")
@@ -0,0 +1,226 @@
+"""
+API JSON para clientes máquina (sin HTML ni Gradio).
+components/api.py
+
+Se monta en la misma app FastAPI que sirve la interfaz:
+
+    POST /api/v1/recommend          → primera página + query_id
+    GET  /api/v1/recommend/{qid}    → más resultados del mismo cursor
+    POST /api/v1/recommend/batch    → varias consultas en una petición
+    POST /api/v1/combine            → 2-3 platos que juntos aprovechan la nevera
+    POST /api/v1/detect             → ingredientes de una foto (Gemini; 413 si pasa de
+                                      CONFIG.API_MAX_IMAGE_BYTES)
+
+Objetivos de latencia (p95 en servidor, catálogo actual de ~300 recetas):
+  recommend  < 50 ms   ·  página de cursor < 2 ms
+  batch      < 50 ms por consulta (secuenciales; sin coste de HTML)
+  combine    < 100 ms
+  detect     dominado por Gemini (1–4 s); el overhead propio < 50 ms
+
+Las respuestas se serializan con TypeAdapter.dump_json (pydantic-core en
+Rust) directamente a bytes, sin pasar por jsonable_encoder. Los clientes
+deberían reutilizar la conexión: uvicorn la mantiene abierta
+CONFIG.API_KEEPALIVE_S segundos entre peticiones.
+"""
+import logging
+import os
+import tempfile
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, File, HTTPException, Request, Response, UploadFile
+from pydantic import BaseModel, Field, TypeAdapter
+
+from config import CONFIG
+from models import DetectedIngredient, MealCombination, RecipeIngredient, Recommendation
+from core.admission import AdmissionController, AdmissionRejected
+from core.profiling import profiled
+from core.recommender import RecipeRecommender, CursorExpiredError, RecommenderError, ResultPage
+from core.tracing import trace
+from core.vision import detectar_ingredientes, VisionError
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# ESQUEMAS
+# ============================================================================
+
+class Filtros(BaseModel):
+    max_tiempo:    Optional[int] = Field(None, ge=1)
+    max_faltantes: Optional[int] = Field(None, ge=0)
+
+
+class RecommendRequest(BaseModel):
+    ingredientes: List[str] = Field(default_factory=list, max_length=CONFIG.MAX_INGREDIENTS)
+    # Opcional: con cantidades, cada resultado trae raciones_posibles
+    inventario:   List[RecipeIngredient] = Field(default_factory=list, max_length=CONFIG.MAX_INGREDIENTS)
+    n:            int = Field(CONFIG.DEFAULT_N_RECIPES, ge=1, le=CONFIG.MAX_N_RECIPES)
+    modo:         str = Field("survival", pattern="^(survival|chef)$")
+    filtros:      Filtros = Field(default_factory=Filtros)
+
+
+class BatchRequest(BaseModel):
+    consultas: List[RecommendRequest] = Field(..., min_length=1, max_length=CONFIG.API_MAX_BATCH)
+
+
+class CombineRequest(BaseModel):
+    ingredientes:  List[str] = Field(..., min_length=1, max_length=CONFIG.MAX_INGREDIENTS)
+    platos:        int = Field(CONFIG.COMBO_MAX_PLATOS, ge=2, le=CONFIG.COMBO_MAX_PLATOS)
+    n:             int = Field(3, ge=1, le=CONFIG.MAX_N_RECIPES)
+    max_faltantes: int = Field(CONFIG.COMBO_MAX_FALTANTES, ge=0)
+
+
+class RecommendResponse(BaseModel):
+    query_id:   str
+    offset:     int
+    total:      int
+    has_more:   bool
+    resultados: List[Recommendation]
+    took_ms:    float
+
+
+class CombineResponse(BaseModel):
+    combinaciones: List[MealCombination]
+    took_ms:       float
+
+
+class DetectResponse(BaseModel):
+    ingredientes: List[DetectedIngredient]
+    took_ms:      float
+
+
+_RECOMMEND = TypeAdapter(RecommendResponse)
+_BATCH     = TypeAdapter(List[RecommendResponse])
+_COMBINE   = TypeAdapter(CombineResponse)
+_DETECT    = TypeAdapter(DetectResponse)
+
+
+def _json(adapter: TypeAdapter, value) -> Response:
+    # by_alias: los campos se llaman igual en peticiones y respuestas ("qty")
+    return Response(adapter.dump_json(value, by_alias=True), media_type="application/json")
+
+
+def _page_response(page: ResultPage, t0: float) -> RecommendResponse:
+    # model_construct: los Recommendation ya vienen validados del recommender
+    return RecommendResponse.model_construct(
+        query_id=page.query_id,
+        offset=page.offset,
+        total=page.total,
+        has_more=page.has_more,
+        resultados=page.items,
+        took_ms=round((time.perf_counter() - t0) * 1000, 3),
+    )
+
+
+def _sesion_api(request: Request) -> str:
+    """
+    Bucket de admisión de un cliente de la API: su IP. Detrás de un proxy de
+    CONFIG.FORWARDED_ALLOW_IPS uvicorn ya ha puesto en `request.client` la del
+    X-Forwarded-For. Sin dirección (cliente ASGI en proceso, socket unix) todas
+    las peticiones comparten el bucket "api:?".
+    """
+    return f"api:{request.client.host if request.client and request.client.host else '?'}"
+
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+
+def build_router(
+    recommender: RecipeRecommender,
+    admission: Optional[AdmissionController] = None,
+) -> APIRouter:
+    """
+    Rutas /api/v1 sobre un recommender ya construido. Con `admission`,
+    /detect comparte los límites de Gemini con la UI (sesión = IP cliente).
+    """
+    router = APIRouter(prefix="/api/v1", tags=["api"])
+
+    def _search(req: RecommendRequest) -> ResultPage:
+        nombres    = [i.strip().lower() for i in req.ingredientes if i.strip()]
+        inventario = {i.item.strip().lower(): (i.quantity, i.unit) for i in req.inventario if i.item.strip()}
+        if not nombres and not inventario:
+            raise HTTPException(422, "Ingredientes vacíos")
+        try:
+            return recommender.search(nombres, n=req.n, modo=req.modo, filtros=req.filtros.model_dump(),
+                                      inventario=inventario or None)
+        except RecommenderError as e:
+            raise HTTPException(422, str(e))
+
+    @router.post("/recommend")
+    def recommend(req: RecommendRequest):
+        t0 = time.perf_counter()
+        with trace("api.recommend", modo=req.modo, ingredientes=len(req.ingredientes)), \
+             profiled("api.recommend", modo=req.modo, ingredientes=len(req.ingredientes)):
+            return _json(_RECOMMEND, _page_response(_search(req), t0))
+
+    @router.get("/recommend/{query_id}")
+    def recommend_page(query_id: str, offset: int = 0, n: int = CONFIG.DEFAULT_N_RECIPES):
+        t0 = time.perf_counter()
+        n = max(1, min(n, CONFIG.MAX_N_RECIPES))
+        try:
+            page = recommender.page(query_id, offset, n)
+        except CursorExpiredError as e:
+            raise HTTPException(410, str(e))
+        return _json(_RECOMMEND, _page_response(page, t0))
+
+    @router.post("/recommend/batch")
+    def recommend_batch(req: BatchRequest):
+        respuestas = []
+        for consulta in req.consultas:
+            t0 = time.perf_counter()
+            respuestas.append(_page_response(_search(consulta), t0))
+        return _json(_BATCH, respuestas)
+
+    @router.post("/combine")
+    def combine(req: CombineRequest):
+        t0 = time.perf_counter()
+        nombres = [i.strip().lower() for i in req.ingredientes if i.strip()]
+        if not nombres:
+            raise HTTPException(422, "Ingredientes vacíos")
+        with trace("api.combine", platos=req.platos, ingredientes=len(nombres)), \
+             profiled("api.combine", platos=req.platos, ingredientes=len(nombres)):
+            try:
+                combinaciones = recommender.combine(nombres, platos=req.platos, n=req.n,
+                                                    max_faltantes=req.max_faltantes)
+            except RecommenderError as e:
+                raise HTTPException(422, str(e))
+        return _json(_COMBINE, CombineResponse.model_construct(
+            combinaciones=combinaciones,
+            took_ms=round((time.perf_counter() - t0) * 1000, 3),
+        ))
+
+    @router.post("/detect")
+    def detect(request: Request, imagen: UploadFile = File(...)):
+        t0 = time.perf_counter()
+        # Antes que la admisión: una foto rechazada no gasta cupo de Gemini.
+        # Se lee como mucho un byte más del límite, nunca el cuerpo entero.
+        limite = CONFIG.API_MAX_IMAGE_BYTES
+        datos  = b"" if (imagen.size or 0) > limite else imagen.file.read(limite + 1)
+        if (imagen.size or 0) > limite or len(datos) > limite:
+            raise HTTPException(413, f"Imagen de más de {limite} bytes")
+        if admission is not None:
+            try:
+                admission.admit(_sesion_api(request))
+            except AdmissionRejected as e:
+                raise HTTPException(
+                    429, str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))}
+                )
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
+            tmp.write(datos)
+            tmp_path = tmp.name
+        try:
+            with trace("api.detect", image_bytes=len(datos)):
+                ingredientes = detectar_ingredientes(tmp_path)
+        except VisionError as e:
+            logger.warning(f"API detect: {e}")
+            raise HTTPException(502, f"Error de visión: {e}")
+        finally:
+            os.unlink(tmp_path)
+        return _json(_DETECT, DetectResponse.model_construct(
+            ingredientes=ingredientes,
+            took_ms=round((time.perf_counter() - t0) * 1000, 3),
+        ))
+
+    return router
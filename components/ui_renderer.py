@@ -2,21 +2,94 @@
 Renderizado de UI con diseño 'Nevera de Noche'.
 """
 
-from typing import List, Dict, Any, Optional
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from config import COLORS, TYPO, CONFIG
 
 LOGO_B64 = "" 
 
+# Tarjetas (receta, modo) cuyos fragmentos estáticos se mantienen en memoria
+CARD_CACHE_SIZE = 1024
+
+FONTS_URL = (
+    "https://fonts.googleapis.com/css2?family=Syne:wght@400;600;700;800"
+    "&family=DM+Sans:wght@300;400;500;600&family=JetBrains+Mono:wght@400;500"
+    "&family=Space+Grotesk:wght@500;700&display=swap"
+)
+
+# Carga del cuerpo de una tarjeta diferida la primera vez que se despliega
+DETAIL_LOADER_JS = (
+    "function fgDetalle(d){var p=d.querySelector('.rc-lz');"
+    "if(!d.open||!p||p.dataset.busy)return;p.dataset.busy=1;"
+    "fetch(p.dataset.src).then(function(r){if(!r.ok)throw r;return r.text();})"
+    ".then(function(h){p.outerHTML=h;})"
+    ".catch(function(){p.textContent='No se pudo cargar la receta';delete p.dataset.busy;});}"
+)
+
+# Umbrales de match → (clase compacta, color)
+MATCH_CLASSES = (
+    (95, "m-ok", COLORS.SUCCESS),
+    (75, "m-hi", "#a3e635"),
+    (50, "m-md", COLORS.WARNING),
+    (0,  "m-lo", COLORS.ERROR),
+)
+
+
+def _limpiar_paso(p: str) -> str:
+    """Quita la numeración "1." / "2)" del inicio de un paso."""
+    return re.sub(r'^[\d]+[\.\)]\s*', '', p)
+
+
 class UIRenderer:
     """Renderiza componentes HTML profesionales."""
+
+    _card_cache: "OrderedDict[Tuple[Any, str], Tuple[Any, Tuple[str, str, str]]]" = OrderedDict()
+    _card_lock = threading.Lock()
     
+    # Modo compacto: tarjetas con clases cortas y sin estilos inline. Requiere
+    # que la página cargue `stylesheet()` (la app lo sirve en `stylesheet_path()`).
+    compact: bool = CONFIG.COMPACT_HTML
+    # En modo compacto, los pasos y la sección chef se piden al desplegar
+    lazy_details: bool = CONFIG.LAZY_DETAILS
+
     @classmethod
     def get_base_styles(cls) -> str:
-        """CSS base completo."""
+        """CSS base completo (fuentes aparte, ver FONTS_URL / `head_tags`)."""
+        return f"<style>{cls.stylesheet()}</style>"
+
+    @classmethod
+    @lru_cache(maxsize=1)
+    def stylesheet(cls) -> str:
+        """Hoja de estilos precompilada: base + clases del modo compacto."""
+        css = cls._base_css() + cls._component_css()
+        # Minificado ligero: sin comentarios ni espacios de indentación
+        css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+        css = re.sub(r"\s*\n\s*", "", css)
+        return re.sub(r"\s*([{};:,])\s*", r"\1", css)
+
+    @classmethod
+    def stylesheet_path(cls) -> str:
+        """Ruta versionada por contenido: se puede cachear para siempre."""
+        digest = hashlib.sha1(cls.stylesheet().encode("utf-8")).hexdigest()[:12]
+        return f"/static/eatguai-{digest}.css"
+
+    @classmethod
+    def head_tags(cls) -> str:
+        """<link> para el <head> de la página: fuentes y hoja de estilos."""
+        return (
+            '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+            f'<link rel="stylesheet" href="{FONTS_URL}">'
+            f'<link rel="stylesheet" href="{cls.stylesheet_path()}">'
+            f"<script>{DETAIL_LOADER_JS}</script>"
+        )
+
+    @classmethod
+    def _base_css(cls) -> str:
         return f"""
-        <style>
-        @import url('https://fonts.googleapis.com/css2?family=Syne:wght@400;600;700;800&family=DM+Sans:wght@300;400;500;600&family=JetBrains+Mono:wght@400;500&family=Space+Grotesk:wght@500;700&display=swap');
-        
         :root {{
             --bg-primary: {COLORS.BG_PRIMARY};
             --bg-secondary: {COLORS.BG_SECONDARY};
@@ -146,7 +219,89 @@ class UIRenderer:
             animation: scan 2s linear infinite;
             pointer-events: none;
         }}
-        </style>
+        """
+
+    @classmethod
+    def _component_css(cls) -> str:
+        """Clases del modo compacto (tarjetas, anillo de match, grid)."""
+        modes = "".join(
+            f".rc.{key}{{--c:{cfg['color']};}}" for key, cfg in CONFIG.MODES.items()
+        )
+        matches = "".join(f".{name}{{--m:{color};}}" for _, name, color in MATCH_CLASSES)
+        return modes + matches + f"""
+        .rc {{ margin-bottom:16px; padding:0; overflow:hidden; }}
+        .rc-hd {{
+            position:relative; padding:20px 24px; cursor:pointer; display:flex;
+            justify-content:space-between; align-items:center; list-style:none;
+        }}
+        .rc-hd::-webkit-details-marker {{ display:none; }}
+        .rc-bar {{
+            position:absolute; top:0; left:0; right:0; height:3px;
+            background:linear-gradient(90deg, var(--c), var(--m));
+        }}
+        .rc-nm {{
+            font-family:{TYPO.DISPLAY}; font-size:1.15em;
+            font-weight:700; color:{COLORS.TEXT_PRIMARY};
+        }}
+        .rc-mt {{ margin-top:6px; display:flex; gap:10px; flex-wrap:wrap; }}
+        .rc-mt span {{ font-family:{TYPO.DATA}; font-size:0.75em; color:{COLORS.TEXT_MUTED}; }}
+        .rc-rt {{ display:flex; align-items:center; gap:16px; }}
+        .rc-ar {{ color:{COLORS.TEXT_MUTED}; font-size:0.8em; transition:transform 0.2s; }}
+        .rc[open] .rc-ar {{ transform:rotate(180deg); }}
+        .rc-bd {{ padding:0 24px 24px; border-top:1px solid {COLORS.BORDER_SUBTLE}; }}
+        .rc-ft {{
+            margin-top:16px; padding:12px 16px;
+            background:{COLORS.BG_TERTIARY}; border-radius:10px;
+        }}
+        .rc-ft p {{ margin:4px 0 0; font-size:0.9em; color:{COLORS.WARNING}; }}
+        .rc-ft p.ok {{ color:#34d399; }}
+        .rc-st {{ margin-top:16px; }}
+        .rc-lz {{ margin-top:16px; font-size:0.85em; color:{COLORS.TEXT_MUTED}; }}
+        .rc-st ol {{ margin:10px 0 0; padding-left:20px; }}
+        .rc-st li {{ margin-bottom:10px; padding-left:4px; color:{COLORS.TEXT_SECONDARY}; line-height:1.6; }}
+        .rc-cs {{ margin-top:12px; }}
+        .rc-cs p {{ color:{COLORS.TEXT_SECONDARY}; margin:4px 0 0; font-size:0.9em; }}
+        .rc-tq {{ margin-top:6px; display:flex; flex-wrap:wrap; gap:6px; }}
+        .rc-tq span {{
+            background:color-mix(in srgb, var(--c) 12%, transparent); color:var(--c);
+            padding:3px 10px; border-radius:20px; font-size:0.8em;
+        }}
+        .rc-nt {{
+            margin-top:12px; padding:12px; background:color-mix(in srgb, var(--c) 6%, transparent);
+            border-left:3px solid var(--c); border-radius:0 8px 8px 0;
+        }}
+        .rc-nt p {{ color:{COLORS.TEXT_PRIMARY}; margin:4px 0 0; font-size:0.9em; font-style:italic; }}
+        .rl-h {{ margin-bottom:16px; }}
+
+        .rr {{ position:relative; width:46px; height:46px; flex-shrink:0; }}
+        .rr svg {{ transform:rotate(-90deg); }}
+        .rr circle {{ fill:none; stroke-width:3; }}
+        .rr .bg {{ stroke:rgba(255,255,255,0.08); }}
+        .rr .fg {{
+            stroke:var(--m); stroke-linecap:round; stroke-dasharray:100.53;
+            transition:stroke-dashoffset 1s ease-out; filter:drop-shadow(0 0 3px var(--m));
+        }}
+        .rr b {{
+            position:absolute; inset:0; display:flex; align-items:center; justify-content:center;
+            font-family:var(--font-data); font-size:0.6em; font-weight:700; color:var(--m);
+        }}
+        .rr small {{
+            position:absolute; bottom:-14px; left:50%; transform:translateX(-50%);
+            font-size:0.55em; color:var(--m); white-space:nowrap; opacity:0.9;
+        }}
+
+        .ig {{ margin:24px 0; }}
+        .ig-g {{
+            display:grid; grid-template-columns:repeat(auto-fill, minmax(140px, 1fr)); gap:12px;
+        }}
+        .ig-c {{ padding:16px; text-align:center; position:relative; }}
+        .ig-c::before {{
+            content:''; position:absolute; top:0; left:0; right:0; height:3px;
+            background:#4a6fa5; opacity:0.8; box-shadow:0 0 8px #4a6fa5;
+        }}
+        .ig-e {{ font-size:2.2em; margin-bottom:8px; }}
+        .ig-n {{ font-family:var(--font-body); font-size:0.9em; color:var(--text-primary); margin-bottom:4px; }}
+        .ig-p {{ font-family:var(--font-data); font-size:0.75em; color:var(--text-secondary); }}
         """
         
     @classmethod
@@ -318,6 +473,18 @@ class UIRenderer:
         """Grid visual de ingredientes detectados."""
         if not ingredients:
             return ""
+        if cls.compact:
+            cards = "".join(
+                f'<div class="glass-panel ig-c"><div class="ig-e">{ing.emoji}</div>'
+                f'<div class="ig-n">{ing.name.title()}</div>'
+                f'<div class="ig-p">{ing.confidence:.0%}</div></div>'
+                for ing in sorted(ingredients, key=lambda x: x.confidence, reverse=True)
+            )
+            return (
+                f'<div class="ig"><div class="text-label" style="margin-bottom:12px;">'
+                f'Ingredientes Detectados ({len(ingredients)})</div>'
+                f'<div class="ig-g fade-in">{cards}</div></div>'
+            )
     
         cards = []
         for i, ing in enumerate(sorted(ingredients, key=lambda x: x.confidence, reverse=True)):
@@ -473,39 +640,83 @@ class UIRenderer:
         return html        
 
     @classmethod
-    def render_recipe_card(cls, rec: Any, modo: str = "survival") -> str:
-        """Tarjeta completa de receta. Acepta objeto Recommendation."""
-        from models import Recommendation
-        import re
+    def _render_match_ring_compact(cls, match: float, label: str) -> str:
+        """Anillo del modo compacto; el color sale de la clase m-* de la tarjeta."""
+        offset = 2 * 3.14159 * 16 * (1 - match / 100)
+        return (
+            f'<div class="rr"><svg width="46" height="46">'
+            f'<circle class="bg" cx="23" cy="23" r="16"/>'
+            f'<circle class="fg" cx="23" cy="23" r="16" stroke-dashoffset="{offset:.2f}"/>'
+            f'</svg><b>{match:.0f}%</b><small>{label}</small></div>'
+        )
 
-        recipe     = rec.receta
-        match      = rec.porcentaje_match * 100
-        mode_cfg   = CONFIG.get_mode(modo)
-        color      = mode_cfg["color"]
+    @classmethod
+    def render_recipe_details(cls, recipe: Any, modo: str = "survival") -> str:
+        """
+        Cuerpo desplegable de la tarjeta compacta: pasos y, en modo chef,
+        técnicas, maridaje, presentación y nota. Es lo que sirve el
+        endpoint de detalle cuando las tarjetas se cargan en diferido.
+        """
+        mode_cfg = CONFIG.get_mode(modo)
+        pasos = "".join(f"<li>{_limpiar_paso(p)}</li>" for p in recipe.proceso_detallado)
 
-        if match >= 95:
-            match_color = COLORS.SUCCESS
-            match_label = "Tienes todo ✓"
-        elif match >= 75:
-            match_color = "#a3e635"
-            match_label = f"{match:.0f}% disponible"
-        elif match >= 50:
-            match_color = COLORS.WARNING
-            match_label = f"{match:.0f}% disponible"
-        else:
-            match_color = COLORS.ERROR
-            match_label = f"{match:.0f}% disponible"
+        chef = ""
+        if modo == "chef" and mode_cfg.get("show_techniques"):
+            if recipe.tecnicas:
+                chips = "".join(f"<span>{t}</span>" for t in recipe.tecnicas)
+                chef += f'<div class="rc-cs"><span class="text-label">Técnicas</span><div class="rc-tq">{chips}</div></div>'
+            if recipe.maridaje:
+                chef += f'<div class="rc-cs"><span class="text-label">Maridaje</span><p>🍷 {recipe.maridaje}</p></div>'
+            if recipe.presentacion:
+                chef += f'<div class="rc-cs"><span class="text-label">Presentación</span><p>🍽️ {recipe.presentacion}</p></div>'
+            if recipe.chef_notes:
+                chef += f'<div class="rc-nt"><span class="text-label">Nota del Chef</span><p>👨‍🍳 {recipe.chef_notes}</p></div>'
 
-        faltan     = [i.item for i in rec.ingredientes_faltantes]
-        faltan_txt = ", ".join(faltan) if faltan else "ninguno 🎉"
+        return f'<div class="rc-st"><span class="text-label">Preparación</span><ol>{pasos}</ol></div>{chef}'
+
+    @classmethod
+    def detail_path(cls, receta_id: int, modo: str) -> str:
+        return f"/ui/receta/{receta_id}?modo={modo}"
+
+    @classmethod
+    def _card_fragments_compact(cls, recipe: Any, modo: str, lazy: bool) -> Tuple[str, str, str]:
+        """
+        Equivalente compacto de `_card_fragments`: <details> nativo, sin
+        estilos inline. Con `lazy` el cuerpo (pasos, sección chef) no se
+        envía: se pide a `detail_path` la primera vez que se despliega.
+        """
+        head = (
+            f'<summary class="rc-hd"><i class="rc-bar"></i><div>'
+            f'<div class="rc-nm">{recipe.nombre}</div><div class="rc-mt">'
+            f"<span>⏱ {recipe.tiempo_min or '?'} min</span>"
+            f"<span>📊 {(recipe.dificultad or 'N/A').title()}</span>"
+            f"<span>🔥 {recipe.calorias_aprox or '?'} kcal</span>"
+            f'</div></div><div class="rc-rt">'
+        )
+        mid = (
+            '<span class="rc-ar">▼</span></div></summary>'
+            '<div class="rc-bd"><div class="rc-ft"><span class="text-label">Te faltan</span>'
+        )
+        if lazy:
+            body = f'<div class="rc-lz" data-src="{cls.detail_path(recipe.receta_id, modo)}">Cargando…</div>'
+        else:
+            body = cls.render_recipe_details(recipe, modo)
+        return head, mid, f"{body}</div></details>"
 
-        def limpiar_paso(p):
-            return re.sub(r'^[\d]+[\.\)]\s*', '', p)
+    @classmethod
+    def _card_fragments(cls, recipe: Any, modo: str) -> Tuple[str, str, str]:
+        """
+        Partes estáticas de la tarjeta (solo dependen de receta y modo):
+        cabecera hasta el anillo, tramo hasta "Te faltan" y cuerpo final
+        con pasos y sección chef.
+        """
+        mode_cfg = CONFIG.get_mode(modo)
+        color    = mode_cfg["color"]
 
         pasos_html = "".join(
             f"<li style='margin-bottom:10px; padding-left:4px; "
             f"color:{COLORS.TEXT_SECONDARY}; line-height:1.6;'>"
-            f"{limpiar_paso(p)}</li>"
+            f"{_limpiar_paso(p)}</li>"
             for p in recipe.proceso_detallado
         )
 
@@ -559,9 +770,7 @@ class UIRenderer:
 
         recipe_id = recipe.nombre.replace(" ", "_").replace("/", "_").lower()
 
-        return f"""
-        <div class="glass-panel fade-in" style="margin-bottom:16px; padding:0; overflow:hidden;">
-            <div style="height:3px; background:linear-gradient(90deg, {color}, {match_color});"></div>
+        head = f"""
             <div onclick="
                 var b=document.getElementById('body_{recipe_id}');
                 var a=document.getElementById('arrow_{recipe_id}');
@@ -590,7 +799,8 @@ class UIRenderer:
                     </div>
                 </div>
                 <div style="display:flex; align-items:center; gap:16px;">
-                {cls.render_match_ring(match, match_color, match_label)}
+                """
+        mid = f"""
                     <span id="arrow_{recipe_id}" style="color:{COLORS.TEXT_MUTED};
                           font-size:0.8em;">▼</span>
                 </div>
@@ -601,10 +811,8 @@ class UIRenderer:
                             background:{COLORS.BG_TERTIARY}; border-radius:10px;">
                     <span class="text-label">Te faltan</span>
                     <p style="margin:4px 0 0; font-size:0.9em;
-                              color:{'#34d399' if not faltan else COLORS.WARNING};">
-                        {faltan_txt}
-                    </p>
-                </div>
+                              color:"""
+        tail = f"""
                 <div style="margin-top:16px;">
                     <span class="text-label">Preparación</span>
                     <ol style="margin:10px 0 0; padding-left:20px;">
@@ -615,6 +823,87 @@ class UIRenderer:
             </div>
         </div>
         """
+        return head, mid, tail
+
+    @classmethod
+    def _cached_fragments(cls, recipe: Any, modo: str) -> Tuple[str, str, str]:
+        """
+        Fragmentos estáticos memoizados por (receta_id, modo). Se guarda la
+        receta junto al HTML: si el catálogo cambia el contenido de ese id
+        (recarga o edición) la comparación falla y se vuelve a renderizar.
+        """
+        compact = cls.compact
+        lazy    = compact and cls.lazy_details and recipe.receta_id is not None
+        key = (recipe.receta_id, modo, compact, lazy)
+        with cls._card_lock:
+            hit = cls._card_cache.get(key)
+            if hit is not None and (hit[0] is recipe or hit[0] == recipe):
+                cls._card_cache.move_to_end(key)
+                return hit[1]
+
+        if compact:
+            fragments = cls._card_fragments_compact(recipe, modo, lazy)
+        else:
+            fragments = cls._card_fragments(recipe, modo)
+        with cls._card_lock:
+            cls._card_cache[key] = (recipe, fragments)
+            cls._card_cache.move_to_end(key)
+            while len(cls._card_cache) > CARD_CACHE_SIZE:
+                cls._card_cache.popitem(last=False)
+        return fragments
+
+    @classmethod
+    def render_recipe_card(cls, rec: Any, modo: str = "survival") -> str:
+        """Tarjeta completa de receta. Acepta objeto Recommendation."""
+        recipe     = rec.receta
+        match      = rec.porcentaje_match * 100
+        color      = CONFIG.get_mode(modo)["color"]
+
+        if match >= 95:
+            match_color = COLORS.SUCCESS
+            match_label = "Tienes todo ✓"
+        elif match >= 75:
+            match_color = "#a3e635"
+            match_label = f"{match:.0f}% disponible"
+        elif match >= 50:
+            match_color = COLORS.WARNING
+            match_label = f"{match:.0f}% disponible"
+        else:
+            match_color = COLORS.ERROR
+            match_label = f"{match:.0f}% disponible"
+
+        faltan     = [i.item for i in rec.ingredientes_faltantes]
+        faltan_txt = ", ".join(faltan) if faltan else "ninguno 🎉"
+
+        head, mid, tail = cls._cached_fragments(recipe, modo)
+
+        if cls.compact:
+            match_cls  = next(name for limit, name, _ in MATCH_CLASSES if match >= limit)
+            faltan_cls = "" if faltan else ' class="ok"'
+            toggle = ' ontoggle="fgDetalle(this)"' if cls.lazy_details else ""
+            return (
+                f'<details class="glass-panel fade-in rc {modo} {match_cls}"{toggle}>'
+                + head
+                + cls._render_match_ring_compact(match, match_label)
+                + mid
+                + f'<p{faltan_cls}>{faltan_txt}</p></div>'
+                + tail
+            )
+
+        # Solo la barra superior, el anillo y "Te faltan" cambian por consulta
+        return (
+            f"""
+        <div class="glass-panel fade-in" style="margin-bottom:16px; padding:0; overflow:hidden;">
+            <div style="height:3px; background:linear-gradient(90deg, {color}, {match_color});"></div>"""
+            + head
+            + cls.render_match_ring(match, match_color, match_label)
+            + mid
+            + f"""{'#34d399' if not faltan else COLORS.WARNING};">
+                        {faltan_txt}
+                    </p>
+                </div>"""
+            + tail
+        )
 
     @classmethod
     def render_recipes_list(cls, recommendations: List[Any], modo: str = "survival") -> str:
@@ -623,6 +912,11 @@ class UIRenderer:
             return cls.render_empty_state("No encontramos recetas con esos ingredientes")
 
         cards = "".join(cls.render_recipe_card(r, modo) for r in recommendations)
+        if cls.compact:
+            return (
+                f'<div class="fade-in"><div class="text-label rl-h">'
+                f"{len(recommendations)} recetas encontradas</div>{cards}</div>"
+            )
         return f"""
         <div class="fade-in">
             <div class="text-label" style="margin-bottom:16px;">
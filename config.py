@@ -3,7 +3,7 @@ Configuración centralizada de eatguai.
 Colores, umbrales y comportamiento.
 """
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, List
 import os
 
 # ============================================================================
@@ -87,17 +87,145 @@ class AppConfig:
     RECIPES_FILE:  str = "data/recetas_backend_proceso_ultra.json"
     RATINGS_FILE:  str = "data/ratings.csv"
     SESSION_FILE:  str = "data/session_state.json"
+    ONTOLOGY_FILE: str = "data/ingredientes_ontologia.json"
     LOG_FILE:      str = "data/app.log"
 
     # ── Gemini / Vision ──────────────────────────────────────────────────────
     GEMINI_MODEL:       str   = "gemini-2.0-flash-001"
     DEFAULT_CONFIDENCE: float = 0.5
     MAX_INGREDIENTS:    int   = 20
+    MAX_INGREDIENT_CHARS: int = 60   # longitud máxima de un ingrediente en una consulta
+
+    # Admisión de análisis de fotos (token bucket: fichas/s y ráfaga)
+    ADMISSION_SESSION_RATE:  float = 0.2    # una foto cada 5 s por sesión...
+    ADMISSION_SESSION_BURST: int   = 3      # ...con hasta 3 seguidas
+    ADMISSION_GLOBAL_RATE: float = field(
+        default_factory=lambda: float(os.environ.get("VISION_QPS", "2"))
+    )
+    ADMISSION_GLOBAL_BURST:  int   = 10
+    # Con más análisis esperando que esto en la cola de visión se rechazan los nuevos
+    VISION_SHED_QUEUE: int = field(
+        default_factory=lambda: int(os.environ.get("VISION_SHED_QUEUE", "24"))
+    )
 
     # ── Recomendaciones ──────────────────────────────────────────────────────
     DEFAULT_N_RECIPES: int = 5
     MAX_N_RECIPES:     int = 10
 
+    # Cursores de resultados para "ver más" (búsquedas vivas y su caducidad)
+    CURSOR_CACHE_SIZE: int   = 256
+    CURSOR_TTL_S:      float = 900
+
+    # Caché de consultas repetidas (mismo conjunto de ingredientes, modo y filtros)
+    QUERY_CACHE_SIZE: int   = 1024
+    QUERY_CACHE_TTL_S: float = 600
+    QUERY_CACHE_TOP:   int   = 50    # candidatas guardadas por consulta (5 × MAX_N_RECIPES)
+
+    # Con inventario: penalización si las cantidades no llegan a una ración
+    # (un ingrediente encontrado suma 1000; 500 = medio ingrediente)
+    QTY_SHORTFALL_PENALTY: float = 500.0
+
+    # ── Combinaciones de platos ("qué 2-3 platos gastan mejor la nevera") ───
+    COMBO_MAX_PLATOS:      int   = 3
+    COMBO_MAX_FALTANTES:   int   = 2     # por plato
+    COMBO_POOL:            int   = 60    # candidatas que entran en la búsqueda
+    COMBO_POR_INGREDIENTE: int   = 5     # las mejores de cada ingrediente entran siempre
+    COMBO_W_COBERTURA:     float = 10.0  # por ingrediente de la nevera usado
+    COMBO_W_FALTANTE:      float = 4.0   # por ingrediente a comprar (sin repetir)
+
+    # ── Calentamiento al arrancar ───────────────────────────────────────────
+    # Consultas representativas que se lanzan antes de declarar /readyz listo
+    WARMUP_QUERIES: List[List[str]] = field(default_factory=lambda: [
+        ["huevo", "tomate", "cebolla"],
+        ["pollo", "arroz", "ajo"],
+        ["pasta", "queso", "leche", "mantequilla"],
+    ])
+    # WARMUP_VERTEX=1 abre también el canal con Gemini durante el arranque
+    WARMUP_VERTEX: bool = field(
+        default_factory=lambda: os.environ.get("WARMUP_VERTEX", "0") == "1"
+    )
+
+    # ── Trazas ───────────────────────────────────────────────────────────────
+    # TRACE_EXPORTER: off | console | file (OTLP/JSON, una traza por línea)
+    TRACE_EXPORTER: str = field(
+        default_factory=lambda: os.environ.get("TRACE_EXPORTER", "off")
+    )
+    TRACE_FILE: str = "data/traces.jsonl"
+    # Fracción de peticiones trazadas siempre, más las que superen TRACE_SLOW_MS
+    TRACE_SAMPLE_RATE: float = field(
+        default_factory=lambda: float(os.environ.get("TRACE_SAMPLE_RATE", "0.05"))
+    )
+    TRACE_SLOW_MS: float = field(
+        default_factory=lambda: float(os.environ.get("TRACE_SLOW_MS", "3000"))
+    )
+
+    # ── Profiling ────────────────────────────────────────────────────────────
+    # Fracción de búsquedas perfiladas (0 = apagado). Los .folded van a
+    # DATA_DIR/profiles y solo se guardan los PROFILE_KEEP más recientes.
+    PROFILE_SAMPLE_RATE: float = field(
+        default_factory=lambda: float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    )
+    PROFILE_INTERVAL_MS: float = 5.0   # ~sys.getswitchinterval(); menos solo añade contención del GIL
+    PROFILE_KEEP: int = field(
+        default_factory=lambda: int(os.environ.get("PROFILE_KEEP", "50"))
+    )
+    # PROFILING_ADMIN=1 muestra en Estadísticas el interruptor "perfilar todas
+    # las búsquedas" y el botón "Recargar recetas", y sirve /memoria. La app es
+    # pública: por defecto no hay ninguno.
+    PROFILING_ADMIN: bool = field(
+        default_factory=lambda: os.environ.get("PROFILING_ADMIN", "0") == "1"
+    )
+
+    # ── Colas de eventos de la UI ────────────────────────────────────────────
+    # Cada tipo de evento tiene su propio pool de workers en la cola de Gradio,
+    # así una ráfaga de fotos (Gemini, lento) no bloquea las búsquedas manuales.
+    VISION_CONCURRENCY: int = field(
+        default_factory=lambda: int(os.environ.get("VISION_CONCURRENCY", "8"))
+    )
+    RECOMMEND_CONCURRENCY: int = field(
+        default_factory=lambda: int(os.environ.get("RECOMMEND_CONCURRENCY", "4"))
+    )
+    STORAGE_CONCURRENCY: int = 1   # escrituras al CSV de valoraciones, en serie
+    QUEUE_MAX_SIZE: int = field(
+        default_factory=lambda: int(os.environ.get("QUEUE_MAX_SIZE", "64"))
+    )
+
+    # ── API JSON ─────────────────────────────────────────────────────────────
+    API_MAX_BATCH:   int   = 32   # consultas por petición en /api/v1/recommend/batch
+    # Tamaño máximo de la foto en /api/v1/detect (más grande → 413)
+    API_MAX_IMAGE_BYTES: int = field(
+        default_factory=lambda: int(os.environ.get("API_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+    )
+    API_KEEPALIVE_S: int   = field(
+        default_factory=lambda: int(os.environ.get("API_KEEPALIVE_S", "30"))
+    )
+    # Proxies cuyo X-Forwarded-For se cree (uvicorn forwarded_allow_ips). Detrás
+    # del front end de Cloud Run/Spaces la IP directa es la del proxy y todos los
+    # clientes de la API compartirían bucket de admisión: allí, "*".
+    FORWARDED_ALLOW_IPS: str = field(
+        default_factory=lambda: os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    )
+
+    # ── Recarga del catálogo ─────────────────────────────────────────────────
+    # Segundos entre comprobaciones del JSON de recetas. 0 desactiva la vigilancia
+    # (la recarga manual desde la pestaña de estadísticas sigue disponible).
+    RECIPES_WATCH_INTERVAL: float = field(
+        default_factory=lambda: float(os.environ.get("RECIPES_WATCH_INTERVAL", "0"))
+    )
+    # Ediciones incrementales acumuladas antes de reajustar el TF-IDF completo
+    TFIDF_REFIT_EVERY: int = 500
+
+    # ── Render ───────────────────────────────────────────────────────────────
+    # HTML compacto con clases cortas; los estilos van en una hoja servida aparte.
+    # COMPACT_HTML=0 vuelve a las tarjetas con estilos inline.
+    COMPACT_HTML: bool = field(
+        default_factory=lambda: os.environ.get("COMPACT_HTML", "1") != "0"
+    )
+    # Tarjetas compactas sin pasos: se cargan al desplegar (LAZY_DETAILS=0 lo desactiva)
+    LAZY_DETAILS: bool = field(
+        default_factory=lambda: os.environ.get("LAZY_DETAILS", "1") != "0"
+    )
+
     # ── Modos de operación ───────────────────────────────────────────────────
     # IMPORTANTE: usamos strings literales de color, NO Colors.X,
     # porque el dataclass Colors no está instanciado en este punto.
@@ -0,0 +1,176 @@
+"""
+Control de admisión para las llamadas a Gemini.
+Token bucket por sesión y global, más descarte de carga cuando la cola
+de visión ya va demasiado llena.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """La petición no se admite ahora. `retry_after` en segundos (aprox.)."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+class TokenBucket:
+    """
+    `rate` fichas por segundo hasta `capacity`. No es thread-safe por sí
+    solo: AdmissionController lo usa bajo su lock.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate     = rate
+        self.capacity = capacity
+        self.tokens   = capacity
+        self.updated  = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float, n: float = 1.0) -> bool:
+        self._refill(now)
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+    def give_back(self, n: float = 1.0) -> None:
+        self.tokens = min(self.capacity, self.tokens + n)
+
+    def wait_time(self, n: float = 1.0) -> float:
+        """Segundos hasta tener `n` fichas (tras el último refill)."""
+        return max(0.0, (n - self.tokens) / self.rate) if self.rate > 0 else float("inf")
+
+
+# ============================================================================
+# CONTROLADOR
+# ============================================================================
+
+class AdmissionController:
+    """
+    Decide si una sesión puede lanzar un análisis ahora.
+
+    Orden de comprobación: carga de la cola (`queue_depth`, si se da) →
+    bucket de la sesión → bucket global. Si la sesión pasa pero el global
+    no, se le devuelve la ficha para no penalizarla dos veces.
+
+    Cuando la admisión se decide antes de encolar (UI de Gradio), `grant`
+    deja un vale a la sesión y el handler encolado lo canjea con `redeem`:
+    quien llame al handler sin pasar por la admisión no tiene vale.
+    """
+
+    def __init__(
+        self,
+        session_rate:  float = CONFIG.ADMISSION_SESSION_RATE,
+        session_burst: int   = CONFIG.ADMISSION_SESSION_BURST,
+        global_rate:   float = CONFIG.ADMISSION_GLOBAL_RATE,
+        global_burst:  int   = CONFIG.ADMISSION_GLOBAL_BURST,
+        shed_queue:    int   = CONFIG.VISION_SHED_QUEUE,
+        queue_depth:   Optional[Callable[[], int]] = None,
+        max_sessions:  int   = 10_000,
+    ):
+        self.session_rate  = session_rate
+        self.session_burst = session_burst
+        self.shed_queue    = shed_queue
+        self.queue_depth   = queue_depth
+        self.max_sessions  = max_sessions
+        self._global   = TokenBucket(global_rate, global_burst)
+        self._sessions: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._tickets:  "OrderedDict[str, int]" = OrderedDict()
+        self._lock     = threading.Lock()
+        self.admitted  = 0
+        self.rejected  = {"carga": 0, "sesion": 0, "global": 0}
+
+    def _session_bucket(self, session: str) -> TokenBucket:
+        bucket = self._sessions.get(session)
+        if bucket is None:
+            bucket = TokenBucket(self.session_rate, self.session_burst)
+            self._sessions[session] = bucket
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session)
+        return bucket
+
+    def admit(self, session: str) -> None:
+        """Consume una ficha o lanza AdmissionRejected."""
+        if self.queue_depth is not None and self.shed_queue:
+            depth = self.queue_depth()
+            if depth > self.shed_queue:
+                with self._lock:
+                    self.rejected["carga"] += 1
+                logger.warning(f"Descartando análisis: {depth} en cola de visión")
+                raise AdmissionRejected(
+                    "Hay mucha gente analizando fotos ahora mismo. Prueba en unos segundos "
+                    "o usa la búsqueda manual.",
+                    retry_after=5.0,
+                )
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._session_bucket(session or "anon")
+            if not bucket.try_take(now):
+                self.rejected["sesion"] += 1
+                wait = bucket.wait_time()
+                raise AdmissionRejected(
+                    f"Vas muy rápido: espera {wait:.0f} s antes de analizar otra foto.",
+                    retry_after=wait,
+                )
+            if not self._global.try_take(now):
+                bucket.give_back()
+                self.rejected["global"] += 1
+                wait = self._global.wait_time()
+                raise AdmissionRejected(
+                    "El servicio de visión está al límite. Prueba en unos segundos "
+                    "o usa la búsqueda manual.",
+                    retry_after=wait,
+                )
+            self.admitted += 1
+
+    def grant(self, session: str) -> None:
+        """`admit` y, si pasa, un vale para `redeem`. Lanza AdmissionRejected."""
+        self.admit(session)
+        session = session or "anon"
+        with self._lock:
+            self._tickets[session] = self._tickets.get(session, 0) + 1
+            self._tickets.move_to_end(session)
+            if len(self._tickets) > self.max_sessions:
+                self._tickets.popitem(last=False)
+
+    def redeem(self, session: str) -> bool:
+        """Gasta un vale de `grant`. False si la sesión no tiene ninguno."""
+        session = session or "anon"
+        with self._lock:
+            vales = self._tickets.get(session, 0)
+            if not vales:
+                return False
+            if vales == 1:
+                del self._tickets[session]
+            else:
+                self._tickets[session] = vales - 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "admitidas": self.admitted,
+                "rechazadas": dict(self.rejected),
+                "sesiones": len(self._sessions),
+            }
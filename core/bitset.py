@@ -0,0 +1,62 @@
+"""
+Conjuntos de enteros como bitsets NumPy (bloques uint64).
+
+Un conjunto sobre [0, n_bits) ocupa `n_blocks(n_bits)` palabras; una fila
+por conjunto da una matriz (filas, bloques) sobre la que unión,
+intersección y cardinal son operaciones vectoriales para todas las filas
+a la vez. También hay reducciones por segmento para columnas en formato
+CSR como las del catálogo (`key_indptr`, `base_indptr`).
+"""
+from typing import Sequence
+
+import numpy as np
+
+_UNO = np.uint64(1)
+
+# popcount por byte, para NumPy sin np.bitwise_count (< 2.0)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def n_blocks(n_bits: int) -> int:
+    return max(1, (n_bits + 63) // 64)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """Bits a 1 por fila: (filas, bloques) → (filas,); un vector uint64 → por elemento."""
+    if hasattr(np, "bitwise_count"):
+        cuenta = np.bitwise_count(bits)
+    else:
+        por_byte = _POPCOUNT8[np.ascontiguousarray(bits).view(np.uint8)]
+        cuenta   = por_byte.reshape(bits.shape + (8,)).sum(axis=-1)
+    return cuenta.sum(axis=-1, dtype=np.int64) if bits.ndim == 2 else cuenta.astype(np.int64)
+
+
+def from_sets(rows: Sequence[np.ndarray], n_bits: int) -> np.ndarray:
+    """Una fila de bitset por array de enteros en [0, n_bits)."""
+    out  = np.zeros((len(rows), n_blocks(n_bits)), dtype=np.uint64)
+    lens = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+    if lens.sum():
+        ids = np.concatenate(rows).astype(np.uint64)
+        fil = np.repeat(np.arange(len(rows)), lens)
+        np.bitwise_or.at(out, (fil, (ids >> np.uint64(6)).astype(np.int64)), _UNO << (ids & np.uint64(63)))
+    return out
+
+
+def segment_or(values: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """OR de `values` por segmento [indptr[i], indptr[i+1]); 0 en los vacíos."""
+    return segment_reduce(np.bitwise_or, values, indptr, np.uint64(0))
+
+
+def segment_sum(values: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """Suma de `values` por segmento; 0 en los vacíos."""
+    return segment_reduce(np.add, values.astype(np.int64, copy=False), indptr, 0)
+
+
+def segment_reduce(ufunc, values: np.ndarray, indptr: np.ndarray, neutro) -> np.ndarray:
+    """`ufunc.reduceat` por segmento, con `neutro` en los segmentos vacíos."""
+    # reduceat no admite segmentos vacíos (devuelve el elemento siguiente) ni
+    # un índice igual a la longitud: centinela neutro al final y vacíos a mano
+    con_centinela = np.append(values, values.dtype.type(neutro))
+    out = ufunc.reduceat(con_centinela, indptr[:-1])
+    out[indptr[1:] == indptr[:-1]] = neutro
+    return out
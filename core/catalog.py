@@ -0,0 +1,311 @@
+"""
+Catálogo columnar de recetas.
+Guarda en arrays NumPy solo lo que necesita el scoring; el modelo Recipe
+completo se reconstruye bajo demanda desde un blob JSON comprimido.
+"""
+import zlib
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from core.memory import deep_sizeof
+from models import Recipe
+
+# Recetas materializadas que se mantienen vivas por snapshot (top-n recientes)
+RECIPE_CACHE_SIZE = 256
+
+
+class CatalogRecord(NamedTuple):
+    """Una receta ya preparada para el catálogo (ingredientes normalizados)."""
+    receta_id:    Optional[int]
+    claves_norm:  List[str]
+    claves_item:  List[str]
+    claves_dim:   List[int]     # dimensión de la cantidad (core.units.DIMENSIONES)
+    claves_qty:   List[float]   # cantidad en la unidad base de su dimensión (nan = sin dato)
+    base_norm:    List[str]
+    tiempo_min:   Optional[int]
+    dificultad:   Optional[str]
+    proceso_real: bool
+    blob:         bytes   # JSON del Recipe; el catálogo lo guarda comprimido
+
+
+# ============================================================================
+# TABLAS DE STRINGS
+# ============================================================================
+
+class StringTable:
+    """
+    Strings internados → id entero. Solo crece, así que varios snapshots
+    pueden compartirla: los ids viejos nunca cambian de significado.
+    Los `intern` deben ir serializados (el recommender usa su lock de escritura).
+    """
+
+    __slots__ = ("strings", "ids")
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.ids = {}
+
+    def intern(self, s: str) -> int:
+        i = self.ids.get(s)
+        if i is None:
+            i = len(self.strings)
+            self.strings.append(s)
+            self.ids[s] = i
+        return i
+
+    def get(self, s: str) -> Optional[int]:
+        return self.ids.get(s)
+
+    def __getitem__(self, i: int) -> str:
+        return self.strings[i]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+# ============================================================================
+# VISTA DE FILA
+# ============================================================================
+
+class RecipeRow:
+    """Vista ligera de una receta del catálogo; no copia datos."""
+
+    __slots__ = ("_cat", "pos")
+
+    def __init__(self, catalog: "RecipeCatalog", pos: int):
+        self._cat = catalog
+        self.pos  = pos
+
+    @property
+    def receta_id(self) -> Optional[int]:
+        rid = int(self._cat.ids[self.pos])
+        return None if rid < 0 else rid
+
+    @property
+    def tiempo_min(self) -> Optional[int]:
+        return int(self._cat.tiempo_min[self.pos]) or None
+
+    @property
+    def dificultad(self) -> Optional[str]:
+        return self._cat.dificultades[self._cat.dificultad[self.pos]] or None
+
+    @property
+    def proceso_real(self) -> bool:
+        return bool(self._cat.proceso_real[self.pos])
+
+    @property
+    def claves_norm(self) -> List[int]:
+        c = self._cat
+        return c.key_norm[c.key_indptr[self.pos]:c.key_indptr[self.pos + 1]].tolist()
+
+    @property
+    def claves_item(self) -> List[int]:
+        c = self._cat
+        return c.key_item[c.key_indptr[self.pos]:c.key_indptr[self.pos + 1]].tolist()
+
+    @property
+    def base_norm(self) -> List[int]:
+        c = self._cat
+        return c.base_norm[c.base_indptr[self.pos]:c.base_indptr[self.pos + 1]].tolist()
+
+    @property
+    def n_claves(self) -> int:
+        c = self._cat
+        return int(c.key_indptr[self.pos + 1] - c.key_indptr[self.pos])
+
+    def recipe(self) -> Recipe:
+        return self._cat.recipe(self.pos)
+
+
+# ============================================================================
+# CATÁLOGO
+# ============================================================================
+
+def _offsets(lengths: List[int]) -> np.ndarray:
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    return indptr
+
+
+class RecipeCatalog(Sequence):
+    """
+    Recetas en formato columnar. Inmutable: `splice` devuelve un catálogo
+    nuevo que comparte las tablas de strings con este.
+
+    Columnas por receta: ids, tiempo_min (0 = desconocido), dificultad
+    (código en `dificultades`), proceso_real. Ingredientes en formato CSR:
+    `key_indptr` delimita en `key_norm` (ids normalizados en `ingredients`),
+    `key_item` (texto original en `items`), `key_dim` y `key_qty` (cantidad
+    normalizada, ver core.units); igual para los base, sin cantidades.
+
+    Como Sequence, `catalog[i]` materializa el Recipe completo.
+    """
+
+    def __init__(self, ids, tiempo_min, dificultad, proceso_real,
+                 key_indptr, key_norm, key_item, key_dim, key_qty, base_indptr, base_norm,
+                 blobs, ingredients, items, dificultades):
+        self.ids          = ids
+        self.tiempo_min   = tiempo_min
+        self.dificultad   = dificultad
+        self.proceso_real = proceso_real
+        self.key_indptr   = key_indptr
+        self.key_norm     = key_norm
+        self.key_item     = key_item
+        self.key_dim      = key_dim
+        self.key_qty      = key_qty
+        self.base_indptr  = base_indptr
+        self.base_norm    = base_norm
+        self.blobs: List[bytes] = blobs
+        self.ingredients  = ingredients
+        self.items        = items
+        self.dificultades = dificultades
+        self.recipe = lru_cache(maxsize=RECIPE_CACHE_SIZE)(self._materialize)
+        self._bytes_por_receta: Optional[float] = None   # ver `memory_usage`
+
+    # ── Construcción ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[CatalogRecord],
+        tables: Optional["RecipeCatalog"] = None,
+    ) -> "RecipeCatalog":
+        """Construye un catálogo. Con `tables` reutiliza sus tablas de strings."""
+        if tables is not None:
+            ingredients, items, dificultades = tables.ingredients, tables.items, tables.dificultades
+        else:
+            ingredients, items, dificultades = StringTable(), StringTable(), StringTable()
+            dificultades.intern("")  # código 0 = sin dificultad
+
+        ids, tiempos, difs, reales, blobs = [], [], [], [], []
+        key_len, key_norm, key_item, base_len, base_norm = [], [], [], [], []
+        key_dim, key_qty = [], []
+        for r in records:
+            ids.append(-1 if r.receta_id is None else r.receta_id)
+            tiempos.append(r.tiempo_min or 0)
+            difs.append(dificultades.intern(r.dificultad or ""))
+            reales.append(r.proceso_real)
+            blobs.append(zlib.compress(r.blob))
+            key_len.append(len(r.claves_norm))
+            key_norm.extend(ingredients.intern(s) for s in r.claves_norm)
+            key_item.extend(items.intern(s) for s in r.claves_item)
+            key_dim.extend(r.claves_dim)
+            key_qty.extend(r.claves_qty)
+            base_len.append(len(r.base_norm))
+            base_norm.extend(ingredients.intern(s) for s in r.base_norm)
+
+        return cls(
+            ids=np.array(ids, dtype=np.int64),
+            tiempo_min=np.array(tiempos, dtype=np.int32),
+            dificultad=np.array(difs, dtype=np.uint8),
+            proceso_real=np.array(reales, dtype=bool),
+            key_indptr=_offsets(key_len),
+            key_norm=np.array(key_norm, dtype=np.int32),
+            key_item=np.array(key_item, dtype=np.int32),
+            key_dim=np.array(key_dim, dtype=np.uint8),
+            key_qty=np.array(key_qty, dtype=np.float32),
+            base_indptr=_offsets(base_len),
+            base_norm=np.array(base_norm, dtype=np.int32),
+            blobs=blobs,
+            ingredients=ingredients,
+            items=items,
+            dificultades=dificultades,
+        )
+
+    def splice(self, start: int, stop: int, records: List[CatalogRecord]) -> "RecipeCatalog":
+        """Catálogo nuevo con las filas [start, stop) sustituidas por `records`."""
+        new = RecipeCatalog.from_records(records, tables=self)
+
+        def cat(col, new_col):
+            return np.concatenate([col[:start], new_col, col[stop:]])
+
+        def cat_csr(indptr, cols, new_indptr, new_cols):
+            lo, hi = indptr[start], indptr[stop]
+            head = indptr[:start + 1]
+            tail = indptr[stop + 1:] - hi + head[-1] + new_indptr[-1]
+            merged_ptr = np.concatenate([head, new_indptr[1:] + head[-1], tail])
+            merged = [np.concatenate([c[:lo], nc, c[hi:]]) for c, nc in zip(cols, new_cols)]
+            return merged_ptr, merged
+
+        key_indptr, (key_norm, key_item, key_dim, key_qty) = cat_csr(
+            self.key_indptr, (self.key_norm, self.key_item, self.key_dim, self.key_qty),
+            new.key_indptr, (new.key_norm, new.key_item, new.key_dim, new.key_qty),
+        )
+        base_indptr, (base_norm,) = cat_csr(
+            self.base_indptr, (self.base_norm,), new.base_indptr, (new.base_norm,),
+        )
+        return RecipeCatalog(
+            ids=cat(self.ids, new.ids),
+            tiempo_min=cat(self.tiempo_min, new.tiempo_min),
+            dificultad=cat(self.dificultad, new.dificultad),
+            proceso_real=cat(self.proceso_real, new.proceso_real),
+            key_indptr=key_indptr,
+            key_norm=key_norm,
+            key_item=key_item,
+            key_dim=key_dim,
+            key_qty=key_qty,
+            base_indptr=base_indptr,
+            base_norm=base_norm,
+            blobs=self.blobs[:start] + new.blobs + self.blobs[stop:],
+            ingredients=self.ingredients,
+            items=self.items,
+            dificultades=self.dificultades,
+        )
+
+    # ── Acceso ───────────────────────────────────────────────────────────────
+
+    def _materialize(self, pos: int) -> Recipe:
+        return Recipe.model_validate_json(zlib.decompress(self.blobs[pos]))
+
+    def iter_recipes(self) -> Iterator[Recipe]:
+        """Materializa todas las recetas sin pasar por la caché (reajustes, exportación)."""
+        for blob in self.blobs:
+            yield Recipe.model_validate_json(zlib.decompress(blob))
+
+    def row(self, pos: int) -> RecipeRow:
+        return RecipeRow(self, pos)
+
+    def rows(self) -> Iterator[RecipeRow]:
+        for pos in range(len(self)):
+            yield RecipeRow(self, pos)
+
+    # ── Memoria ──────────────────────────────────────────────────────────────
+
+    def memory_usage(self, seen: Optional[set] = None) -> Dict[str, int]:
+        """
+        Bytes por parte del catálogo. Las tablas de strings se comparten
+        entre snapshots: con el mismo `seen` solo cuentan una vez. Las
+        recetas materializadas son una estimación (entradas de la caché ×
+        tamaño medio de unas cuantas), porque lru_cache no deja ver su contenido.
+        El catálogo es inmutable: la muestra se materializa una sola vez.
+        """
+        seen = set() if seen is None else seen
+        columnas = (self.ids, self.tiempo_min, self.dificultad, self.proceso_real,
+                    self.key_indptr, self.key_norm, self.key_item, self.key_dim, self.key_qty,
+                    self.base_indptr, self.base_norm)
+        en_cache = self.recipe.cache_info().currsize
+        if en_cache and self._bytes_por_receta is None:
+            muestra = range(0, len(self), max(1, len(self) // 8))
+            self._bytes_por_receta = sum(deep_sizeof(self._materialize(i)) for i in muestra) / len(muestra)
+        por_receta = self._bytes_por_receta or 0.0
+        return {
+            "columnas":      sum(deep_sizeof(c, seen) for c in columnas),
+            "blobs":         deep_sizeof(self.blobs, seen),
+            "tablas":        deep_sizeof((self.ingredients, self.items, self.dificultades), seen),
+            "recetas_cache": int(en_cache * por_receta),
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self.recipe(i) for i in range(*pos.indices(len(self)))]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError(pos)
+        return self.recipe(pos)
@@ -0,0 +1,169 @@
+"""
+Búsqueda de combinaciones de platos que aprovechan la nevera.
+
+Cada candidata llega como
+  usos     uint64        bit i = usa el ingrediente i de la nevera (≤ 64)
+  faltan   (bloques,)    bitset de ids de ingredientes que le faltan
+  calidad  float         desempate (p. ej. proceso real)
+
+y una combinación S vale
+
+  w_cobertura · |∪ usos| − w_faltante · |∪ faltan| + Σ calidad
+
+Lo que falta se cuenta como unión: un ingrediente que piden dos platos se
+compra una vez. Una combinación es válida si cada plato usa algo de la
+nevera que no usa ningún otro plato de la combinación (ningún `usos` está
+contenido en la unión de los demás). La regla no depende del orden y es
+hereditaria: si una combinación no es válida, ninguna que la contenga lo
+es, así que un plato que la rompe se poda con todo lo que cuelga de él.
+
+Búsqueda: semilla voraz desde las mejores candidatas y después ramificación
+y poda en profundidad sobre conjuntos de índices crecientes, con las
+candidatas ordenadas por valor individual. La cota de un nodo suma a lo ya
+cubierto las mayores coberturas nuevas posibles de las plazas que quedan
+(y nunca resta faltantes), así que podarla no pierde combinaciones mejores
+que la peor del top. La última plaza se resuelve vectorizada sobre todas
+las candidatas restantes.
+"""
+import heapq
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from core.bitset import popcount
+
+
+class _Top:
+    """Las n mejores combinaciones vistas (min-heap), sin repetir conjuntos."""
+
+    __slots__ = ("n", "heap", "vistas")
+
+    def __init__(self, n: int):
+        self.n      = n
+        self.heap: List[Tuple[float, Tuple[int, ...]]] = []
+        self.vistas = set()
+
+    @property
+    def umbral(self) -> float:
+        return self.heap[0][0] if len(self.heap) == self.n else -np.inf
+
+    def add(self, score: float, combo: Tuple[int, ...]) -> None:
+        combo = tuple(sorted(combo))
+        if combo in self.vistas or score <= self.umbral:
+            return
+        self.vistas.add(combo)
+        if len(self.heap) == self.n:
+            heapq.heapreplace(self.heap, (score, combo))
+        else:
+            heapq.heappush(self.heap, (score, combo))
+
+    def ordenadas(self) -> List[Tuple[float, Tuple[int, ...]]]:
+        return sorted(self.heap, key=lambda x: (-x[0], x[1]))
+
+
+def valida(usos: Sequence[int]) -> bool:
+    """Cada plato usa algo de la nevera que no usa ningún otro."""
+    for i, u in enumerate(usos):
+        otros = 0
+        for j, v in enumerate(usos):
+            if j != i:
+                otros |= int(v)
+        if not int(u) & ~otros:
+            return False
+    return True
+
+
+def buscar(
+    usos: np.ndarray,
+    faltan: np.ndarray,
+    calidad: np.ndarray,
+    k_max: int = 3,
+    n: int = 3,
+    w_cobertura: float = 10.0,
+    w_faltante: float = 4.0,
+    k_min: int = 2,
+    semillas: int = 5,
+) -> List[Tuple[float, Tuple[int, ...]]]:
+    """
+    Las `n` mejores combinaciones válidas de entre `k_min` y `k_max`
+    candidatas, como (puntuación, índices ordenados), de mayor a menor
+    puntuación.
+    """
+    P = len(usos)
+    if P < k_min:
+        return []
+    n_usos   = popcount(usos)
+    n_faltan = popcount(faltan)
+    orden    = np.argsort(-(w_cobertura * n_usos - w_faltante * n_faltan + calidad), kind="stable")
+    usos, faltan, calidad = usos[orden], faltan[orden], calidad[orden]
+    max_cal  = float(calidad.max(initial=0.0))
+    top      = _Top(n)
+
+    # Estado de una combinación: (u, f, q, combo, propios), con u/f las uniones
+    # de usos/faltan, q la suma de calidad y propios[d] los bits que solo usa
+    # el plato combo[d]. Añadir j es válido si usos[j] trae algo nuevo y no
+    # deja a ningún plato sin bits propios.
+
+    def valor(u, f, q) -> float:
+        return w_cobertura * int(popcount(np.array([u]))[0]) - w_faltante * int(popcount(f[None, :])[0]) + q
+
+    def puntuar_todas(desde, u, f, q, propios):
+        """Puntuación de añadir cada candidata [desde, P) al estado; -inf si no es válido."""
+        resto = usos[desde:]
+        ok = (resto & ~u) != 0
+        for p in propios:
+            ok &= (p & ~resto) != 0
+        sc = (w_cobertura * popcount(resto | u)
+              - w_faltante * popcount(faltan[desde:] | f)
+              + q + calidad[desde:])
+        sc[~ok] = -np.inf
+        return sc
+
+    def anadir(j, u, f, q, combo, propios):
+        return (u | usos[j], f | faltan[j], q + float(calidad[j]), combo + (j,),
+                tuple(p & ~usos[j] for p in propios) + (usos[j] & ~u,))
+
+    # ── Semilla voraz: da un umbral alto antes de empezar a podar ────────────
+    for s in range(min(semillas, P)):
+        if not usos[s]:
+            continue
+        u, f, q, combo, propios = usos[s], faltan[s], float(calidad[s]), (s,), (usos[s],)
+        while len(combo) < k_max:
+            sc = puntuar_todas(0, u, f, q, propios)
+            j = int(np.argmax(sc))
+            if sc[j] == -np.inf:
+                break
+            u, f, q, combo, propios = anadir(j, u, f, q, combo, propios)
+            if len(combo) >= k_min:
+                top.add(float(sc[j]), combo)
+
+    # ── Ramificación y poda ──────────────────────────────────────────────────
+    def cota(desde, u, f, q, plazas) -> float:
+        nuevas = popcount(usos[desde:] & ~u)
+        if plazas < len(nuevas):
+            nuevas = np.partition(nuevas, len(nuevas) - plazas)[-plazas:]
+        cubiertos = int(popcount(np.array([u]))[0]) + int(nuevas.sum())
+        return w_cobertura * cubiertos - w_faltante * int(popcount(f[None, :])[0]) + q + plazas * max_cal
+
+    def dfs(desde, u, f, q, combo, propios):
+        if len(combo) >= k_min:
+            top.add(valor(u, f, q), combo)
+        plazas = k_max - len(combo)
+        if plazas == 0 or desde >= P or cota(desde, u, f, q, plazas) <= top.umbral:
+            return
+        sc = puntuar_todas(desde, u, f, q, propios)
+        if plazas == 1:
+            mejores = np.argsort(-sc, kind="stable")[:top.n]
+            for j in mejores:
+                if sc[j] > top.umbral:
+                    top.add(float(sc[j]), combo + (desde + int(j),))
+            return
+        # Las no válidas se podan con todo su subárbol (la regla es hereditaria)
+        for j in np.flatnonzero(sc != -np.inf).tolist():
+            dfs(desde + j + 1, *anadir(desde + j, u, f, q, combo, propios))
+
+    for i in range(P):
+        if usos[i]:
+            dfs(i + 1, usos[i], faltan[i], float(calidad[i]), (i,), (usos[i],))
+
+    return [(sc, tuple(sorted(int(orden[j]) for j in combo))) for sc, combo in top.ordenadas()]
@@ -0,0 +1,94 @@
+"""
+Tamaño en memoria de estructuras Python, NumPy y SciPy.
+
+`deep_sizeof` recorre el grafo de objetos y suma cada objeto una sola vez;
+pasando el mismo `seen` a varias llamadas, lo compartido se cuenta solo en
+la primera (así las cachés no vuelven a contar el catálogo al que apuntan).
+Es una estimación del heap de Python: no incluye la fragmentación del
+allocator ni la memoria de extensiones que no exponen su tamaño.
+"""
+import sys
+import types
+from typing import Any, Optional, Sequence, Set
+
+import numpy as np
+
+# Tipos que no se recorren: comparten vida con el intérprete, no con el dato
+_OPACOS = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+           types.MethodType, types.CodeType)
+
+
+def _sparse_parts(obj):
+    """Arrays de una matriz dispersa de SciPy (CSR/CSC/COO), o None."""
+    for attrs in (("data", "indices", "indptr"), ("data", "row", "col")):
+        if all(isinstance(getattr(obj, a, None), np.ndarray) for a in attrs):
+            return [getattr(obj, a) for a in attrs]
+    return None
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Bytes de `obj` y de todo lo que alcanza, sin repetir objetos ya en `seen`."""
+    seen  = set() if seen is None else seen
+    total = 0
+    pila  = [obj]
+    while pila:
+        o = pila.pop()
+        if id(o) in seen or isinstance(o, _OPACOS):
+            continue
+        seen.add(id(o))
+
+        if isinstance(o, np.ndarray):
+            # getsizeof ya incluye los datos si el array es dueño; si es una vista, se cuenta la base
+            total += sys.getsizeof(o)
+            if o.base is not None:
+                pila.append(o.base)
+            continue
+        partes = _sparse_parts(o)
+        if partes is not None:
+            total += sys.getsizeof(o)
+            pila.extend(partes)
+            continue
+
+        total += sys.getsizeof(o)
+        if isinstance(o, (str, bytes, bytearray, int, float, bool, complex)) or o is None:
+            continue
+        if isinstance(o, dict):
+            pila.extend(o.keys())
+            pila.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            pila.extend(o)
+        else:
+            d = getattr(o, "__dict__", None)
+            if d is not None:
+                pila.append(d)
+            for cls in type(o).__mro__:
+                slots = getattr(cls, "__slots__", ())
+                for slot in (slots,) if isinstance(slots, str) else slots:
+                    if slot not in ("__dict__", "__weakref__") and hasattr(o, slot):
+                        pila.append(getattr(o, slot))
+    return total
+
+
+def sampled_sizeof(values: Sequence[Any], seen: Optional[Set[int]] = None, k: int = 16) -> int:
+    """
+    Estimación de `deep_sizeof(values)` para colecciones grandes y homogéneas
+    (entradas de una caché): número de entradas × tamaño medio de `k` de ellas
+    repartidas por la secuencia. Lo que ya está en `seen` no cuenta; `seen`
+    no se modifica, porque lo que comparten las muestras entre sí se
+    multiplicaría igualmente.
+    """
+    if not values:
+        return 0
+    seen    = set() if seen is None else seen
+    paso    = max(1, len(values) // k)
+    muestra = values[::paso][:k]
+    media   = sum(deep_sizeof(v, set(seen)) for v in muestra) / len(muestra)
+    return int(len(values) * media) + sys.getsizeof(values)
+
+
+def fmt_bytes(n: float) -> str:
+    for unidad in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unidad}" if unidad == "B" else f"{n:.1f} {unidad}"
+        n /= 1024
+    return f"{n:.2f} GiB"
@@ -0,0 +1,188 @@
+"""
+Métricas en formato de exposición de Prometheus, sin dependencias.
+Contadores e histogramas con etiquetas; el registro se sirve en /metrics.
+
+Uso en el camino caliente:
+
+    with stage("recommend"):
+        ...
+
+Cada observación es un bisect y dos sumas bajo un lock: un par de µs.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from core.tracing import span
+
+# Segundos: de 1 ms (recommend con caché) a 10 s (Gemini lento)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+# ============================================================================
+# TIPOS DE MÉTRICA
+# ============================================================================
+
+class Counter:
+    """Contador monótono con etiquetas opcionales."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name   = name
+        self.help   = help
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock  = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram:
+    """Histograma de buckets fijos. Guarda cuentas por bucket y acumula al exportar."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name    = name
+        self.help    = help
+        self.labels  = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}   # key → [cuentas..., +Inf, suma]
+        self._lock   = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(n, "") for n in self.labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[idx] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(n, "") for n in self.labels))
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            acc = 0
+            for bound, n in zip(self.buckets, series):
+                acc += n
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {acc}")
+            acc += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {acc}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(series[-1])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {acc}")
+        return lines
+
+
+# ============================================================================
+# REGISTRO
+# ============================================================================
+
+class Registry:
+    """
+    Métricas propias más colectores: funciones que se llaman al exportar y
+    devuelven (nombre, tipo, ayuda, muestras). Sirven para publicar
+    contadores que ya lleva otro objeto (caché, admisión, colas) sin
+    duplicarlos en el camino caliente.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, fn: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}"]
+            lines += m.render()
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(
+                        f"{name}{_fmt_labels(list(labels), list(labels.values()))} {_fmt_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "eatguai_stage_seconds",
+    "Duración de cada etapa del análisis (imagen, visión, recomendación, render).",
+    labels=("stage",),
+)
+ERRORS = REGISTRY.counter(
+    "eatguai_errors_total",
+    "Errores por etapa.",
+    labels=("stage",),
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Mide el bloque en STAGE_SECONDS{stage=name}; si lanza, cuenta un error.
+    Si hay una traza activa, el bloque es además un span con el mismo nombre.
+    """
+    t0 = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    except BaseException:
+        ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage=name)
@@ -0,0 +1,144 @@
+"""
+Ontología de ingredientes: nombres canónicos, alias e hiperónimos.
+
+Gemini devuelve nombres concretos ("pechuga de pollo", "queso manchego")
+y las recetas usan los genéricos ("pollo", "queso"). La ontología se
+compila al cargar en un dict clave → id canónico, así que resolver un
+ingrediente, de la nevera o de una receta, es una búsqueda en un hash.
+
+Fichero (CONFIG.ONTOLOGY_FILE):
+
+    {"ingredientes": {
+        "queso":          {"alias": ["quesos", "queso rallado"]},
+        "queso manchego": {"alias": ["manchego"], "es_un": "queso"},
+        ...
+    }}
+
+- alias: el mismo ingrediente; casan en los dos sentidos.
+- es_un: hiperónimo. Un "queso manchego" en la nevera sirve para una
+  receta que pide "queso", no al revés.
+
+Lo que no está en el fichero solo se resuelve por una regla: "<parte> de
+X" (pechuga, lata, diente...) es X. Nada de prefijos: un id canónico casa
+en los dos sentidos, y "nuez moscada" no es "nuez" ni "zumo de limón" es
+"limón". Los ingredientes sin resolver siguen por el match flexible del
+recommender.
+"""
+import json
+import logging
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# "<parte> de X" es X: cortes, piezas y envases
+PARTES = frozenset({
+    "pechuga", "muslo", "contramuslo", "ala", "alita", "filete", "lomo", "solomillo",
+    "chuleta", "costilla", "trozo", "taco", "loncha", "rodaja", "diente", "cabeza",
+    "hoja", "rama", "ramita", "manojo", "lata", "bote", "tarro", "brick", "paquete",
+    "bolsa", "tableta", "pieza", "racion", "dado", "taquito",
+})
+RESOLVE_CACHE_SIZE = 8192
+
+
+def clave(texto: str) -> str:
+    """Minúsculas, sin tildes y cada palabra en singular (misma regla que _normalize)."""
+    t = unicodedata.normalize("NFD", texto.lower().strip())
+    t = "".join(c for c in t if unicodedata.category(c) != "Mn")
+    palabras = []
+    for w in t.split():
+        if w.endswith("oes"):
+            w = w[:-2]
+        elif w.endswith("s") and not w.endswith("ss") and len(w) > 2:
+            w = w[:-1]
+        palabras.append(w)
+    return " ".join(palabras)
+
+
+class Ontology:
+    """
+    Ontología compilada. Ids canónicos densos (0..n-1); `closure(id)` es el
+    id con todos sus hiperónimos, precalculado.
+    """
+
+    __slots__ = ("names", "_ids", "_parents", "_closures", "resolve")
+
+    def __init__(self, entradas: Dict[str, dict]):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._parents: List[Optional[int]] = []
+
+        def nodo(nombre: str) -> int:
+            k = clave(nombre)
+            cid = self._ids.get(k)
+            if cid is None:
+                cid = len(self.names)
+                self.names.append(nombre)
+                self._parents.append(None)
+                self._ids[k] = cid
+            return cid
+
+        for nombre, datos in entradas.items():
+            cid = nodo(nombre)
+            if datos.get("es_un"):
+                self._parents[cid] = nodo(datos["es_un"])
+        # Los alias después: un alias nunca pisa a un canónico
+        for nombre, datos in entradas.items():
+            cid = self._ids[clave(nombre)]
+            for alias in datos.get("alias", ()):
+                k = clave(alias)
+                previo = self._ids.setdefault(k, cid)
+                if previo != cid:
+                    logger.warning(f"Ontología: '{alias}' ya es '{self.names[previo]}', se ignora en '{nombre}'")
+
+        self._closures: List[FrozenSet[int]] = [self._cierre(cid) for cid in range(len(self.names))]
+        self.resolve = lru_cache(maxsize=RESOLVE_CACHE_SIZE)(self._resolve)
+
+    def _cierre(self, cid: int) -> FrozenSet[int]:
+        out = [cid]
+        padre = self._parents[cid]
+        while padre is not None and padre not in out:
+            out.append(padre)
+            padre = self._parents[padre]
+        if padre is not None:
+            logger.warning(f"Ontología: ciclo de 'es_un' en '{self.names[cid]}'")
+        return frozenset(out)
+
+    # ── Carga ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, path: str) -> "Ontology":
+        """Compila el fichero; si no existe o no es válido, una ontología vacía."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            onto = cls(data.get("ingredientes", {}))
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Sin ontología de ingredientes ({path}): {e}")
+            return cls({})
+        logger.info(f"Ontología: {len(onto)} ingredientes canónicos, {len(onto._ids)} nombres")
+        return onto
+
+    # ── Consulta ─────────────────────────────────────────────────────────────
+
+    def _resolve(self, texto: str) -> Optional[int]:
+        """Id canónico de un ingrediente, o None si la ontología no lo conoce."""
+        k   = clave(texto)
+        cid = self._ids.get(k)
+        if cid is not None:
+            return cid
+
+        cabeza, sep, resto = k.partition(" de ")
+        if sep and cabeza in PARTES:
+            return self.resolve(resto)
+        return None
+
+    def closure(self, cid: int) -> FrozenSet[int]:
+        return self._closures[cid]
+
+    def name(self, cid: int) -> str:
+        return self.names[cid]
+
+    def __len__(self) -> int:
+        return len(self.names)
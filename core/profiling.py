@@ -0,0 +1,149 @@
+"""
+Profiler de muestreo para peticiones en vivo.
+Un hilo aparte lee la pila del hilo de la petición cada
+CONFIG.PROFILE_INTERVAL_MS y acumula pilas colapsadas; al terminar escribe
+un .folded en CONFIG.DATA_DIR/profiles listo para flamegraph.pl o
+speedscope. La primera "frame" de cada pila es la etiqueta de la petición
+(handler, modo, nº de ingredientes), así varios ficheros se pueden
+concatenar y seguir separados en el flamegraph.
+
+Se activa con PROFILE_SAMPLE_RATE (fracción de peticiones) o, con
+PROFILING_ADMIN=1, desde la pestaña de estadísticas. Se guardan los
+CONFIG.PROFILE_KEEP perfiles más recientes; los anteriores se borran. El hilo muestreador necesita el GIL: en código
+Python puro la resolución real ronda sys.getswitchinterval() (5 ms), y
+bajar el intervalo por debajo solo frena la petición perfilada.
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
+
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(CONFIG.DATA_DIR, "profiles")
+
+_sample_rate = CONFIG.PROFILE_SAMPLE_RATE
+
+
+def set_sample_rate(rate: float) -> None:
+    """Cambia en caliente la fracción de peticiones perfiladas (0 desactiva)."""
+    global _sample_rate
+    _sample_rate = max(0.0, min(1.0, rate))
+    logger.info(f"Profiling: muestreando {_sample_rate:.0%} de las peticiones")
+
+
+def sample_rate() -> float:
+    return _sample_rate
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Sampler(threading.Thread):
+    """Muestrea la pila de un hilo hasta que se le pide parar."""
+
+    def __init__(self, target_id: int, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.target_id = target_id
+        self.interval  = interval
+        self.stacks: Counter = Counter()
+        self._stop_evt = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_evt.wait(self.interval):
+            frame = sys._current_frames().get(self.target_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+    def stop(self) -> Counter:
+        self._stop_evt.set()
+        self.join()
+        return self.stacks
+
+
+def _tag(label: str, tags: dict) -> str:
+    extra = ",".join(f"{k}={v}" for k, v in tags.items())
+    return f"{label}[{extra}]" if extra else label
+
+
+def write_folded(stacks: Counter, label: str, tags: dict, elapsed_ms: float) -> Optional[str]:
+    """Escribe las pilas colapsadas y devuelve la ruta (None si no hubo muestras)."""
+    if not stacks:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    sufijo = "_".join(f"{k}-{v}" for k, v in tags.items())
+    nombre = f"{time.strftime('%Y%m%d-%H%M%S')}_{label}_{sufijo}_{elapsed_ms:.0f}ms.folded"
+    path   = os.path.join(PROFILE_DIR, nombre.replace("/", "-"))
+    raiz   = _tag(label, tags)
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, n in stacks.most_common():
+            f.write(f"{raiz};{stack} {n}\n")
+    _prune(CONFIG.PROFILE_KEEP)
+    return path
+
+
+def _prune(keep: int) -> None:
+    """Borra los .folded más antiguos hasta dejar `keep`."""
+    for path in _folded()[keep:]:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"No se pudo borrar el perfil {path}: {e}")
+
+
+def _folded() -> List[str]:
+    """Rutas de los .folded, más reciente primero (el nombre solo tiene segundos: por mtime)."""
+    try:
+        with os.scandir(PROFILE_DIR) as it:
+            perfiles = [(e.stat().st_mtime_ns, e.name, e.path) for e in it if e.name.endswith(".folded")]
+    except FileNotFoundError:
+        return []
+    return [path for _, _, path in sorted(perfiles, reverse=True)]
+
+
+@contextmanager
+def profiled(label: str, **tags):
+    """
+    Perfila el bloque con probabilidad `sample_rate()`. Las etiquetas
+    (modo, ingredientes...) acaban en la raíz de cada pila y en el nombre.
+    """
+    if _sample_rate <= 0 or random.random() >= _sample_rate:
+        yield
+        return
+
+    sampler = _Sampler(threading.get_ident(), CONFIG.PROFILE_INTERVAL_MS / 1000)
+    t0 = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        stacks  = sampler.stop()
+        elapsed = (time.perf_counter() - t0) * 1000
+        try:
+            path = write_folded(stacks, label, tags, elapsed)
+            if path:
+                logger.info(f"Perfil guardado: {path} ({sum(stacks.values())} muestras)")
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el perfil: {e}")
+
+
+def recent_profiles(limit: int = 10) -> List[str]:
+    """Rutas de los últimos perfiles escritos, más reciente primero."""
+    return _folded()[:limit]
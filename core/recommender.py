@@ -3,23 +3,50 @@ Sistema de recomendación de recetas.
 """
 import json
 import logging
+import os
+import threading
 import unicodedata
+import uuid
+from dataclasses import dataclass
 from difflib import SequenceMatcher
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Iterable, NamedTuple, Tuple, Optional, Sequence
 
+import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
 from config import CONFIG
-from models import Recipe, RecipeIngredient, Recommendation
+from core import bitset, combos
+from core.cache import TTLCache
+from core.catalog import CatalogRecord, RecipeCatalog
+from core.memory import deep_sizeof, sampled_sizeof
+from core.ontology import Ontology
+from core.tracing import current_span, span
+from core.units import DIMENSIONES, SIN_DIMENSION, normalizar
+from models import MealCombination, Recipe, RecipeIngredient, Recommendation
 
 logger = logging.getLogger(__name__)
 
 
+# ingrediente → (cantidad, unidad), p. ej. {"leche": (1, "l"), "huevo": (6, "ud")}
+Inventario = Dict[str, Tuple[float, Optional[str]]]
+
+
 class RecommenderError(Exception):
     pass
 
 
+class QueryTooLargeError(RecommenderError):
+    """La consulta supera los límites de CONFIG (nº de ingredientes o longitud)."""
+    pass
+
+
+class CursorExpiredError(RecommenderError):
+    """El query_id no existe o su cursor ya se expulsó de la caché."""
+    pass
+
+
 # ============================================================================
 # NORMALIZACIÓN
 # ============================================================================
@@ -120,6 +147,171 @@ def _tiene_proceso_real(proceso_detallado: List[str]) -> bool:
     return not any(m in texto for m in MARCADORES_GENERICOS)
 
 
+# ============================================================================
+# RESULTADO INTERNO
+# ============================================================================
+
+@dataclass(slots=True)
+class ScoredRecipe:
+    """
+    Candidata durante el scoring. Sin validación ni Recipe materializado:
+    se convierte a `Recommendation` solo para las que se devuelven. Los
+    textos de coincidencias y faltantes salen de `estado` (compartido por
+    todas las candidatas de la consulta) también solo entonces.
+    """
+    pos:              int          # fila en el catálogo del snapshot
+    score_total:      float
+    porcentaje_match: float
+    n_faltantes:      int
+    estado:           np.ndarray   # por id de la tabla de ingredientes: _FOUND/_SUSTITUIBLE/_MISSING
+    raciones:         Optional[int] = None  # solo con inventario; None = sin cantidades comparables
+    _partes:          Optional[Tuple[List[str], List[int]]] = None  # una vez: las cachés reutilizan la candidata
+
+    def partes(self, catalog: RecipeCatalog) -> Tuple[List[str], List[int]]:
+        """(textos encontrados, posiciones faltantes en ingredientes_clave)."""
+        if self._partes is None:
+            lo, hi = catalog.key_indptr[self.pos], catalog.key_indptr[self.pos + 1]
+            found, missing = [], []
+            for j, (status, item_id) in enumerate(zip(self.estado[catalog.key_norm[lo:hi]].tolist(),
+                                                      catalog.key_item[lo:hi].tolist())):
+                if status == RecipeRecommender._FOUND:
+                    found.append(catalog.items[item_id])
+                elif status == RecipeRecommender._SUSTITUIBLE:
+                    found.append(f"{catalog.items[item_id]} (sustituible)")
+                else:
+                    missing.append(j)
+            self._partes = (found, missing)
+        return self._partes
+
+    def to_recommendation(self, catalog: RecipeCatalog) -> Recommendation:
+        recipe = catalog.recipe(self.pos)
+        found, missing = self.partes(catalog)
+        return Recommendation(
+            receta=recipe,
+            porcentaje_match=self.porcentaje_match,
+            coincidencias=found,
+            ingredientes_faltantes=[recipe.ingredientes_clave[j] for j in missing],
+            score_total=self.score_total,
+            raciones_posibles=self.raciones,
+        )
+
+
+class ResultPage(NamedTuple):
+    """Una página de resultados servida desde un cursor."""
+    query_id: str
+    items:    List[Recommendation]
+    offset:   int
+    total:    int
+
+    @property
+    def has_more(self) -> bool:
+        return self.offset + len(self.items) < self.total
+
+
+# ============================================================================
+# SNAPSHOT DEL CATÁLOGO
+# ============================================================================
+
+class _CatalogIndex:
+    """
+    Snapshot inmutable del catálogo: recetas + vectorizador + matriz TF-IDF
+    + ontología. Nunca se modifica: recargar significa construir uno nuevo
+    y sustituir la referencia, así que una llamada en curso termina con el
+    que leyó.
+
+    `canon_of[i]` es el id canónico del ingrediente i de la tabla del
+    catálogo (-1 si la ontología no lo conoce). La tabla solo crece, así
+    que un snapshot editado reutiliza la lista del anterior y resuelve solo
+    los ingredientes nuevos. `n_ingredientes` es el tamaño de la tabla que
+    cubre este snapshot: los arrays por ingrediente de una consulta se
+    dimensionan con él, no con la tabla, que otro hilo puede estar ampliando.
+
+    Las ediciones incrementales pasan `positions` y `key_ids` ya derivados
+    del snapshot anterior para no recalcularlos sobre todo el catálogo.
+    `key_ids` puede entonces incluir ingredientes que ya no usa ninguna
+    receta: no cambian ningún conteo y desaparecen en el siguiente reajuste.
+    """
+
+    __slots__ = ("catalog", "vectorizer", "tfidf_matrix", "source_stamp", "positions",
+                 "ontology", "canon_of", "canon_arr", "n_ingredientes", "key_ids", "n_claves")
+
+    def __init__(self, catalog: RecipeCatalog, vectorizer, tfidf_matrix, source_stamp=None,
+                 ontology: Optional[Ontology] = None, previous: Optional["_CatalogIndex"] = None,
+                 positions: Optional[Dict[int, int]] = None, key_ids: Optional[np.ndarray] = None):
+        self.catalog      = catalog
+        self.vectorizer   = vectorizer
+        self.tfidf_matrix = tfidf_matrix
+        self.source_stamp = source_stamp
+        if positions is None:
+            positions = {rid: i for i, rid in enumerate(catalog.ids.tolist()) if rid >= 0}
+        self.positions    = positions
+        self.ontology     = ontology if ontology is not None else Ontology({})
+
+        tabla = catalog.ingredients
+        canon = list(previous.canon_of) if previous is not None and previous.ontology is self.ontology else []
+        for i in range(len(canon), len(tabla)):
+            cid = self.ontology.resolve(tabla[i])
+            canon.append(-1 if cid is None else cid)
+        self.canon_of  = canon
+        self.canon_arr = np.array(canon, dtype=np.int32)  # el mismo, para operaciones vectoriales
+        self.n_ingredientes = len(canon)
+
+        # Ingredientes clave distintos
+        self.key_ids  = np.unique(catalog.key_norm) if key_ids is None else key_ids
+        self.n_claves = np.diff(catalog.key_indptr)
+
+
+class _Ranking(NamedTuple):
+    """
+    Resultado de `_ranked`: las primeras CONFIG.QUERY_CACHE_TOP candidatas,
+    cuántas había en total y los argumentos de `_rank` para recalcular la
+    lista completa si alguien pagina más allá de la ventana.
+    """
+    items: List[ScoredRecipe]
+    total: int
+    args:  tuple   # (ingredients, modo, filtros, inventario)
+
+    @property
+    def completo(self) -> bool:
+        return len(self.items) == self.total
+
+
+class _Fridge(NamedTuple):
+    """Nevera de una consulta, resuelta una vez contra el snapshot."""
+    norms:    set        # nombres normalizados
+    ids:      set        # ids de la tabla de ingredientes del catálogo
+    canon:    set        # ids canónicos de la nevera y sus hiperónimos
+    sueltos:  set        # normalizados que la ontología no conoce
+    canon_of: List[int]  # el de `_CatalogIndex`
+
+
+def _splice_rows(m: sp.csr_matrix, start: int, stop: int, rows: Optional[sp.csr_matrix]) -> sp.csr_matrix:
+    """
+    Matriz CSR con las filas [start, stop) de `m` sustituidas por `rows`
+    (None = ninguna). Un solo np.concatenate por array, sin trocear `m`.
+    """
+    if rows is None:
+        rows = sp.csr_matrix((0, m.shape[1]), dtype=m.dtype)
+    lo, hi = m.indptr[start], m.indptr[stop]
+    indptr = np.concatenate([m.indptr[:start + 1], rows.indptr[1:] + lo,
+                             m.indptr[stop + 1:] - hi + lo + rows.nnz])
+    return sp.csr_matrix(
+        (np.concatenate([m.data[:lo], rows.data, m.data[hi:]]),
+         np.concatenate([m.indices[:lo], rows.indices, m.indices[hi:]]),
+         indptr),
+        shape=(m.shape[0] - (stop - start) + rows.shape[0], m.shape[1]),
+    )
+
+
+def _file_stamp(path: str) -> Optional[Tuple[float, int]]:
+    """(mtime, tamaño) del fichero, o None si no existe."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
+
+
 # ============================================================================
 # CLASE PRINCIPAL
 # ============================================================================
@@ -128,22 +320,61 @@ class RecipeRecommender:
 
     def __init__(self, recipes_path: str = None):
         self.recipes_path = recipes_path or CONFIG.RECIPES_FILE
-        self.recipes: List[Recipe] = []
-        self.vectorizer = None
-        self.tfidf_matrix = None
+        self._write_lock  = threading.Lock()
+        self._watch_stop  = None
+        self._edits_since_fit = 0
+        self._refit_running   = False
+        # query_id → (snapshot, _Ranking); ver `page`
+        self._cursors = TTLCache(CONFIG.CURSOR_CACHE_SIZE, CONFIG.CURSOR_TTL_S)
+        # clave de consulta → (snapshot, _Ranking); ver `_ranked`
+        self._results = TTLCache(CONFIG.QUERY_CACHE_SIZE, CONFIG.QUERY_CACHE_TTL_S)
 
-        self._load_recipes()
-        self._init_vectorizer()
+        self._index = self._build_index()
         logger.info(f"Recommender listo con {len(self.recipes)} recetas")
 
+    # ── Snapshot activo ──────────────────────────────────────────────────────
+
+    @property
+    def catalog(self) -> RecipeCatalog:
+        return self._index.catalog
+
+    @property
+    def recipes(self) -> Sequence[Recipe]:
+        """Vista de solo lectura; cada acceso materializa el Recipe completo."""
+        return self._index.catalog
+
+    @property
+    def vectorizer(self):
+        return self._index.vectorizer
+
+    @property
+    def tfidf_matrix(self):
+        return self._index.tfidf_matrix
+
+    def get_recipe(self, receta_id: int) -> Optional[Recipe]:
+        """Receta completa por id en el snapshot actual, o None."""
+        index = self._index
+        pos = index.positions.get(receta_id)
+        return None if pos is None else index.catalog.recipe(pos)
+
+    def _build_index(self) -> _CatalogIndex:
+        # Los Recipe completos solo viven durante la construcción; el
+        # snapshot guarda el catálogo columnar y los blobs JSON.
+        stamp   = _file_stamp(self.recipes_path)
+        recipes = self._load_recipes()
+        catalog = RecipeCatalog.from_records(self._record(r) for r in recipes)
+        vectorizer, matrix = self._init_vectorizer(recipes)
+        ontology = Ontology.load(CONFIG.ONTOLOGY_FILE)
+        return _CatalogIndex(catalog, vectorizer, matrix, stamp, ontology)
+
     # ── Carga ────────────────────────────────────────────────────────────────
 
-    def _load_recipes(self):
+    def _load_recipes(self) -> List[Recipe]:
         try:
             with open(self.recipes_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
             raw_list = data if isinstance(data, list) else data.get("recetas", [])
-            self.recipes = [self._adapt_recipe(r) for r in raw_list]
+            return [self._adapt_recipe(r) for r in raw_list]
         except Exception as e:
             logger.error(f"Error cargando recetas: {e}")
             raise RecommenderError(f"No se pudieron cargar recetas: {e}")
@@ -177,25 +408,236 @@ class RecipeRecommender:
             proceso_real=_tiene_proceso_real(proceso_det),
         )
 
+    @staticmethod
+    def _record(r: Recipe) -> CatalogRecord:
+        cantidades = [normalizar(i.quantity, i.unit) for i in r.ingredientes_clave]
+        return CatalogRecord(
+            receta_id=r.receta_id,
+            claves_norm=[_normalize(i.item) for i in r.ingredientes_clave],
+            claves_item=[i.item for i in r.ingredientes_clave],
+            claves_dim=[dim for dim, _ in cantidades],
+            claves_qty=[qty for _, qty in cantidades],
+            base_norm=[_normalize(b) for b in r.ingredientes_base],
+            tiempo_min=r.tiempo_min,
+            dificultad=r.dificultad,
+            proceso_real=r.proceso_real,
+            blob=r.model_dump_json(by_alias=True, exclude_defaults=True).encode("utf-8"),
+        )
+
     # ── TF-IDF ───────────────────────────────────────────────────────────────
 
-    def _init_vectorizer(self):
-        corpus = []
-        for r in self.recipes:
-            claves = " ".join(_normalize(i.item) for i in r.ingredientes_clave)
-            nombre = _normalize(r.nombre)
-            tags   = " ".join(r.tags).lower()
-            base   = " ".join(r.ingredientes_base).lower()
-            corpus.append(f"{nombre} {claves} {tags} {base}")
+    @staticmethod
+    def _document(r: Recipe) -> str:
+        claves = " ".join(_normalize(i.item) for i in r.ingredientes_clave)
+        nombre = _normalize(r.nombre)
+        tags   = " ".join(r.tags).lower()
+        base   = " ".join(r.ingredientes_base).lower()
+        return f"{nombre} {claves} {tags} {base}"
+
+    def _init_vectorizer(self, recipes: Iterable[Recipe]):
+        vectorizer = TfidfVectorizer()
+        return vectorizer, vectorizer.fit_transform([self._document(r) for r in recipes])
+
+    # ── Recarga en caliente ──────────────────────────────────────────────────
+
+    def reload(self) -> bool:
+        """
+        Reconstruye el índice desde disco y lo sustituye de forma atómica.
+        Las llamadas a `recommend` ya en curso terminan con el snapshot
+        anterior; las nuevas ven el catálogo nuevo. Si la carga falla se
+        conserva el índice actual y devuelve False.
+        """
+        try:
+            index = self._build_index()
+        except RecommenderError as e:
+            logger.error(f"Recarga cancelada, se mantiene el catálogo actual: {e}")
+            return False
+
+        with self._write_lock:
+            self._index = index
+            self._edits_since_fit = 0
+            self._results.clear()
+        logger.info(f"Catálogo recargado: {len(index.catalog)} recetas")
+        return True
+
+    def reload_async(self) -> threading.Thread:
+        """Lanza `reload` en un hilo de fondo y devuelve el hilo."""
+        thread = threading.Thread(target=self.reload, name="recipes-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def start_watching(self, interval: float = None) -> None:
+        """
+        Vigila el JSON de recetas (mtime + tamaño) y recarga en segundo
+        plano cuando cambia. Idempotente: una segunda llamada no hace nada.
+        """
+        interval = interval or CONFIG.RECIPES_WATCH_INTERVAL
+        if self._watch_stop is not None or interval <= 0:
+            return
+
+        stop = threading.Event()
+        self._watch_stop = stop
+
+        def _watch():
+            seen = self._index.source_stamp
+            while not stop.wait(interval):
+                stamp = _file_stamp(self.recipes_path)
+                # `seen` evita reintentar en bucle un fichero a medio escribir o roto
+                if stamp is not None and stamp != seen:
+                    seen = stamp
+                    logger.info(f"Cambio detectado en {self.recipes_path}, recargando")
+                    self.reload()
+
+        threading.Thread(target=_watch, name="recipes-watch", daemon=True).start()
+        logger.info(f"Vigilando {self.recipes_path} cada {interval}s")
+
+    def stop_watching(self) -> None:
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    # ── Edición incremental ──────────────────────────────────────────────────
+    #
+    # Cada edición crea un snapshot nuevo (copy-on-write) reutilizando el
+    # vectorizador ya ajustado: solo se transforma la fila de la receta
+    # tocada. Los términos nuevos y el IDF no se actualizan hasta el
+    # siguiente reajuste completo, que se lanza en segundo plano cada
+    # CONFIG.TFIDF_REFIT_EVERY ediciones. Las ediciones viven en memoria:
+    # una recarga desde disco las descarta.
+    #
+    # Lo que se hace en Python es proporcional a la edición (posiciones y
+    # claves se derivan del snapshot anterior; al quitar, solo se renumeran
+    # las recetas posteriores). Las columnas y la matriz se copian enteras
+    # con np.concatenate: ~15 ms por edición con 100k recetas sintéticas.
+
+    def add_recipe(self, raw: Dict) -> Recipe:
+        """Añade una receta (dict con el esquema del JSON). Asigna id si falta."""
+        with self._write_lock:
+            index = self._index
+            raw = dict(raw)
+            if raw.get("receta_id") is None:
+                raw["receta_id"] = int(index.catalog.ids.max(initial=0)) + 1
+            if raw["receta_id"] in index.positions:
+                raise RecommenderError(f"Ya existe la receta {raw['receta_id']}")
+
+            recipe = self._adapt_recipe(raw)
+            record = self._record(recipe)
+            row    = index.vectorizer.transform([self._document(recipe)])
+            end    = len(index.catalog)
+            catalog = index.catalog.splice(end, end, [record])
+            positions = dict(index.positions)
+            positions[recipe.receta_id] = end
+            self._commit_edit(_CatalogIndex(
+                catalog,
+                index.vectorizer,
+                _splice_rows(index.tfidf_matrix, end, end, row),
+                index.source_stamp,
+                index.ontology,
+                index,
+                positions=positions,
+                key_ids=self._key_ids_with(index, catalog, record),
+            ))
+        logger.info(f"Receta añadida: {recipe.receta_id} ({recipe.nombre})")
+        return recipe
 
-        self.vectorizer = TfidfVectorizer()
-        self.tfidf_matrix = self.vectorizer.fit_transform(corpus)
+    def update_recipe(self, receta_id: int, raw: Dict) -> Recipe:
+        """Sustituye una receta existente conservando su posición."""
+        with self._write_lock:
+            index = self._index
+            pos = index.positions.get(receta_id)
+            if pos is None:
+                raise RecommenderError(f"No existe la receta {receta_id}")
+
+            recipe = self._adapt_recipe({**raw, "receta_id": receta_id})
+            record = self._record(recipe)
+            row    = index.vectorizer.transform([self._document(recipe)])
+            catalog = index.catalog.splice(pos, pos + 1, [record])
+            self._commit_edit(_CatalogIndex(
+                catalog,
+                index.vectorizer,
+                _splice_rows(index.tfidf_matrix, pos, pos + 1, row),
+                index.source_stamp,
+                index.ontology,
+                index,
+                positions=index.positions,   # mismo id en la misma posición
+                key_ids=self._key_ids_with(index, catalog, record),
+            ))
+        logger.info(f"Receta actualizada: {receta_id}")
+        return recipe
+
+    def remove_recipe(self, receta_id: int) -> None:
+        with self._write_lock:
+            index = self._index
+            pos = index.positions.get(receta_id)
+            if pos is None:
+                raise RecommenderError(f"No existe la receta {receta_id}")
+
+            catalog   = index.catalog.splice(pos, pos + 1, [])
+            positions = dict(index.positions)
+            del positions[receta_id]
+            siguientes = catalog.ids[pos:].tolist()
+            positions.update((rid, p) for p, rid in enumerate(siguientes, start=pos) if rid >= 0)
+            self._commit_edit(_CatalogIndex(
+                catalog,
+                index.vectorizer,
+                _splice_rows(index.tfidf_matrix, pos, pos + 1, None),
+                index.source_stamp,
+                index.ontology,
+                index,
+                positions=positions,
+                key_ids=index.key_ids,
+            ))
+        logger.info(f"Receta eliminada: {receta_id}")
+
+    @staticmethod
+    def _key_ids_with(index: _CatalogIndex, catalog: RecipeCatalog, record: CatalogRecord) -> np.ndarray:
+        """`key_ids` del snapshot anterior más los ingredientes clave de `record`."""
+        nuevos = [catalog.ingredients.get(n) for n in record.claves_norm]
+        return np.union1d(index.key_ids, np.array(nuevos, dtype=index.key_ids.dtype))
+
+    def _commit_edit(self, index: _CatalogIndex) -> None:
+        """Publica un snapshot editado. Llamar con `_write_lock` adquirido."""
+        self._index = index
+        self._results.clear()
+        self._edits_since_fit += 1
+        if self._edits_since_fit >= CONFIG.TFIDF_REFIT_EVERY and not self._refit_running:
+            self._refit_running = True
+            threading.Thread(target=self.refit, name="tfidf-refit", daemon=True).start()
+
+    def refit(self) -> None:
+        """
+        Reajusta el TF-IDF sobre el catálogo en memoria para corregir la
+        deriva del IDF. El ajuste corre fuera del lock; si mientras tanto
+        entra otra edición se repite sobre el snapshot nuevo.
+        """
+        try:
+            while True:
+                base = self._index
+                vectorizer, matrix = self._init_vectorizer(base.catalog.iter_recipes())
+                with self._write_lock:
+                    if self._index is base:
+                        self._index = _CatalogIndex(
+                            base.catalog, vectorizer, matrix, base.source_stamp, base.ontology, base,
+                            positions=base.positions,
+                        )
+                        self._edits_since_fit = 0
+                        self._results.clear()
+                        break
+            logger.info(f"TF-IDF reajustado sobre {len(base.catalog)} recetas")
+        finally:
+            self._refit_running = False
 
     # ── Match ────────────────────────────────────────────────────────────────
 
+    # Estado de un ingrediente de receta frente a la nevera
+    _MISSING, _FOUND, _SUSTITUIBLE = 0, 1, 2
+
     def _ingredient_match(self, needed: str, available_set: set) -> bool:
         """Match flexible: exacto → contenido → fuzzy."""
-        needed_norm = _normalize(needed)
+        return self._match_norm(_normalize(needed), available_set)
+
+    @staticmethod
+    def _match_norm(needed_norm: str, available_set: set) -> bool:
         if needed_norm in available_set:
             return True
         for avail in available_set:
@@ -205,53 +647,313 @@ class RecipeRecommender:
                 return True
         return False
 
-    def _calculate_match(
-        self,
-        recipe: Recipe,
-        available_set: set,
-    ) -> Tuple[List[str], List[RecipeIngredient]]:
-        found, missing = [], []
-        for ing in recipe.ingredientes_clave:
-            if self._ingredient_match(ing.item, available_set):
-                found.append(ing.item)
-            elif _has_sustitucion(ing.item, available_set):
-                found.append(f"{ing.item} (sustituible)")
+    @staticmethod
+    def _fridge(index: _CatalogIndex, available_set: set) -> _Fridge:
+        """Resuelve la nevera contra la ontología y la tabla de ingredientes del snapshot."""
+        onto = index.ontology
+        canon, sueltos = set(), set()
+        for a in available_set:
+            cid = onto.resolve(a)
+            if cid is None:
+                sueltos.add(a)
             else:
-                missing.append(ing)
-        return found, missing
+                canon |= onto.closure(cid)
+        ids = {index.catalog.ingredients.get(a) for a in available_set} - {None}
+        return _Fridge(available_set, ids, canon, sueltos, index.canon_of)
+
+    def _ingredient_status(self, norm_id: int, norm: str, fridge: _Fridge) -> int:
+        """
+        Un ingrediente que la ontología conoce casa por id canónico (la nevera
+        aporta también sus hiperónimos) y el match flexible solo lo compara con
+        lo que la ontología no conoce: "queso crema" ya no casa con "queso" por
+        contención. Si la ontología no lo conoce, match flexible con toda la nevera.
+        """
+        cid = fridge.canon_of[norm_id]
+        if norm_id in fridge.ids or cid in fridge.canon:
+            return self._FOUND
+        if self._match_norm(norm, fridge.sueltos if cid >= 0 else fridge.norms):
+            return self._FOUND
+        if _has_sustitucion(norm, fridge.norms):
+            return self._SUSTITUIBLE
+        return self._MISSING
 
     # ── Filtros ──────────────────────────────────────────────────────────────
 
     def _apply_filtros(
         self,
-        results: List[Recommendation],
+        results: List[ScoredRecipe],
         filtros: Optional[Dict],
-    ) -> List[Recommendation]:
+        catalog: RecipeCatalog,
+    ) -> List[ScoredRecipe]:
         if not filtros:
             return results
 
         if "max_tiempo" in filtros and filtros["max_tiempo"]:
+            tiempos = catalog.tiempo_min
             results = [
                 r for r in results
-                if (r.receta.tiempo_min or 999) <= filtros["max_tiempo"]
+                if (int(tiempos[r.pos]) or 999) <= filtros["max_tiempo"]
             ]
 
         if "max_faltantes" in filtros and filtros["max_faltantes"] is not None:
             results = [
                 r for r in results
-                if len(r.ingredientes_faltantes) <= filtros["max_faltantes"]
+                if r.n_faltantes <= filtros["max_faltantes"]
             ]
 
         return results
 
     # ── Recomendación principal ──────────────────────────────────────────────
 
+    def _rank(
+        self,
+        index: _CatalogIndex,
+        ingredients: List[str],
+        modo: str,
+        filtros: Optional[Dict],
+        inventario: tuple = (),
+    ) -> List[ScoredRecipe]:
+        """Todas las candidatas del snapshot, ordenadas y filtradas."""
+        catalog       = index.catalog
+        available_set = {_normalize(i) for i in ingredients}
+        with span("recommend.transform"):
+            query_vec = index.vectorizer.transform([" ".join(available_set)])
+        with span("recommend.similarity"):
+            similarities = cosine_similarity(query_vec, index.tfidf_matrix).flatten()
+
+        mode_cfg         = CONFIG.get_mode(modo)
+        max_missing      = mode_cfg["max_missing"]
+        dificultad_bonus = mode_cfg.get("dificultad_bonus", {})
+        fridge           = self._fridge(index, available_set)
+
+        with span("recommend.estados", ingredients=len(index.key_ids)):
+            estado = self._estados(index, fridge)
+        with span("recommend.match_loop", recipes=len(catalog)) as loop_span:
+            results = self._match_loop(index, fridge, estado, similarities,
+                                       modo, max_missing, dificultad_bonus)
+            loop_span.set_attribute("candidates", len(results))
+
+        if inventario:
+            with span("recommend.raciones"):
+                raciones = self._raciones(index, inventario, estado).tolist()
+                for r in results:
+                    posibles = raciones[r.pos]
+                    if posibles != np.inf:
+                        r.raciones = int(posibles)
+                        if posibles < 1:
+                            r.score_total -= CONFIG.QTY_SHORTFALL_PENALTY
+
+        with span("recommend.sort"):
+            results.sort(key=lambda x: x.score_total, reverse=True)
+        with span("recommend.filters"):
+            return self._apply_filtros(results, filtros, catalog)
+
+    def _match_loop(self, index: _CatalogIndex, fridge: _Fridge, estado: np.ndarray, similarities,
+                    modo, max_missing, dificultad_bonus) -> List[ScoredRecipe]:
+        """
+        Puntúa todas las recetas del catálogo a la vez; devuelve las
+        candidatas sin ordenar, por posición.
+        """
+        catalog = index.catalog
+        n_found, n_base = self._conteos(index, fridge, estado)
+        n_claves = index.n_claves
+
+        mask = n_found > 0
+        # Modo survival: máximo 2 faltantes
+        if modo == "survival":
+            mask &= (n_claves - n_found) <= max_missing
+        pos = np.flatnonzero(mask)
+
+        n_found, n_base, total = n_found[pos], n_base[pos], n_claves[pos]
+        match_pct   = n_found / total   # total ≥ n_found > 0
+        score_total = (n_found * 1000) + (n_base * 50) + (match_pct * 100) + similarities[pos]
+
+        # Bonus por calidad: recetas con proceso real se muestran primero
+        score_total += np.where(catalog.proceso_real[pos], 50, 0)
+        # Bonus/penalización por dificultad según modo (código 0 = sin dificultad = "media")
+        bonus = np.array([dificultad_bonus.get(d or "media", 0) for d in catalog.dificultades.strings])
+        score_total += bonus[catalog.dificultad[pos]]
+
+        return [
+            ScoredRecipe(p, sc, pct, nf, estado)
+            for p, sc, pct, nf in zip(pos.tolist(), score_total.tolist(), match_pct.tolist(),
+                                      (total - n_found).tolist())
+        ]
+
+    def _conteos(self, index: _CatalogIndex, fridge: _Fridge,
+                 estado: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Por receta: ingredientes clave encontrados (o sustituibles) e
+        ingredientes base que hay en la nevera, por entrada, como sumas por
+        segmento sobre las columnas CSR del catálogo.
+        """
+        catalog  = index.catalog
+        n        = index.n_ingredientes
+        en_clave = estado[:n] != self._MISSING
+        en_base  = np.zeros(n, dtype=bool)
+        if fridge.canon:
+            en_base |= np.isin(index.canon_arr, list(fridge.canon))
+        en_base[[i for i in fridge.ids if i < n]] = True
+
+        n_found = bitset.segment_sum(en_clave[catalog.key_norm], catalog.key_indptr)
+        n_base  = bitset.segment_sum(en_base[catalog.base_norm], catalog.base_indptr)
+        return n_found, n_base
+
+    # ── Cantidades ───────────────────────────────────────────────────────────
+    #
+    # Con inventario (ingrediente → (cantidad, unidad)) cada receta lleva las
+    # raciones que permiten las cantidades de lo que hay: el mínimo, entre
+    # sus ingredientes clave encontrados, de disponible / necesario en la
+    # misma dimensión (core.units). Lo que falta ya cuenta en faltantes y lo
+    # que no tiene cantidades comparables no limita. Se calcula con arrays
+    # sobre todas las entradas del catálogo, sin bucles por ingrediente.
+
+    @staticmethod
+    def _inventario(inventario: Optional[Inventario]) -> tuple:
+        """((normalizado, dimensión, cantidad base), ...) ordenado y sin duplicados: entra en la clave de caché."""
+        if not inventario:
+            return ()
+        total: Dict[Tuple[str, int], float] = {}
+        for nombre, (cantidad, unidad) in inventario.items():
+            dim, qty = normalizar(cantidad, unidad)
+            if dim != SIN_DIMENSION:
+                k = (_normalize(nombre), dim)
+                total[k] = total.get(k, 0.0) + qty
+        return tuple(sorted((norm, dim, qty) for (norm, dim), qty in total.items()))
+
+    @staticmethod
+    def _raciones(index: _CatalogIndex, inventario: tuple, estado: np.ndarray) -> np.ndarray:
+        """Raciones posibles por receta (floor); inf si ninguna cantidad es comparable."""
+        cat   = index.catalog
+        onto  = index.ontology
+        n_ing = index.n_ingredientes
+
+        # Existencias por (ingrediente de la tabla, dimensión). Un artículo del
+        # inventario abastece a su id exacto y, vía ontología, a todo ingrediente
+        # cuyo canónico esté en su cierre ("pechuga de pollo" abastece a "pollo").
+        stock = np.zeros((n_ing, len(DIMENSIONES)))
+        known = np.zeros((n_ing, len(DIMENSIONES)), dtype=bool)
+        canon = index.canon_arr
+        for norm, dim, qty in inventario:
+            destino = np.zeros(n_ing, dtype=bool)
+            cid = onto.resolve(norm)
+            if cid is not None:
+                destino = np.isin(canon, list(onto.closure(cid)))
+            exacto = cat.ingredients.get(norm)
+            if exacto is not None and exacto < n_ing:
+                destino[exacto] = True
+            stock[destino, dim] += qty
+            known[destino, dim] = True
+
+        ids, dims, need = cat.key_norm, cat.key_dim, cat.key_qty
+        limita = known[ids, dims] & (need > 0) & (estado[ids] == RecipeRecommender._FOUND)
+        ratio  = np.full(len(ids) + 1, np.inf)   # +1: centinela para reduceat
+        ratio[:-1][limita] = stock[ids[limita], dims[limita]] / need[limita]
+
+        raciones = np.minimum.reduceat(ratio, cat.key_indptr[:-1])
+        raciones[np.diff(cat.key_indptr) == 0] = np.inf
+        return np.floor(raciones)
+
+    @staticmethod
+    def _query_key(ingredients: List[str], modo: str, filtros: Optional[Dict], inventario: tuple = ()) -> tuple:
+        # `_rank` solo ve el conjunto normalizado: orden y duplicados no importan.
+        # n tampoco: la ventana cacheada cubre cualquier n <= QUERY_CACHE_TOP.
+        return (
+            frozenset(_normalize(i) for i in ingredients),
+            modo,
+            tuple(sorted(filtros.items())) if filtros else (),
+            inventario,
+        )
+
+    @staticmethod
+    def _check_query(ingredients: List[str]) -> None:
+        if len(ingredients) > CONFIG.MAX_INGREDIENTS:
+            raise QueryTooLargeError(
+                f"Demasiados ingredientes: {len(ingredients)} (máximo {CONFIG.MAX_INGREDIENTS})"
+            )
+        largo = next((i for i in ingredients if len(i) > CONFIG.MAX_INGREDIENT_CHARS), None)
+        if largo is not None:
+            raise QueryTooLargeError(
+                f"Ingrediente demasiado largo ({len(largo)} caracteres, máximo {CONFIG.MAX_INGREDIENT_CHARS})"
+            )
+
+    def _ranked(
+        self,
+        index: _CatalogIndex,
+        ingredients: List[str],
+        modo: str,
+        filtros: Optional[Dict],
+        inventario: Optional[Inventario] = None,
+    ) -> _Ranking:
+        """
+        `_rank` con caché. Las entradas de otro snapshot cuentan como fallo.
+        Los artículos del inventario cuentan como ingredientes disponibles;
+        el límite de tamaño se aplica a cada lista por separado, como en la API.
+        La caché guarda solo las CONFIG.QUERY_CACHE_TOP primeras candidatas:
+        con miles de recetas la lista completa ocupa megas por entrada.
+        """
+        self._check_query(ingredients)
+        if inventario:
+            self._check_query(list(inventario))
+            ingredients = list(ingredients) + [i for i in inventario if i not in ingredients]
+        inventario = self._inventario(inventario)
+        key    = self._query_key(ingredients, modo, filtros, inventario)
+        cached = self._results.get(key)
+        hit    = cached is not None and cached[0] is index
+        current_span().set_attribute("cache.hit", hit)
+        if hit:
+            return cached[1]
+        ranked  = self._rank(index, ingredients, modo, filtros, inventario)
+        ranking = _Ranking(ranked[:CONFIG.QUERY_CACHE_TOP], len(ranked),
+                           (ingredients, modo, filtros, inventario))
+        self._results.set(key, (index, ranking))
+        return ranking
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Aciertos/fallos de la caché de consultas."""
+        return self._results.stats()
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """
+        Bytes que retiene el recommender, por componente: catálogo (columnas,
+        blobs, tablas de strings, recetas materializadas), matriz TF-IDF,
+        vocabulario y resto del vectorizador, índice de posiciones, ontología y cachés.
+        Cada objeto cuenta una vez. Las cachés se estiman con `sampled_sizeof`
+        (entradas × tamaño medio de una muestra) sin contar el snapshot al que
+        apuntan; los snapshots viejos que aún mantengan vivos van aparte.
+        """
+        index = self._index
+        seen  = {id(index), id(index.catalog)}
+        partes = {f"catalogo.{k}": v for k, v in index.catalog.memory_usage(seen).items()}
+        partes["tfidf.matriz"]         = deep_sizeof(index.tfidf_matrix, seen)
+        partes["vectorizador.vocabulario"] = deep_sizeof(getattr(index.vectorizer, "vocabulary_", {}), seen)
+        partes["vectorizador.resto"]   = deep_sizeof(index.vectorizer, seen)
+        partes["indice.posiciones"]    = deep_sizeof(index.positions, seen)
+        partes["indice.claves"]        = deep_sizeof(index.key_ids, seen) + deep_sizeof(index.n_claves, seen)
+        partes["ontologia"]            = deep_sizeof(index.ontology, seen) + deep_sizeof(index.canon_of, seen)
+        consultas = self._results.values()
+        cursores  = self._cursors.values()
+        partes["cache.consultas"]      = sampled_sizeof([r for _, r in consultas], seen)
+        partes["cache.cursores"]       = sampled_sizeof([r for _, r in cursores], seen)
+        viejos = {id(i): i for i, _ in consultas + cursores if i is not index}
+        partes["snapshots.viejos"]     = sum(deep_sizeof(i, seen) for i in viejos.values())
+
+        total = sum(partes.values())
+        n     = len(index.catalog)
+        return {
+            "recetas":    n,
+            "total":      total,
+            "por_receta": total / n if n else 0.0,
+            "componentes": partes,
+        }
+
     def recommend(
         self,
         ingredients: List[str],
         n: int = CONFIG.DEFAULT_N_RECIPES,
         modo: str = "survival",
         filtros: Optional[Dict] = None,
+        inventario: Optional[Inventario] = None,
     ) -> List[Recommendation]:
         """
         Scoring en cascada:
@@ -259,49 +961,199 @@ class RecipeRecommender:
           2. porcentaje de receta cubierta
           3. TF-IDF como desempate
         En modo survival filtra recetas con más de 2 faltantes.
+        Con `inventario` ({ingrediente: (cantidad, unidad)}) cada resultado
+        lleva raciones_posibles, y las recetas para las que no llega ni una
+        ración bajan CONFIG.QTY_SHORTFALL_PENALTY puntos.
+        Solo las n recetas devueltas se convierten a Recommendation.
+        Las consultas repetidas salen de la caché sin transformar ni puntuar.
         """
-        available_set = {_normalize(i) for i in ingredients}
-        query_vec     = self.vectorizer.transform([" ".join(available_set)])
-        similarities  = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
-
-        results = []
-        for idx, recipe in enumerate(self.recipes):
-            found, missing = self._calculate_match(recipe, available_set)
-            n_found = len(found)
-
-            if n_found == 0:
-                continue
-
-            total     = len(recipe.ingredientes_clave)
-            match_pct = n_found / total if total > 0 else 0
-
-            # Modo survival: máximo 2 faltantes
-            if modo == "survival" and len(missing) > CONFIG.get_mode(modo)["max_missing"]:
-                continue
-
-            n_base_found = sum(1 for b in recipe.ingredientes_base if _normalize(b) in available_set)
-            score_total = (n_found * 1000) + (n_base_found * 50) + (match_pct * 100) + float(similarities[idx])
-
-            # Bonus por calidad: recetas con proceso real se muestran primero
-            if recipe.proceso_real:
-                score_total += 50
-            # Bonus/penalización por dificultad según modo
-            dificultad_bonus = CONFIG.get_mode(modo).get("dificultad_bonus", {})
-            score_total += dificultad_bonus.get(recipe.dificultad or "media", 0)
-
-            results.append(Recommendation(
-                receta=recipe,
-                porcentaje_match=match_pct,
-                coincidencias=found,
-                ingredientes_faltantes=missing,
-                score_total=score_total,
+        index   = self._index  # snapshot fijo durante toda la llamada
+        ranking = self._ranked(index, ingredients, modo, filtros, inventario)
+        results = ranking.items[:n]
+        if len(results) < min(n, ranking.total):
+            results = self._rank(index, *ranking.args)[:n]
+
+        logger.info(f"Recomendadas {len(results)} de {ranking.total} candidatas")
+        return [r.to_recommendation(index.catalog) for r in results]
+
+    # ── Paginación ───────────────────────────────────────────────────────────
+    #
+    # `search` puntúa una vez y guarda en un cursor la ventana de `_ranked`;
+    # `page` sirve los tramos que caen dentro sin repetir el scoring. Solo si
+    # se pide más allá de la ventana se recalcula la lista completa, una vez,
+    # y el cursor se queda con ella. El cursor retiene su propio snapshot, así
+    # que una recarga no descuadra páginas.
+
+    def search(
+        self,
+        ingredients: List[str],
+        n: int = CONFIG.DEFAULT_N_RECIPES,
+        modo: str = "survival",
+        filtros: Optional[Dict] = None,
+        inventario: Optional[Inventario] = None,
+    ) -> ResultPage:
+        """Como `recommend`, pero devuelve la primera página y un query_id."""
+        index    = self._index
+        ranking  = self._ranked(index, ingredients, modo, filtros, inventario)
+        query_id = uuid.uuid4().hex
+        self._cursors.set(query_id, (index, ranking))
+        logger.info(f"Cursor {query_id[:8]}: {ranking.total} candidatas")
+        return self.page(query_id, 0, n)
+
+    def page(self, query_id: str, offset: int, n: int = CONFIG.DEFAULT_N_RECIPES) -> ResultPage:
+        """Tramo [offset, offset+n) de un cursor abierto con `search`."""
+        cursor = self._cursors.get(query_id)
+        if cursor is None:
+            raise CursorExpiredError(f"Búsqueda caducada: {query_id}")
+        index, ranking = cursor
+        offset = max(0, offset)
+        if offset + n > len(ranking.items) and not ranking.completo:
+            ranking = ranking._replace(items=self._rank(index, *ranking.args))
+            self._cursors.set(query_id, (index, ranking))
+        items = [r.to_recommendation(index.catalog) for r in ranking.items[offset:offset + n]]
+        return ResultPage(query_id, items, offset, ranking.total)
+
+    # ── Combinaciones de platos ──────────────────────────────────────────────
+    #
+    # `combine` busca 2-3 platos que juntos usen la mayor parte de la nevera
+    # con lo mínimo por comprar (ver core.combos). Por receta se calculan,
+    # con reducciones sobre las columnas CSR del catálogo, la máscara de
+    # ingredientes de la nevera que usa (uint64: la nevera cabe de sobra en
+    # 64 bits) y el bitset de ingredientes que le faltan.
+
+    def _estados(self, index: _CatalogIndex, fridge: _Fridge) -> np.ndarray:
+        """Estado (_FOUND/_SUSTITUIBLE/_MISSING) de cada ingrediente clave de la tabla."""
+        tabla  = index.catalog.ingredients
+        estado = np.full(index.n_ingredientes, self._MISSING, dtype=np.uint8)
+        for i in index.key_ids.tolist():
+            estado[i] = self._ingredient_status(i, tabla[i], fridge)
+        return estado
+
+    def _usos_nevera(self, index: _CatalogIndex, fridge: _Fridge, nevera: List[str],
+                     estado: np.ndarray) -> np.ndarray:
+        """Por id de la tabla, máscara de los ingredientes de `nevera` que lo cubren."""
+        tabla = index.catalog.ingredients
+        onto  = index.ontology
+        mask  = np.zeros(index.n_ingredientes, dtype=np.uint64)
+        canon_bits = np.zeros(len(onto), dtype=np.uint64)
+        for b, norm in enumerate(nevera):
+            bit = np.uint64(1) << np.uint64(b)
+            exacto = tabla.get(norm)
+            if exacto is not None and exacto < len(mask):
+                mask[exacto] |= bit
+            cid = onto.resolve(norm)
+            if cid is not None:
+                canon_bits[list(onto.closure(cid))] |= bit
+        canon = index.canon_arr
+        conocidos = np.flatnonzero(canon >= 0)
+        mask[conocidos] |= canon_bits[canon[conocidos]]
+
+        # Encontrados solo por el match flexible: se atribuyen uno a uno
+        for i in np.flatnonzero((estado == self._FOUND) & (mask == 0)).tolist():
+            candidatos = fridge.sueltos if fridge.canon_of[i] >= 0 else fridge.norms
+            for b, norm in enumerate(nevera):
+                if norm in candidatos and self._match_norm(tabla[i], {norm}):
+                    mask[i] |= np.uint64(1) << np.uint64(b)
+        return mask
+
+    def combine(
+        self,
+        ingredients: List[str],
+        platos: int = CONFIG.COMBO_MAX_PLATOS,
+        n: int = 3,
+        max_faltantes: int = CONFIG.COMBO_MAX_FALTANTES,
+    ) -> List[MealCombination]:
+        """
+        Las `n` mejores combinaciones de 2 a `platos` recetas que más
+        ingredientes de la nevera usan entre todas, con menos por comprar.
+        Cada plato puede tener como mucho `max_faltantes` faltantes y tiene
+        que usar algo de la nevera que no use ningún otro (core.combos.valida).
+        """
+        self._check_query(ingredients)
+        index   = self._index
+        catalog = index.catalog
+        nombres: Dict[str, str] = {}
+        for i in ingredients:
+            nombres.setdefault(_normalize(i), i)
+        nevera = sorted(nombres)
+        fridge = self._fridge(index, set(nevera))
+
+        with span("combine.recetas", recipes=len(catalog)):
+            estado = self._estados(index, fridge)
+            mask   = self._usos_nevera(index, fridge, nevera, estado)
+            encontrado = estado[catalog.key_norm] == self._FOUND
+            falta      = estado[catalog.key_norm] == self._MISSING
+            usos = (bitset.segment_or(np.where(encontrado, mask[catalog.key_norm], np.uint64(0)), catalog.key_indptr)
+                    | bitset.segment_or(mask[catalog.base_norm], catalog.base_indptr))
+            n_faltan = bitset.segment_sum(falta, catalog.key_indptr)
+
+        with span("combine.candidatas") as cand_span:
+            pool = self._pool_combinaciones(catalog, usos, n_faltan, falta, max_faltantes, len(nevera))
+            cand_span.set_attribute("candidates", len(pool))
+            faltan_ids = [
+                catalog.key_norm[catalog.key_indptr[p]:catalog.key_indptr[p + 1]][
+                    falta[catalog.key_indptr[p]:catalog.key_indptr[p + 1]]]
+                for p in pool.tolist()
+            ]
+            faltan_bits = bitset.from_sets(faltan_ids, len(catalog.ingredients))
+
+        with span("combine.busqueda", pool=len(pool)):
+            mejores = combos.buscar(
+                usos[pool], faltan_bits, catalog.proceso_real[pool].astype(float),
+                k_max=platos, n=n,
+                w_cobertura=CONFIG.COMBO_W_COBERTURA, w_faltante=CONFIG.COMBO_W_FALTANTE,
+            )
+
+        out = []
+        for score, combo in mejores:
+            posiciones = [int(pool[j]) for j in combo]
+            usado = int(np.bitwise_or.reduce(usos[posiciones]))
+            faltantes: Dict[int, str] = {}
+            for p in posiciones:
+                row = catalog.row(p)
+                for norm_id, item_id in zip(row.claves_norm, row.claves_item):
+                    if estado[norm_id] == self._MISSING:
+                        faltantes.setdefault(norm_id, catalog.items[item_id])
+            out.append(MealCombination(
+                recetas=[catalog.recipe(p) for p in posiciones],
+                ingredientes_usados=[nombres[a] for b, a in enumerate(nevera) if usado >> b & 1],
+                ingredientes_sin_usar=[nombres[a] for b, a in enumerate(nevera) if not usado >> b & 1],
+                faltantes=list(faltantes.values()),
+                puntuacion=score,
             ))
+        logger.info(f"Combinaciones: {len(out)} de {len(pool)} candidatas")
+        return out
+
+    @staticmethod
+    def _pool_combinaciones(catalog, usos, n_faltan, falta, max_faltantes, n_nevera) -> np.ndarray:
+        """
+        Posiciones que entran en la búsqueda: las COMBO_POOL de más valor
+        individual y las COMBO_POR_INGREDIENTE mejores de cada ingrediente de
+        la nevera, para que lo que solo usa una receta mediocre siga cubierto.
+        Recetas con los mismos usos y los mismos faltantes cuentan una vez.
+        """
+        validas = np.flatnonzero((usos != 0) & (n_faltan <= max_faltantes))
+        if not len(validas):
+            return validas
 
-        results.sort(key=lambda x: x.score_total, reverse=True)
-        results = self._apply_filtros(results, filtros)
+        # Huella del conjunto de faltantes: XOR de un hash por id
+        hashes = np.where(falta, (catalog.key_norm.astype(np.uint64) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15),
+                          np.uint64(0))
+        huella = bitset.segment_reduce(np.bitwise_xor, hashes, catalog.key_indptr, np.uint64(0))
+        _, primeras = np.unique(np.stack([usos[validas], huella[validas]], axis=1), axis=0, return_index=True)
+        validas = validas[np.sort(primeras)]
 
-        logger.info(f"Recomendadas {min(n, len(results))} de {len(results)} candidatas")
-        return results[:n]
+        valor = (CONFIG.COMBO_W_COBERTURA * bitset.popcount(usos[validas])
+                 - CONFIG.COMBO_W_FALTANTE * n_faltan[validas]
+                 + catalog.proceso_real[validas])
+        orden = validas[np.argsort(-valor, kind="stable")]
+        elegidas = [orden[:CONFIG.COMBO_POOL]]
+        for b in range(n_nevera):
+            con_b = orden[(usos[orden] >> np.uint64(b)) & np.uint64(1) == 1]
+            elegidas.append(con_b[:CONFIG.COMBO_POR_INGREDIENTE])
+        pool = np.concatenate(elegidas)
+        _, primeras = np.unique(pool, return_index=True)
+        return pool[np.sort(primeras)]
 
     # ── Sustituciones para UI ────────────────────────────────────────────────
 
@@ -0,0 +1,226 @@
+"""
+Trazas por petición, compatibles con OpenTelemetry.
+Sin dependencias: cada traza se exporta como un ExportTraceServiceRequest
+en OTLP/JSON (una línea por traza), que el receptor `otlpjsonfile` del
+OpenTelemetry Collector puede reenviar a cualquier backend.
+
+    with trace("analizar_nevera", modo=modo):   # raíz: decide el muestreo
+        with span("recommend.transform"):       # hijos: no-op si no se muestrea
+            ...
+
+Muestreo:
+  TRACE_SAMPLE_RATE  fracción de trazas que se exportan siempre (cabeza)
+  TRACE_SLOW_MS      además, cualquier traza más lenta que esto (cola);
+                     con 0 las no muestreadas ni se registran
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "eatguai"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: Dict[str, Any]):
+        self.trace_id   = trace_id
+        self.span_id    = os.urandom(8).hex()
+        self.parent_id  = parent_id
+        self.name       = name
+        self.start_ns   = time.time_ns()
+        self.end_ns     = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        out = {
+            "traceId":           self.trace_id,
+            "spanId":            self.span_id,
+            "name":              self.name,
+            "kind":              1,   # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano":   str(self.end_ns),
+            "attributes":        [_otlp_attr(k, v) for k, v in self.attributes.items()],
+            "status":            {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            out["parentSpanId"] = self.parent_id
+        return out
+
+
+class _NoopSpan:
+    """Lo que se obtiene fuera de una traza registrada: no hace nada."""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def _otlp_attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        v = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+# ============================================================================
+# EXPORTADORES
+# ============================================================================
+
+class FileExporter:
+    """Añade cada traza como una línea OTLP/JSON a `path`."""
+
+    def __init__(self, path: str):
+        self.path  = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        payload = {"resourceSpans": [{
+            "resource":   {"attributes": [_otlp_attr("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+        line = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class ConsoleExporter:
+    """Árbol legible de la traza en el log."""
+
+    def export(self, spans: List[Span]) -> None:
+        hijos: Dict[Optional[str], List[Span]] = {}
+        for s in spans:
+            hijos.setdefault(s.parent_id, []).append(s)
+        lines: List[str] = []
+
+        def walk(parent: Optional[str], depth: int) -> None:
+            for s in sorted(hijos.get(parent, []), key=lambda x: x.start_ns):
+                attrs = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+                err   = f" ERROR={s.error}" if s.error else ""
+                lines.append(f"{'  ' * depth}{s.name} {s.duration_ms:.2f}ms {attrs}{err}".rstrip())
+                walk(s.span_id, depth + 1)
+
+        walk(None, 0)
+        logger.info(f"Traza {spans[0].trace_id}\n" + "\n".join(lines))
+
+
+def _make_exporter(kind: str):
+    if kind == "file":
+        return FileExporter(CONFIG.TRACE_FILE)
+    if kind == "console":
+        return ConsoleExporter()
+    return None
+
+
+_exporter = _make_exporter(CONFIG.TRACE_EXPORTER)
+
+
+def set_exporter(exporter) -> None:
+    """Cambia el exportador en caliente (None desactiva las trazas)."""
+    global _exporter
+    _exporter = exporter
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+class _TraceState:
+    __slots__ = ("spans", "sampled")
+
+    def __init__(self, sampled: bool):
+        self.spans: List[Span] = []
+        self.sampled = sampled
+
+
+_state:   ContextVar[Optional[_TraceState]] = ContextVar("trace_state", default=None)
+_current: ContextVar[Optional[Span]]        = ContextVar("trace_span", default=None)
+
+
+def current_span():
+    """Span activo, o uno no-op si no hay traza registrándose."""
+    return _current.get() or _NOOP
+
+
+@contextmanager
+def _open(state: _TraceState, name: str, attributes: Dict[str, Any], trace_id: str, parent: Optional[Span]):
+    s = Span(trace_id, parent.span_id if parent else None, name, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current.reset(token)
+        state.spans.append(s)
+
+
+@contextmanager
+def trace(name: str, **attributes):
+    """Span raíz de una petición. Decide el muestreo y exporta al cerrar."""
+    exporter = _exporter
+    if exporter is None or _state.get() is not None:
+        # Sin exportador, o ya dentro de una traza: se comporta como un span
+        with span(name, **attributes) as s:
+            yield s
+        return
+
+    sampled = random.random() < CONFIG.TRACE_SAMPLE_RATE
+    if not sampled and CONFIG.TRACE_SLOW_MS <= 0:
+        yield _NOOP
+        return
+
+    state = _TraceState(sampled)
+    token = _state.set(state)
+    try:
+        with _open(state, name, attributes, os.urandom(16).hex(), None) as root:
+            yield root
+    finally:
+        _state.reset(token)
+        if state.sampled or root.duration_ms >= CONFIG.TRACE_SLOW_MS > 0:
+            try:
+                exporter.export(state.spans)
+            except Exception as e:
+                logger.warning(f"No se pudo exportar la traza: {e}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Span hijo del activo. Fuera de una traza registrada no cuesta casi nada."""
+    state = _state.get()
+    if state is None:
+        yield _NOOP
+        return
+    parent = _current.get()
+    with _open(state, name, attributes, parent.trace_id, parent) as s:
+        yield s
@@ -0,0 +1,63 @@
+"""
+Normalización de unidades de cantidad.
+
+Cada unidad se reduce a una dimensión y a su factor respecto a la unidad
+base de esa dimensión: gramos para masa, mililitros para volumen (las
+medidas de cocina, taza y cucharadas, incluidas) y piezas para "ud".
+Las unidades contables que no son intercambiables entre sí ("diente",
+"rebanada", "lata"...) son cada una su propia dimensión: 2 dientes de ajo
+y 1 ud de ajo no se comparan.
+
+Dos cantidades solo se comparan si comparten dimensión. Sin tabla de
+densidades ni pesos por pieza, 500 gr de pollo frente a 2 ud es
+"desconocido", no un déficit.
+"""
+import math
+from typing import Dict, Optional, Tuple
+
+from core.ontology import clave
+
+# Código de dimensión → nombre. El 0 es "sin unidad reconocible".
+DIMENSIONES: Tuple[str, ...] = (
+    "?", "masa", "volumen", "unidad",
+    "diente", "rebanada", "loncha", "filete", "hoja", "tallo", "rodaja",
+    "lata", "sobre", "placa", "manojo", "trozo", "muslo",
+)
+SIN_DIMENSION = 0
+_DIM = {nombre: i for i, nombre in enumerate(DIMENSIONES)}
+
+# unidad (ya pasada por `clave`) → (dimensión, factor a la unidad base)
+UNIDADES: Dict[str, Tuple[int, float]] = {
+    # Masa → gramos
+    "g": (_DIM["masa"], 1.0), "gr": (_DIM["masa"], 1.0), "gramo": (_DIM["masa"], 1.0),
+    "mg": (_DIM["masa"], 0.001),
+    "kg": (_DIM["masa"], 1000.0), "kilo": (_DIM["masa"], 1000.0), "kilogramo": (_DIM["masa"], 1000.0),
+    "lb": (_DIM["masa"], 453.6), "libra": (_DIM["masa"], 453.6), "oz": (_DIM["masa"], 28.35),
+    # Volumen → mililitros
+    "ml": (_DIM["volumen"], 1.0), "mililitro": (_DIM["volumen"], 1.0),
+    "cl": (_DIM["volumen"], 10.0), "dl": (_DIM["volumen"], 100.0),
+    "l": (_DIM["volumen"], 1000.0), "litro": (_DIM["volumen"], 1000.0), "lt": (_DIM["volumen"], 1000.0),
+    "taza": (_DIM["volumen"], 240.0), "vaso": (_DIM["volumen"], 200.0),
+    "cda": (_DIM["volumen"], 15.0), "cucharada": (_DIM["volumen"], 15.0), "tbsp": (_DIM["volumen"], 15.0),
+    "cdta": (_DIM["volumen"], 5.0), "cucharadita": (_DIM["volumen"], 5.0), "tsp": (_DIM["volumen"], 5.0),
+    # Piezas
+    "ud": (_DIM["unidad"], 1.0), "u": (_DIM["unidad"], 1.0), "unidad": (_DIM["unidad"], 1.0),
+    "pieza": (_DIM["unidad"], 1.0), "pza": (_DIM["unidad"], 1.0),
+    "docena": (_DIM["unidad"], 12.0),
+}
+# Contables: cada una su dimensión, factor 1
+UNIDADES.update({nombre: (i, 1.0) for i, nombre in enumerate(DIMENSIONES) if i > _DIM["unidad"]})
+
+
+def normalizar(cantidad: Optional[float], unidad: Optional[str]) -> Tuple[int, float]:
+    """
+    (código de dimensión, cantidad en la unidad base). Sin cantidad
+    positiva o con una unidad desconocida devuelve (SIN_DIMENSION, nan).
+    Sin unidad, la cantidad se toma en piezas ("3 huevos").
+    """
+    if cantidad is None or not cantidad > 0 or math.isinf(cantidad):
+        return SIN_DIMENSION, math.nan
+    if not unidad or not unidad.strip():
+        return _DIM["unidad"], float(cantidad)
+    dim, factor = UNIDADES.get(clave(unidad).rstrip("."), (SIN_DIMENSION, math.nan))
+    return dim, float(cantidad) * factor
@@ -3,6 +3,7 @@ Detección de ingredientes usando Gemini vía Vertex AI.
 """
 import json
 import logging
+import os
 import unicodedata
 from typing import List, Dict, Any
 
@@ -11,6 +12,8 @@ from vertexai.generative_models import GenerativeModel, Image as VertexImage
 
 from config import CONFIG
 from models import DetectedIngredient
+from core.metrics import stage
+from core.tracing import current_span, span
 
 logger = logging.getLogger(__name__)
 
@@ -76,13 +79,28 @@ class VisionError(Exception):
     pass
 
 def detect_gemini(image_path: str) -> List[Dict[str, Any]]:
-    """Envía la imagen a Gemini vía Vertex AI y devuelve lista raw."""
+    """
+    Envía la imagen a Gemini vía Vertex AI y devuelve lista raw.
+    Una sola llamada por ficha de admisión: los fallos no se reintentan aquí,
+    el usuario vuelve a subir la foto y esa subida pasa otra vez por admisión.
+    """
+    with span("vertex.generate_content"):
+        return _detect_gemini_once(image_path)
+
+
+def _detect_gemini_once(image_path: str) -> List[Dict[str, Any]]:
+    s = current_span()
     try:
         image = VertexImage.load_from_file(image_path)
+        s.set_attribute("image.bytes", os.path.getsize(image_path))
         response = _model.generate_content(
             [PROMPT, image],
             generation_config={"temperature": 0.1},
         )
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            s.set_attribute("gemini.prompt_tokens", usage.prompt_token_count)
+            s.set_attribute("gemini.output_tokens", usage.candidates_token_count)
         text = response.text.replace("```json", "").replace("```", "").strip()
         result = json.loads(text)
         logger.info(f"Gemini detectó {len(result)} ingredientes en bruto")
@@ -94,6 +112,14 @@ def detect_gemini(image_path: str) -> List[Dict[str, Any]]:
         logger.error(f"Error llamando a Vertex AI: {e}")
         raise VisionError(str(e))
 
+def warm_up() -> None:
+    """
+    Abre el canal con Vertex (auth + conexión) sin generar contenido:
+    count_tokens es barato y no consume cuota de generación.
+    """
+    _model.count_tokens(PROMPT)
+
+
 # ============================================================================
 # LIMPIEZA Y VALIDACIÓN
 # ============================================================================
@@ -118,6 +144,8 @@ def clean_ingredients(
 
             if name_norm in seen:
                 continue
+            if len(cleaned) >= CONFIG.MAX_INGREDIENTS:
+                break   # van ordenados por confianza: se quedan los más seguros
 
             seen.add(name_norm)
             emoji_raw = item.get("emoji", "")
@@ -146,9 +174,11 @@ def detectar_ingredientes(image_path: str) -> List[DetectedIngredient]:
     Función principal. Recibe path de imagen, devuelve lista de DetectedIngredient.
     Lanza VisionError si algo falla.
     """
-    raw = detect_gemini(image_path)
+    with stage("detect_gemini"):
+        raw = detect_gemini(image_path)
     logger.info(f"RAW GEMINI RESPONSE: {raw}")
-    return clean_ingredients(raw)
+    with stage("clean_ingredients"):
+        return clean_ingredients(raw)
 
 
 # ============================================================================
@@ -0,0 +1,112 @@
+"""
+Calentamiento al arrancar y estado de readiness.
+En Cloud Run la primera petición tras un arranque en frío pagaría la primera
+transformación TF-IDF, el primer cosine_similarity, la materialización de
+recetas, el render y la conexión con Vertex. Aquí se pagan antes de
+declararse listo.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import CONFIG
+from models import Recommendation
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Estado del calentamiento; lo consultan /readyz y /healthz."""
+
+    def __init__(self):
+        self._ready  = threading.Event()
+        self.started = time.time()
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self) -> None:
+        self._ready.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready":     self.ready,
+            "uptime_s":  round(time.time() - self.started, 1),
+            "warmup_ms": dict(self.timings),
+            "error":     self.error,
+        }
+
+
+def warm_up(
+    recommender,
+    render: Optional[Callable[[List[Recommendation], str], Any]] = None,
+    vertex: bool = False,
+    readiness: Optional[Readiness] = None,
+) -> Readiness:
+    """
+    Lanza las consultas de CONFIG.WARMUP_QUERIES en todos los modos, pasa
+    los resultados por `render` y, si `vertex`, abre el canal con Gemini.
+    Un fallo en Vertex no bloquea la readiness: las recetas ya sirven.
+    """
+    readiness = readiness or Readiness()
+    t_total = time.perf_counter()
+
+    def fase(nombre: str, fn: Callable[[], Any]) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            readiness.timings[nombre] = round((time.perf_counter() - t0) * 1000, 1)
+
+    try:
+        def consultas():
+            ultimas = {}
+            for modo in CONFIG.MODES:
+                for query in CONFIG.WARMUP_QUERIES:
+                    ultimas[modo] = recommender.recommend(query, modo=modo) or ultimas.get(modo, [])
+                recommender.recommend(
+                    CONFIG.WARMUP_QUERIES[0], modo=modo,
+                    filtros={"max_tiempo": 30, "max_faltantes": 1},
+                )
+            return ultimas
+
+        ultimas = fase("recommend", consultas)
+        if render is not None:
+            fase("render", lambda: [render(recs, modo) for modo, recs in ultimas.items()])
+    except Exception as e:
+        # Sin recetas no tiene sentido recibir tráfico: no se marca listo
+        readiness.error = f"{type(e).__name__}: {e}"
+        logger.error(f"Calentamiento fallido: {readiness.error}")
+        return readiness
+
+    if vertex:
+        try:
+            from core.vision import warm_up as vision_warm_up
+            fase("vertex", vision_warm_up)
+        except Exception as e:
+            logger.warning(f"No se pudo abrir el canal con Vertex: {e}")
+
+    readiness.timings["total"] = round((time.perf_counter() - t_total) * 1000, 1)
+    readiness.mark_ready()
+    logger.info(f"Calentamiento completado: {readiness.timings}")
+    return readiness
+
+
+def warm_up_async(recommender, **kwargs) -> Readiness:
+    """`warm_up` en un hilo de fondo; devuelve el Readiness al momento."""
+    readiness = kwargs.pop("readiness", None) or Readiness()
+    threading.Thread(
+        target=warm_up,
+        args=(recommender,),
+        kwargs={**kwargs, "readiness": readiness},
+        name="warmup",
+        daemon=True,
+    ).start()
+    return readiness
@@ -87,6 +87,7 @@ class Recommendation(BaseModel):
     coincidencias: List[str]
     ingredientes_faltantes: List[RecipeIngredient]
     score_total: float = 0.0
+    raciones_posibles: Optional[int] = None  # con inventario: veces que alcanza la receta tal cual
     
     @property
     def match_category(self) -> str:
@@ -99,6 +100,21 @@ class Recommendation(BaseModel):
         return "low"
 
 
+class MealCombination(BaseModel):
+    """Varios platos que juntos aprovechan la nevera."""
+
+    recetas: List[Recipe]
+    ingredientes_usados: List[str]
+    ingredientes_sin_usar: List[str]
+    faltantes: List[str]          # sin repetir entre platos
+    puntuacion: float = 0.0
+
+    @property
+    def cobertura(self) -> float:
+        total = len(self.ingredientes_usados) + len(self.ingredientes_sin_usar)
+        return len(self.ingredientes_usados) / total if total else 0.0
+
+
 class Rating(BaseModel):
     """Valoración de usuario."""
     
@@ -0,0 +1,60 @@
+"""
+core.combos.buscar frente a fuerza bruta sobre instancias aleatorias
+pequeñas: mismas puntuaciones en el top y solo combinaciones válidas.
+"""
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from core import combos
+from core.bitset import popcount
+
+W_COBERTURA, W_FALTANTE = 10.0, 4.0
+
+
+def _instancia(rng):
+    P = int(rng.integers(3, 14))
+    usos    = rng.integers(0, 2**7, size=P, dtype=np.uint64) & rng.integers(0, 2**7, size=P, dtype=np.uint64)
+    faltan  = rng.integers(0, 2**10, size=(P, 1), dtype=np.uint64) & rng.integers(0, 2**10, size=(P, 1), dtype=np.uint64)
+    calidad = rng.choice([0.0, 0.5, 1.0], size=P)
+    return usos, faltan, calidad
+
+
+def _valor(usos, faltan, calidad, combo) -> float:
+    u = np.bitwise_or.reduce(usos[list(combo)])
+    f = np.bitwise_or.reduce(faltan[list(combo)], axis=0)
+    return (W_COBERTURA * int(popcount(np.array([u]))[0])
+            - W_FALTANTE * int(popcount(f[None, :])[0])
+            + float(calidad[list(combo)].sum()))
+
+
+def _fuerza_bruta(usos, faltan, calidad, k_min, k_max, n):
+    puntuaciones = [
+        _valor(usos, faltan, calidad, c)
+        for k in range(k_min, k_max + 1)
+        for c in combinations(range(len(usos)), k)
+        if combos.valida([usos[i] for i in c])
+    ]
+    return sorted(puntuaciones, reverse=True)[:n]
+
+
+@pytest.mark.parametrize("k_max,n", [(2, 1), (3, 1), (3, 3)])
+def test_igual_que_fuerza_bruta(k_max, n):
+    rng = np.random.default_rng(k_max * 100 + n)
+    for _ in range(400):
+        usos, faltan, calidad = _instancia(rng)
+        out = combos.buscar(usos, faltan, calidad, k_max=k_max, n=n,
+                            w_cobertura=W_COBERTURA, w_faltante=W_FALTANTE)
+        for sc, combo in out:
+            assert combos.valida([usos[i] for i in combo])
+            assert sc == pytest.approx(_valor(usos, faltan, calidad, combo))
+        esperado = _fuerza_bruta(usos, faltan, calidad, 2, k_max, n)
+        assert [sc for sc, _ in out] == pytest.approx(esperado)
+
+
+def test_valida():
+    assert combos.valida([0b011, 0b110])
+    assert not combos.valida([0b011, 0b001])            # contenido en el otro
+    assert not combos.valida([0b011, 0b100, 0b110])     # contenido en la unión de los demás
+    assert not combos.valida([0b000, 0b001])
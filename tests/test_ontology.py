@@ -0,0 +1,139 @@
+"""
+Ontología de ingredientes: resolución de nombres y su efecto en el match
+del recommender (qué casa con qué y en qué sentido).
+"""
+import pytest
+
+from config import CONFIG
+from core.ontology import Ontology, clave
+from core.recommender import RecipeRecommender, _normalize
+
+MINI = {
+    "queso":          {"alias": ["quesos"]},
+    "queso manchego": {"alias": ["manchego"], "es_un": "queso"},
+    "pollo":          {"alias": ["pechuga de pollo"], "es_un": "carne"},
+    "carne picada":   {"es_un": "carne"},
+    "nuez":           {},
+    "mantequilla":    {},
+    "ajo":            {},
+}
+
+
+@pytest.fixture(scope="module")
+def onto():
+    return Ontology.load(CONFIG.ONTOLOGY_FILE)
+
+
+def _nombre(o: Ontology, texto: str):
+    cid = o.resolve(texto)
+    return None if cid is None else o.name(cid)
+
+
+# ── resolve ──────────────────────────────────────────────────────────────────
+
+def test_clave():
+    assert clave("Champiñones") == "champinone"
+    assert clave("  Tomates  Secos ") == "tomate seco"
+
+
+def test_alias_y_plural():
+    o = Ontology(MINI)
+    assert _nombre(o, "Quesos") == "queso"
+    assert _nombre(o, "manchego") == "queso manchego"
+    assert _nombre(o, "pechugas de pollo") == "pollo"
+
+
+def test_parte_de_x():
+    o = Ontology(MINI)
+    assert _nombre(o, "diente de ajo") == "ajo"
+    assert _nombre(o, "muslo de pollo") == "pollo"
+    assert _nombre(o, "trozo de queso manchego") == "queso manchego"
+    assert o.resolve("diente de algo raro") is None
+
+
+@pytest.mark.parametrize("texto", [
+    "nuez moscada", "mantequilla de cacahuete", "queso de untar raro",
+    "picada de almendra", "pollo al curry precocinado",
+])
+def test_sin_prefijos(texto):
+    """Un nombre desconocido no hereda el id de su prefijo conocido."""
+    assert Ontology(MINI).resolve(texto) is None
+
+
+def test_es_un_solo_hacia_arriba():
+    o = Ontology(MINI)
+    manchego, queso = o.resolve("queso manchego"), o.resolve("queso")
+    assert queso in o.closure(manchego)
+    assert manchego not in o.closure(queso)
+
+
+def test_cierre_con_ciclo():
+    o = Ontology({"a": {"es_un": "b"}, "b": {"es_un": "a"}})
+    assert o.closure(o.resolve("a")) == {o.resolve("a"), o.resolve("b")}
+
+
+def test_fichero_invalido(tmp_path):
+    roto = tmp_path / "roto.json"
+    roto.write_text("{no es json", encoding="utf-8")
+    assert len(Ontology.load(str(roto))) == 0
+    assert len(Ontology.load(str(tmp_path / "no_existe.json"))) == 0
+
+
+@pytest.mark.parametrize("texto,esperado", [
+    ("pechuga de pollo", "pollo"),
+    ("diente de ajo", "ajo"),
+    ("champiñones", "champinon"),
+    ("queso manchego", "queso manchego"),
+    ("nuez moscada", None),
+    ("mantequilla de cacahuete", None),
+    ("zumo de limon", None),
+    ("harina de garbanzo", None),
+    ("picada de almendra", None),
+    ("yemas", "huevo"),
+])
+def test_fichero(onto, texto, esperado):
+    assert _nombre(onto, texto) == esperado
+
+
+# ── Efecto en el match ───────────────────────────────────────────────────────
+
+@pytest.fixture(scope="module")
+def rec():
+    rec = RecipeRecommender()
+    rec.add_recipe({
+        "nombre": "Receta de prueba ontologia",
+        "ingredientes_clave": [
+            {"item": n, "nombre": n}
+            for n in ("queso", "queso manchego", "pollo", "queso crema", "zumo de limon")
+        ],
+        "ingredientes_base": ["picada de almendra"],
+        "proceso_detallado": [],
+    })
+    return rec
+
+
+def _estado(rec, receta: str, nevera):
+    index  = rec._index
+    norm   = _normalize(receta)
+    fridge = rec._fridge(index, {_normalize(i) for i in nevera})
+    return rec._ingredient_status(index.catalog.ingredients.get(norm), norm, fridge)
+
+
+@pytest.mark.parametrize("receta,nevera,esperado", [
+    ("queso", ["queso manchego"], RecipeRecommender._FOUND),        # hipónimo sirve
+    ("queso manchego", ["queso"], RecipeRecommender._MISSING),      # al revés no
+    ("pollo", ["pechuga de pollo"], RecipeRecommender._FOUND),
+    ("queso crema", ["queso"], RecipeRecommender._MISSING),         # sin contención entre conocidos
+    ("zumo de limon", ["limon"], RecipeRecommender._FOUND),         # desconocido: match flexible
+])
+def test_estado(rec, receta, nevera, esperado):
+    assert _estado(rec, receta, nevera) == esperado
+
+
+def test_base_sin_prefijo(rec):
+    """'picada de almendra' no es 'carne picada': no cuenta como base en la nevera."""
+    index  = rec._index
+    pos    = len(index.catalog) - 1
+    fridge = rec._fridge(index, {"carne picada"})
+    _, n_base = rec._conteos(index, fridge, rec._estados(index, fridge))
+    assert n_base[pos] == 0
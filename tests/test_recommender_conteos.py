@@ -0,0 +1,81 @@
+"""
+Conteos vectorizados de `_match_loop` frente al recuento entrada a entrada
+(el bucle por receta de antes): mismos encontrados, base y faltantes.
+"""
+import pytest
+
+from benchmarks.synthetic import cargar_perfil, escribir_catalogo, generar_neveras, generar_recetas
+from core.recommender import RecipeRecommender, _normalize
+
+N_RECETAS = 2000
+FILTROS = (None, {"max_faltantes": 0}, {"max_tiempo": 30, "max_faltantes": 1})
+
+TORTILLA_DOBLE = {
+    "nombre": "Tortilla doble",
+    "ingredientes_clave": [
+        {"item": "huevo", "nombre": "huevo"},
+        {"item": "huevos", "nombre": "huevos"},
+        {"item": "patata", "nombre": "patata"},
+    ],
+    "ingredientes_base": ["sal", "sal"],
+    "proceso_detallado": [],
+}
+
+
+def _referencia(rec, index, ingredientes):
+    """(encontrados, base) por receta, recorriendo las entradas en Python."""
+    fridge = rec._fridge(index, {_normalize(i) for i in ingredientes})
+    estado = rec._estados(index, fridge)
+    out = []
+    for row in index.catalog.rows():
+        n_found = sum(1 for i in row.claves_norm if estado[i] != rec._MISSING)
+        n_base  = sum(1 for b in row.base_norm
+                      if b in fridge.ids or fridge.canon_of[b] in fridge.canon)
+        out.append((n_found, n_base))
+    return fridge, estado, out
+
+
+def _conteos(rec, index, ingredientes):
+    fridge, estado, esperado = _referencia(rec, index, ingredientes)
+    n_found, n_base = rec._conteos(index, fridge, estado)
+    return list(zip(n_found.tolist(), n_base.tolist())), esperado
+
+
+@pytest.fixture(scope="module")
+def sintetico(tmp_path_factory):
+    perfil = cargar_perfil()
+    path   = str(tmp_path_factory.mktemp("synth") / "recetas.json")
+    escribir_catalogo(generar_recetas(perfil, N_RECETAS), path)
+    return RecipeRecommender(path), generar_neveras(perfil, N_RECETAS, 50)
+
+
+def test_repetidos_en_una_receta():
+    rec = RecipeRecommender()
+    rec.add_recipe(TORTILLA_DOBLE)
+    index = rec._index
+    top = rec._rank(index, ["huevo", "patata"], "chef", {"max_faltantes": 0})
+    tortilla = [r for r in top if index.catalog.recipe(r.pos).nombre == "Tortilla Doble"]
+    assert len(tortilla) == 1
+    assert tortilla[0].n_faltantes == 0 and tortilla[0].porcentaje_match == 1.0
+    obtenido, esperado = _conteos(rec, index, ["huevo", "patata", "sal"])
+    assert obtenido[tortilla[0].pos] == esperado[tortilla[0].pos] == (3, 2)
+
+
+def test_conteos_igual_que_por_entrada(sintetico):
+    rec, neveras = sintetico
+    for nevera in neveras:
+        obtenido, esperado = _conteos(rec, rec._index, nevera["ingredientes"])
+        assert obtenido == esperado
+
+
+def test_faltantes_coherentes_con_filtros(sintetico):
+    rec, neveras = sintetico
+    catalog = rec.catalog
+    for nevera in neveras[:10]:
+        for filtros in FILTROS:
+            for r in rec._rank(rec._index, nevera["ingredientes"], nevera["modo"], filtros):
+                found, missing = r.partes(catalog)
+                assert len(missing) == r.n_faltantes
+                assert len(found) + len(missing) == int(rec._index.n_claves[r.pos])
+                if filtros and filtros.get("max_faltantes") is not None:
+                    assert r.n_faltantes <= filtros["max_faltantes"]
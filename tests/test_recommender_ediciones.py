@@ -0,0 +1,102 @@
+"""
+Edición incremental: tras añadir, actualizar y quitar recetas en memoria,
+el snapshot equivale al de un catálogo construido desde cero con el
+resultado (mismas columnas, posiciones y filas TF-IDF; tras `refit`,
+mismas recomendaciones).
+"""
+import json
+
+import numpy as np
+import pytest
+
+from config import CONFIG
+from core.recommender import RecipeRecommender
+
+NEVERAS = [
+    ["huevo", "patata", "cebolla"],
+    ["pollo", "arroz", "tomate", "ajo"],
+    ["leche", "harina", "azucar", "mantequilla"],
+    ["queso", "jamon", "pan"],
+]
+
+
+def _nueva(nombre, *items):
+    return {
+        "nombre": nombre,
+        "ingredientes_clave": [{"item": i, "qty": 1, "unit": "ud"} for i in items],
+        "ingredientes_base": ["sal"],
+        "proceso_detallado": [],
+    }
+
+
+@pytest.fixture(scope="module")
+def recetas():
+    with open(CONFIG.RECIPES_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def editado_y_fresco(recetas, tmp_path_factory):
+    mp = pytest.MonkeyPatch()
+    mp.setattr(CONFIG, "TFIDF_REFIT_EVERY", 10**9)   # sin reajuste en segundo plano
+    esperado = list(recetas)
+    rec = RecipeRecommender(CONFIG.RECIPES_FILE)
+
+    nueva = rec.add_recipe(_nueva("tortilla de prueba", "huevo", "patata", "ingrediente inventado"))
+    esperado.append({**_nueva("tortilla de prueba", "huevo", "patata", "ingrediente inventado"),
+                     "receta_id": nueva.receta_id})
+
+    rid = esperado[10]["receta_id"]
+    rec.update_recipe(rid, _nueva("arroz de prueba", "arroz", "pollo", "azafran"))
+    esperado[10] = {**_nueva("arroz de prueba", "arroz", "pollo", "azafran"), "receta_id": rid}
+
+    for i in (3, 50):                    # al quitar, las posiciones siguientes se renumeran
+        rec.remove_recipe(esperado[i]["receta_id"])
+        del esperado[i]
+
+    rec.add_recipe({**_nueva("pan con queso", "pan", "queso"), "receta_id": 999_999})
+    esperado.append({**_nueva("pan con queso", "pan", "queso"), "receta_id": 999_999})
+
+    path = tmp_path_factory.mktemp("ediciones") / "recetas.json"
+    path.write_text(json.dumps(esperado), encoding="utf-8")
+    yield rec, RecipeRecommender(str(path))
+    mp.undo()
+
+
+def _filas(index):
+    cat = index.catalog
+    return [
+        (row.receta_id, [cat.ingredients[i] for i in row.claves_norm],
+         [cat.ingredients[i] for i in row.base_norm], row.tiempo_min, row.dificultad)
+        for row in cat.rows()
+    ]
+
+
+def test_snapshot_igual_que_desde_cero(editado_y_fresco):
+    rec, fresco = editado_y_fresco
+    index, ref = rec._index, fresco._index
+    assert _filas(index) == _filas(ref)
+    assert index.positions == ref.positions
+    claves = {index.catalog.ingredients[i] for i in index.key_ids.tolist()}
+    assert claves >= {ref.catalog.ingredients[i] for i in ref.key_ids.tolist()}
+    assert len(index.canon_of) == index.n_ingredientes == len(index.catalog.ingredients)
+
+
+def test_filas_tfidf_con_el_vectorizador_vigente(editado_y_fresco):
+    rec, _ = editado_y_fresco
+    index = rec._index
+    docs  = [rec._document(r) for r in index.catalog.iter_recipes()]
+    esperada = index.vectorizer.transform(docs)
+    assert index.tfidf_matrix.shape == esperada.shape
+    assert np.allclose(index.tfidf_matrix.toarray(), esperada.toarray())
+
+
+@pytest.mark.parametrize("nevera", NEVERAS)
+def test_recomendaciones_tras_refit(editado_y_fresco, nevera):
+    rec, fresco = editado_y_fresco
+    rec.refit()
+
+    def _ids(r):
+        return [(x.receta.receta_id, round(x.score_total, 6)) for x in r.recommend(nevera, n=10, modo="chef")]
+
+    assert _ids(rec) == _ids(fresco)
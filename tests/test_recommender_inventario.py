@@ -0,0 +1,73 @@
+"""
+Raciones con inventario: mínimo por receta de disponible / necesario en la
+misma dimensión (con conversión de unidades y vía ontología), penalización
+cuando no llega ni una, y límite de tamaño por lista como RecommendRequest.
+"""
+import json
+
+import pytest
+
+from config import CONFIG
+from core.recommender import QueryTooLargeError, RecipeRecommender
+
+RECETAS = [
+    ("tortilla",    [("huevo", 4, "ud")]),
+    ("pure",        [("patata", 1, "kg"), ("leche", 500, "ml")]),
+    ("pollo asado", [("pollo", 300, "gr")]),
+    ("alioli",      [("ajo", 2, "diente")]),
+]
+
+
+@pytest.fixture(scope="module")
+def rec(tmp_path_factory):
+    path = tmp_path_factory.mktemp("inventario") / "recetas.json"
+    path.write_text(json.dumps([
+        {
+            "receta_id": i,
+            "nombre": nombre,
+            "ingredientes_clave": [{"item": item, "qty": qty, "unit": unit} for item, qty, unit in claves],
+            "ingredientes_base": [],
+            "proceso_detallado": [],
+        }
+        for i, (nombre, claves) in enumerate(RECETAS, start=1)
+    ]), encoding="utf-8")
+    return RecipeRecommender(str(path))
+
+
+def _resultado(rec, nombre, inventario, ingredientes=()):
+    receta_id = [n for n, _ in RECETAS].index(nombre) + 1
+    for r in rec.recommend(list(ingredientes), n=len(RECETAS), modo="chef", inventario=inventario):
+        if r.receta.receta_id == receta_id:
+            return r
+    raise AssertionError(f"{nombre} no está entre los resultados")
+
+
+@pytest.mark.parametrize("receta,inventario,esperado", [
+    ("tortilla",    {"huevo": (9, "ud")}, 2),                                 # floor(9 / 4)
+    ("pure",        {"patata": (2500, "gr"), "leche": (1.2, "l")}, 2),        # min(2.5, 2.4)
+    ("pollo asado", {"pechuga de pollo": (0.7, "kg")}, 2),                    # vía ontología
+    ("alioli",      {"ajo": (3, "ud")}, None),                                # ud frente a dientes
+])
+def test_raciones_posibles(rec, receta, inventario, esperado):
+    assert _resultado(rec, receta, inventario).raciones_posibles == esperado
+
+
+def test_sin_raciones_penaliza(rec):
+    rec._results.clear()
+    llega    = _resultado(rec, "tortilla", {"huevo": (8, "ud")})
+    no_llega = _resultado(rec, "tortilla", {"huevo": (3, "ud")})
+    assert no_llega.raciones_posibles == 0
+    assert llega.score_total - no_llega.score_total == pytest.approx(CONFIG.QTY_SHORTFALL_PENALTY)
+
+
+def test_listas_llenas_no_se_suman(rec):
+    n = CONFIG.MAX_INGREDIENTS
+    ingredientes = ["huevo"] + [f"ingrediente {i}" for i in range(n - 1)]
+    inventario   = {"huevo": (9, "ud"), **{f"articulo {i}": (100.0, "g") for i in range(n - 1)}}
+    assert _resultado(rec, "tortilla", inventario, ingredientes).raciones_posibles == 2
+
+
+def test_inventario_demasiado_grande(rec):
+    inventario = {f"articulo {i}": (100.0, "g") for i in range(CONFIG.MAX_INGREDIENTS + 1)}
+    with pytest.raises(QueryTooLargeError):
+        rec.recommend(["huevo"], inventario=inventario)
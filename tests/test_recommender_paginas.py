@@ -0,0 +1,56 @@
+"""
+Caché de consultas con ventana: `recommend`, `search` y `page` devuelven lo
+mismo que la lista completa de `_rank`, también más allá de la ventana.
+"""
+import pytest
+
+from config import CONFIG
+from core.recommender import RecipeRecommender
+
+NEVERA = ["huevo", "patata", "cebolla", "leche", "queso"]
+VENTANA = 4
+
+
+@pytest.fixture(scope="module")
+def rec():
+    return RecipeRecommender()
+
+
+@pytest.fixture(autouse=True)
+def ventana(monkeypatch, rec):
+    monkeypatch.setattr(CONFIG, "QUERY_CACHE_TOP", VENTANA)
+    rec._results.clear()
+
+
+def _ids(recs):
+    return [r.receta.receta_id for r in recs]
+
+
+def _completa(rec):
+    index = rec._index
+    return [index.catalog[r.pos].receta_id
+            for r in rec._rank(index, NEVERA, "chef", None)]
+
+
+def test_cache_guarda_solo_la_ventana(rec):
+    rec.recommend(NEVERA, modo="chef")
+    (_, ranking), = rec._results.values()
+    assert len(ranking.items) == VENTANA < ranking.total
+
+
+@pytest.mark.parametrize("n", [1, VENTANA, VENTANA + 3])
+def test_recommend(rec, n):
+    esperado = _completa(rec)[:n]
+    assert _ids(rec.recommend(NEVERA, n=n, modo="chef")) == esperado
+    assert _ids(rec.recommend(NEVERA, n=n, modo="chef")) == esperado   # desde la caché
+
+
+def test_paginas_mas_alla_de_la_ventana(rec):
+    esperado = _completa(rec)
+    pagina = rec.search(NEVERA, n=3, modo="chef")
+    vistos = _ids(pagina.items)
+    while pagina.has_more:
+        pagina = rec.page(pagina.query_id, len(vistos), 3)
+        vistos += _ids(pagina.items)
+    assert vistos == esperado
+    assert pagina.total == len(esperado)